@@ -0,0 +1,85 @@
+"""Benchmark the timeline conflict analysis at growing numbers of segments.
+
+Each size gets synthetic segments over one year: a few segments per activity,
+a third of the activities High priority, plus one deadline per activity. The
+full analysis (merge, sweep and pair count) is timed once per repeat, then
+``--rechecks`` single-activity changes go through ``recheck``. The full
+analysis should stay well under a second at a million segments, and a
+recheck should cost a small fraction of it.
+
+    python benchmarks/bench_conflicts.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planner_conflicts import HIGH, TimelineConflicts
+
+START_DAY, END_DAY = 19723, 20088  # 2024-01-01 .. 2024-12-31
+SEGMENTS_PER_ACTIVITY = 3
+LONGEST_SEGMENT = 21
+
+
+def synthetic(size: int, rng: np.random.Generator) -> tuple:
+    activities = max(size // SEGMENTS_PER_ACTIVITY, 1)
+    activity_ids = rng.integers(0, activities, size)
+    starts = rng.integers(START_DAY - LONGEST_SEGMENT, END_DAY, size)
+    ends = starts + rng.integers(0, LONGEST_SEGMENT, size)
+    priorities = rng.integers(0, 3, activities)[activity_ids]
+    deadlines = rng.integers(START_DAY, END_DAY + 1, activities)
+    return activity_ids, starts, ends, priorities, np.arange(activities), deadlines
+
+
+def run(size: int, repeats: int, rechecks: int) -> dict:
+    rng = np.random.default_rng(size)
+    columns = synthetic(size, rng)
+    # Capacity at the 90th percentile of the daily load, so about a tenth of the days are overloaded
+    sizing = TimelineConflicts(START_DAY, END_DAY, *columns, capacity=size)
+    capacity = int(np.quantile(sizing.load, 0.9))
+    full = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        conflicts = TimelineConflicts(START_DAY, END_DAY, *columns, capacity=capacity)
+        full.append(time.perf_counter() - start)
+    recheck = []
+    for activity_id in rng.integers(0, size // SEGMENTS_PER_ACTIVITY, rechecks).tolist():
+        first = int(rng.integers(START_DAY, END_DAY - LONGEST_SEGMENT))
+        inputs = {
+            'segments': [(activity_id, first, first + 5, HIGH), (activity_id, first + 10, first + 20, HIGH)],
+            'deadlines': [(activity_id, first + 20)],
+        }
+        start = time.perf_counter()
+        conflicts.recheck([activity_id], inputs)
+        recheck.append(time.perf_counter() - start)
+    runs = conflicts.overloaded()
+    return {
+        'full_ms': statistics.median(full) * 1000,
+        'recheck_ms': statistics.median(recheck) * 1000,
+        'peak': conflicts.peak[0],
+        'overloaded_days': sum(last - first + 1 for first, last, _ in runs),
+        'pairs': conflicts.pair_count,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--rechecks', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'segments':>10} {'full (ms)':>10} {'recheck (ms)':>13} {'peak':>8} {'overloaded':>11} {'High pairs':>14}")
+    for size in args.sizes:
+        result = run(size, args.repeats, args.rechecks)
+        print(f"{size:>10} {result['full_ms']:>10.1f} {result['recheck_ms']:>13.2f} {result['peak']:>8,} "
+              f"{result['overloaded_days']:>11,} {result['pairs']:>14,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark add/delete latency of the activity table at growing table sizes.
+
+Each size gets a fresh database filled with synthetic rows; the table model
+loads its first window (what the view shows on screen) and then a series of
+single adds and deletes go through the same path ActivityView uses.  The
+latency should stay flat as the table grows.
+
+    python benchmarks/bench_incremental_updates.py [--sizes 1000 10000 100000 500000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication
+
+from planner_app import ActivityModel, ActivityTableModel, Database
+
+ACTIVITY = {
+    'category': 'Meeting',
+    'activity': 'Team Meeting',
+    'status': 'Pending',
+    'notification': '2024-05-01 06:00:00',
+    'timeline': '2024-05-01 - 2024-05-03',
+    'deadline': '2024-05-03',
+    'priority': 'High',
+    'notes': 'benchmark row',
+}
+
+
+def populate(db: Database, rows: int) -> None:
+    with db.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO activities (category, activity, status, notification, timeline, deadline, priority, notes) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [db.encode_activity(conn, ACTIVITY)] * rows
+        )
+
+
+def run(app: QApplication, size: int, repeats: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'))
+        db.create_table()
+        populate(db, size)
+        model = ActivityModel(db)
+        table_model = ActivityTableModel(model)
+        table_model.reload()
+        table_model.fetchMore()
+
+        add_times, delete_times = [], []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            row = model.add_activity(ACTIVITY)
+            table_model.insert_activity_row(row)
+            add_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            if model.delete_activity(row[0]) is not None:
+                table_model.remove_activity_row(row[0])
+            delete_times.append(time.perf_counter() - start)
+            # Deliver the model signals queued for the view, as the event loop would between actions
+            app.processEvents()
+        db.close()
+    return {
+        'add_ms': statistics.median(add_times) * 1000,
+        'delete_ms': statistics.median(delete_times) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 500_000])
+    parser.add_argument('--repeats', type=int, default=50)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    print(f"{'rows':>10} {'add (ms)':>10} {'delete (ms)':>12}")
+    for size in args.sizes:
+        result = run(app, size, args.repeats)
+        print(f"{size:>10} {result['add_ms']:>10.3f} {result['delete_ms']:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
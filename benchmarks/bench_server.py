@@ -0,0 +1,120 @@
+"""Benchmark concurrent writers sharing one database, directly and through planner_server.
+
+For each client count a fresh database of synthetic activities is written, then
+every client adds ``--writes`` activities one at a time, all at once:
+
+* direct: each client process opens the file itself, as separate planner_app
+  copies do, and retries after "database is locked" errors;
+* server: each client process calls a localhost planner server, which
+  batches the writes that arrive together into one transaction.
+
+Reported are total throughput, per-write latency, lock errors (direct) and the
+average number of writes per server commit.
+
+    python benchmarks/bench_server.py [--clients 1 8 32] [--writes 200]
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import createDEMOactivities
+from planner_client import PlannerClient, RemoteModel
+from planner_metrics import METRICS
+from planner_model import ActivityModel, Database
+from planner_server import PlannerServer
+
+ROWS = 10_000
+# Seconds allowed for the client processes to start before they all begin writing
+STARTUP_DELAY = 5.0
+ACTIVITY = {
+    'category': 'Meeting',
+    'activity': 'Team Meeting',
+    'status': 'Pending',
+    'notification': '2024-05-01 06:00:00',
+    'timeline': '2024-05-01 - 2024-05-03',
+    'deadline': '2024-05-03',
+    'priority': 'High',
+    'notes': 'benchmark row',
+}
+
+
+def client(target: str, writes: int, start_at: float) -> Tuple[List[float], int, float]:
+    """One client process: add ``writes`` activities to a database file or a server at ``host:port``.
+
+    Waits until ``start_at`` so all clients begin together; returns the latencies,
+    the "database is locked" errors retried and when it finished.
+    """
+    if os.path.exists(target):
+        model = ActivityModel(Database(target))
+    else:
+        model = RemoteModel(PlannerClient(target))
+    time.sleep(max(start_at - time.time(), 0))
+    latencies, errors = [], 0
+    for _ in range(writes):
+        start = time.perf_counter()
+        while True:
+            try:
+                model.add_activity(ACTIVITY)
+                break
+            except sqlite3.OperationalError:
+                errors += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors, time.time()
+
+
+def run_clients(target: str, clients: int, writes: int) -> Tuple[List[float], int, float]:
+    """Run ``clients`` client processes at once; returns all latencies, lock errors and the wall time."""
+    start_at = time.time() + STARTUP_DELAY
+    with multiprocessing.get_context('spawn').Pool(clients) as pool:
+        results = pool.starmap(client, [(target, writes, start_at)] * clients)
+    return ([latency for result in results for latency in result[0]], sum(result[1] for result in results),
+            max(result[2] for result in results) - start_at)
+
+
+def direct(path: str, clients: int, writes: int) -> tuple:
+    latencies, errors, elapsed = run_clients(path, clients, writes)
+    return latencies, elapsed, f"{errors} lock errors retried"
+
+
+def served(path: str, clients: int, writes: int) -> tuple:
+    server = PlannerServer(ActivityModel(Database(path)), port=0)
+    server.run_in_thread()
+    METRICS.reset()
+    METRICS.enable()
+    try:
+        latencies, _, elapsed = run_clients(f'127.0.0.1:{server.port}', clients, writes)
+    finally:
+        METRICS.enable(False)
+        server.stop()
+    batches = METRICS.snapshot()['operations'].get('PlannerServer.write_batch', {})
+    return latencies, elapsed, f"{batches.get('rows', 0) / max(batches.get('count', 0), 1):.1f} writes per commit"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--writes', type=int, default=200, help="activities each client adds")
+    args = parser.parse_args()
+
+    print(f"{'clients':>8} {'mode':>7} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>8}  notes")
+    for clients in args.clients:
+        for mode, bench in (('direct', direct), ('server', served)):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.db')
+                createDEMOactivities.write_sqlite(createDEMOactivities.generate(ROWS, 1), path)
+                latencies, elapsed, notes = bench(path, clients, args.writes)
+            latencies.sort()
+            print(f"{clients:>8} {mode:>7} {len(latencies) / elapsed:>9.0f} "
+                  f"{statistics.median(latencies) * 1000:>8.2f} {latencies[int(len(latencies) * 0.99)] * 1000:>8.2f}  {notes}")
+
+
+if __name__ == '__main__':
+    main()
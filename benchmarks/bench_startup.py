@@ -0,0 +1,106 @@
+"""Benchmark planner_app start-up: import time, window construction, first paint and first rows.
+
+Every run happens in a fresh interpreter so module imports are paid in full.
+The child process imports planner_app, builds the window against a copy of
+the given database, and reports (in ms since the interpreter started timing):
+when the imports finished, when the window was built, when the window first
+painted and when the first table rows arrived.  Medians are printed and, with
+--output, appended as a JSON line so runs can be compared over time.
+
+    python benchmarks/bench_startup.py [--db activities.db] [--repeats 5] [--output startup.jsonl]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ['import', 'construct', 'first_paint', 'first_rows']
+# Give up on a child that never shows rows, e.g. when the database is empty
+TIMEOUT_S = 30
+
+
+def child(db_name: str) -> None:
+    started = time.perf_counter()
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    sys.path.insert(0, ROOT)
+
+    import planner_app
+    from PyQt5.QtCore import QEvent, QObject, QThreadPool, QTimer
+    from PyQt5.QtWidgets import QApplication
+
+    times = {'import': time.perf_counter() - started}
+    app = QApplication(sys.argv)
+
+    class PaintWatcher(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and 'first_paint' not in times:
+                times['first_paint'] = time.perf_counter() - started
+            return False
+
+    db = planner_app.Database(db_name)
+    db.create_table()
+    view = planner_app.ActivityView(planner_app.ActivityModel(db))
+    times['construct'] = time.perf_counter() - started
+    watcher = PaintWatcher()
+    view.table.viewport().installEventFilter(watcher)
+
+    def rows_arrived() -> None:
+        if view.table_model.rowCount() and 'first_rows' not in times:
+            times['first_rows'] = time.perf_counter() - started
+            app.quit()
+
+    view.table_model.modelReset.connect(rows_arrived)
+    view.table_model.rowsInserted.connect(rows_arrived)
+    QTimer.singleShot(TIMEOUT_S * 1000, app.quit)
+    view.show()
+    app.exec_()
+    # The window is still open after quit(); let its background work finish before closing the database
+    view.close()
+    QThreadPool.globalInstance().waitForDone()
+    db.close()
+    print(json.dumps({stage: round(seconds * 1000, 2) for stage, seconds in times.items()}))
+
+
+def run(db_name: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = os.path.join(tmp, 'bench.db')
+        shutil.copy(db_name, copy)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', copy],
+            capture_output=True, text=True, check=True, cwd=tmp
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db', default=os.path.join(ROOT, 'activities.db'), help="database to start against")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', help="append the medians as a JSON line to this file")
+    parser.add_argument('--child', metavar='DB', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child)
+        return
+
+    results = [run(args.db) for _ in range(args.repeats)]
+    medians = {
+        stage: statistics.median(result[stage] for result in results)
+        for stage in STAGES if all(stage in result for result in results)
+    }
+    print(f"{'stage':>12} {'median (ms)':>12}")
+    for stage, value in medians.items():
+        print(f"{stage:>12} {value:>12.1f}")
+    if args.output:
+        with open(args.output, 'a') as f:
+            f.write(json.dumps({'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'db': args.db, **medians}) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Benchmark the planner's data paths against stored baselines to catch regressions.
+
+A database of synthetic activities is generated once per size with a fixed seed
+(see createDEMOactivities.py), then each case is timed ``--repeats`` times:
+loading the table into a DataFrame, a single add and delete, a full-text
+search, a CSV export, a CSV import, preparing the Gantt chart data, an online
+backup and archiving the completed activities then restoring them.  Medians
+are compared with baselines.json next to this script; a case more than
+``--tolerance`` slower than its baseline fails the run.  Baselines depend on the
+machine, so record your own with --save before comparing.
+
+    python benchmarks/bench_suite.py [--sizes 10000 100000] [--cases search export] [--save]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+from typing import Callable, Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import createDEMOactivities
+from convert_csv_to_db import convert_csv_to_sqlite
+from planner_export import export_activities
+from planner_model import ActivityModel, Database
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+CASES = ['load_data', 'add_delete', 'search', 'export', 'csv_import', 'gantt_prepare', 'backup', 'archive']
+SEED = 1
+GANTT_RANGE = ('2024-03-01', '2024-08-31')
+ACTIVITY = {
+    'category': 'Meeting',
+    'activity': 'Team Meeting',
+    'status': 'Pending',
+    'notification': '2024-05-01 06:00:00',
+    'timeline': '2024-05-01 - 2024-05-03',
+    'deadline': '2024-05-03',
+    'priority': 'High',
+    'notes': 'benchmark row',
+}
+
+
+def cases(tmp: str, model: ActivityModel, csv_path: str) -> Dict[str, Callable[[], object]]:
+    from planner_gantt import GanttLayout, prepare_segments
+
+    def add_delete() -> None:
+        row = model.add_activity(ACTIVITY)
+        model.delete_activity(row[0])
+
+    def gantt_prepare() -> None:
+        segments, labels = prepare_segments(model.load_timelines(*GANTT_RANGE), *GANTT_RANGE)
+        GanttLayout(segments, labels)
+
+    def csv_import() -> None:
+        convert_csv_to_sqlite(csv_path, os.path.join(tmp, 'import.db'))
+
+    def archive_roundtrip() -> None:
+        # The generated activities all fall in one past year
+        for year in model.archive(date.today().year):
+            model.unarchive(year)
+
+    return {
+        'load_data': model.load_data,
+        'add_delete': add_delete,
+        'search': lambda: model.query_activities(filters={'search': 'meeting budget'}, limit=500),
+        'export': lambda: export_activities(model, os.path.join(tmp, 'export.csv')),
+        'csv_import': csv_import,
+        'gantt_prepare': gantt_prepare,
+        'backup': lambda: model.backup(os.path.join(tmp, 'backup.db')),
+        'archive': archive_roundtrip,
+    }
+
+
+def run(size: int, names: list, repeats: int) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path, csv_path = os.path.join(tmp, 'bench.db'), os.path.join(tmp, 'bench.csv')
+        createDEMOactivities.write_sqlite(createDEMOactivities.generate(size, SEED), db_path)
+        createDEMOactivities.write_csv(createDEMOactivities.generate(size, SEED), csv_path)
+        db = Database(db_path)
+        db.create_table()
+        model = ActivityModel(db)
+        available = cases(tmp, model, csv_path)
+        medians = {}
+        for name in names:
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                available[name]()
+                timings.append(time.perf_counter() - start)
+            medians[name] = round(statistics.median(timings) * 1000, 3)
+        db.close()
+    return medians
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=CASES)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown over the baseline (0.25 = 25%%)")
+    parser.add_argument('--save', action='store_true', help="store these results as the new baselines")
+    args = parser.parse_args()
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as f:
+            baselines = json.load(f)
+    results = {str(size): run(size, args.cases, args.repeats) for size in args.sizes}
+
+    regressions = []
+    print(f"{'rows':>10} {'case':>14} {'median (ms)':>12} {'baseline':>10} {'ratio':>7}")
+    for size, medians in results.items():
+        for name, value in medians.items():
+            baseline = baselines.get('results', {}).get(size, {}).get(name)
+            ratio = value / baseline if baseline else None
+            flag = ''
+            if ratio is not None and ratio > 1 + args.tolerance:
+                regressions.append(f"{name} at {size} rows")
+                flag = '  REGRESSION'
+            print(f"{size:>10} {name:>14} {value:>12.1f} {baseline or float('nan'):>10.1f} "
+                  f"{'' if ratio is None else f'{ratio:.2f}':>7}{flag}")
+
+    if args.save:
+        stored = baselines.get('results', {})
+        for size, medians in results.items():
+            stored.setdefault(size, {}).update(medians)
+        with open(BASELINES, 'w') as f:
+            json.dump({'machine': f"{platform.machine()} {platform.python_version()}", 'results': stored}, f, indent=2)
+            f.write('\n')
+        print(f"Saved baselines to {BASELINES}")
+    elif regressions:
+        sys.exit(f"Slower than baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+
+
+if __name__ == '__main__':
+    main()
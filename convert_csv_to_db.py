@@ -1,73 +1,170 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
 import pandas as pd
-import sqlite3
-
-def convert_csv_to_sqlite(csv_file, db_name):
-    # Load the CSV file into a DataFrame
-    df = pd.read_csv(csv_file)
-
-    # Print DataFrame columns to check for correct names
-    print("Columns in CSV file:", df.columns)
-
-    # Connect to (or create) the SQLite database
-    conn = sqlite3.connect(db_name)
-
-    # Drop the activities table if it exists
-    conn.execute("DROP TABLE IF EXISTS activities")
-
-    # Create the activities table
-    create_table_query = """
-    CREATE TABLE activities (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        category TEXT,
-        activity TEXT,
-        status TEXT,
-        notification TEXT,
-        timeline TEXT,
-        deadline TEXT,
-        priority TEXT,
-        notes TEXT
-    )
-    """
-    conn.execute(create_table_query)
-
-    # Map CSV column names to SQLite column names
-    column_mapping = {
-        'Activity & Description': 'activity',
-        'Status': 'status',
-        'Notification Date and time': 'notification',
-        'Timeline': 'timeline',
-        'Deadline': 'deadline',
-        'Category': 'category',
-        'Priority': 'priority',
-        'Notes': 'notes'
-    }
 
-    # Rename columns in DataFrame to match SQLite schema
-    df.rename(columns=column_mapping, inplace=True)
+from planner_model import COLUMNS, PRIORITIES, STATUSES, Database
+from planner_recurrence import Rule, parse_rule
+
+# Map CSV column names to SQLite column names
+column_mapping = {
+    'ID': 'id',
+    'Activity & Description': 'activity',
+    'Status': 'status',
+    'Notification Date and time': 'notification',
+    'Timeline': 'timeline',
+    'Deadline': 'deadline',
+    'Category': 'category',
+    'Priority': 'priority',
+    'Notes': 'notes',
+    'Recurrence': 'recurrence'
+}
+
+required_columns = ['category', 'activity', 'status', 'notification', 'timeline', 'deadline', 'priority', 'notes']
+
+MODES = ('replace', 'append', 'upsert')
+CHUNK_SIZE = 50_000
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Yield the rows of a CSV or XLSX file as DataFrames of at most ``chunk_size`` rows, all as strings."""
+    if path.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(name) for name in next(rows, ())]
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == chunk_size:
+                    yield pd.DataFrame(batch, columns=header, dtype=object)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=header, dtype=object)
+        finally:
+            workbook.close()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+
+
+def epoch_values(values: pd.Series, unit: str) -> List[Optional[int]]:
+    """Parse dates leniently and return them as integer epoch ``unit`` ('s' or 'D'), None where invalid."""
+    text = values.astype(object).where(values.notna(), '').astype(str).str.strip()
+    dates = pd.to_datetime(text.mask(text.isin(['', 'NaT', 'None', 'nan'])), errors='coerce', format='ISO8601')
+    invalid = dates.isna() & ~text.isin(['', 'NaT', 'None', 'nan'])
+    if invalid.any():
+        logging.warning("Dropping %d unparseable date(s), e.g. %r", invalid.sum(), text[invalid].iloc[0])
+    epoch = (dates - pd.Timestamp(1970, 1, 1)) // pd.Timedelta(1, unit=unit)
+    return [None if pd.isna(value) else int(value) for value in epoch]
 
-    # Ensure all required columns are present
-    required_columns = ['category', 'activity', 'status', 'notification', 'timeline', 'deadline', 'priority', 'notes']
+
+def encode_chunk(db: Database, conn, df: pd.DataFrame, keep_ids: bool,
+                 rules: Dict[str, Optional[Rule]]) -> Tuple[List[tuple], Optional[List[Optional[Rule]]]]:
+    """Validate one chunk and convert it into typed rows and recurrence rules for Database.add_encoded_activities.
+
+    The optional ``recurrence`` column holds rule text as ``createDEMOactivities``
+    writes it; ``rules`` caches the parsed rules across chunks. The rules are None
+    when no row in the chunk has a column to carry them.
+    """
+    df = df.rename(columns=column_mapping)
     for col in required_columns:
         if col not in df.columns:
             raise ValueError(f"CSV file is missing required column: {col}")
+    df = df.astype(object).where(df.notna() & df.ne(''), None)
+
+    codes = {}
+    for column, values, default in (('status', STATUSES, 0), ('priority', PRIORITIES, 1)):
+        unknown = set(df[column].dropna()) - set(values)
+        if unknown:
+            raise ValueError(f"Unknown {column} value(s) {sorted(unknown)}, expected one of {values}")
+        codes[column] = df[column].map({name: code for code, name in enumerate(values)}).fillna(default).astype(int)
+    categories = {name: db.category_id(conn, name) for name in df['category'].dropna().unique()}
+
+    if keep_ids and 'id' in df.columns:
+        ids = [None if value is None else int(value) for value in df['id']]
+    else:
+        ids = [None] * len(df)
+    columns = {
+        'id': ids,
+        'category': [categories.get(name) for name in df['category']],
+        'activity': df['activity'].tolist(),
+        'status': codes['status'].tolist(),
+        'notification': epoch_values(df['notification'], 's'),
+        'timeline': df['timeline'].tolist(),
+        'deadline': epoch_values(df['deadline'], 'D'),
+        'priority': codes['priority'].tolist(),
+        'notes': df['notes'].tolist(),
+    }
+    rows = list(zip(*(columns[name] for name in COLUMNS)))
+    if 'recurrence' not in df.columns:
+        return rows, None
+    for text in df['recurrence'].dropna().unique():
+        if text not in rules:
+            rules[text] = parse_rule(text)
+    return rows, [None if text is None else rules[text] for text in df['recurrence']]
+
+
+def convert_csv_to_sqlite(csv_file: str, db_name: str, mode: str = 'replace', chunk_size: int = CHUNK_SIZE,
+                          progress: Optional[Callable[[int], None]] = None) -> int:
+    """Stream a CSV/XLSX export into the activities table and return the number of rows imported.
+
+    Rows are read ``chunk_size`` at a time, so memory stays flat however large the
+    file is, but the whole import is one transaction: a row that fails validation
+    raises ValueError and leaves the database as it was. ``mode`` is 'replace'
+    (clear the table first), 'append' (always add new rows) or 'upsert' (rows with
+    an existing ID overwrite it). ``progress`` is called with the running row count
+    after every chunk.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown import mode {mode!r}, expected one of {MODES}")
+    db = Database(db_name)
+    db.create_table()
+    imported = 0
+    rules = {}
+    try:
+        with db.transaction() as conn:
+            if mode == 'replace':
+                conn.execute("DELETE FROM activities")
+            for chunk in read_chunks(csv_file, chunk_size):
+                rows, repeat = encode_chunk(db, conn, chunk, mode == 'upsert', rules)
+                imported += db.add_encoded_activities(rows, upsert=mode == 'upsert',
+                                                      rules=repeat if repeat and any(repeat) else None)
+                if progress:
+                    progress(imported)
+    finally:
+        db.close()
+    return imported
+
 
-    # Handle potential issues with data types
-    # Convert datetime columns to strings if necessary
-    for column in ['notification', 'deadline']:
-        if column in df.columns:
-            df[column] = pd.to_datetime(df[column], errors='coerce').astype(str)
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Import a CSV or XLSX export into the planner database.")
+    parser.add_argument('csv_file', nargs='?', default='activities.csv', help="CSV or XLSX file to import")
+    parser.add_argument('db_name', nargs='?', default='activities.db', help="SQLite database to write to")
+    parser.add_argument('--mode', choices=MODES, default='replace', help="how to treat existing activities")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="rows read and written at a time")
+    args = parser.parse_args(argv)
 
-    # Insert data into the activities table
-    df.to_sql('activities', conn, if_exists='replace', index=False)
+    started = time.perf_counter()
+    total_bytes = os.path.getsize(args.csv_file)
 
-    # Close the database connection
-    conn.close()
+    def report(rows: int) -> None:
+        elapsed = time.perf_counter() - started
+        print(f"\r{rows:,} rows ({rows / elapsed:,.0f} rows/s)", end='', file=sys.stderr, flush=True)
 
-    print("CSV data successfully converted to SQLite database.")
+    try:
+        rows = convert_csv_to_sqlite(args.csv_file, args.db_name, args.mode, args.chunk_size, report)
+    except ValueError as e:
+        print(file=sys.stderr)
+        sys.exit(f"error: {e}")
+    print(file=sys.stderr)
+    print(f"Imported {rows:,} rows from {args.csv_file} ({total_bytes / 1e6:,.1f} MB) into {args.db_name}.")
 
-# File names
-csv_file = "activities.csv"
-db_name = "activities.db"
 
-# Run the conversion
-convert_csv_to_sqlite(csv_file, db_name)
+if __name__ == '__main__':
+    main()
@@ -1,59 +1,234 @@
-import pandas as pd
+"""Generate synthetic planner activities, from a 65-row demo file to tens of millions of rows.
+
+Rows are drawn one at a time from a seeded generator and streamed straight into
+a CSV file (bulk-add and convert_csv_to_db.py read it) or an SQLite database,
+so memory stays flat at any size and the same seed always gives the same data.
+
+    python createDEMOactivities.py                              # 65 rows in activities.csv
+    python createDEMOactivities.py big.db --count 1000000 --seed 7
+    python createDEMOactivities.py big.csv --count 10000000 --start 2023-01-01 --years 3
+"""
+import argparse
+import csv
+import os
 import random
-from datetime import datetime, timedelta
-
-# Categories and other choices
-categories = [
-    "Birthday", "Anniversary", "Holiday", "Project Deadline", "Meeting", "Appointment", 
-    "Learning", "Coding", "Personal", "Family", "Social", "Travel", "Errands", 
-    "Shopping", "Health", "Fitness", "Sports", "Hobbies", "Creative Pursuits", 
-    "Volunteer", "Other"
-]
-statuses = ["Pending", "In Progress", "Completed"]
-priorities = ["High", "Medium", "Low"]
-activities = [
-    "Birthday Party", "Wedding Anniversary", "Christmas Holiday", "Project X Deadline", 
-    "Team Meeting", "Doctor Appointment", "Online Course", "Code Review", "Personal Development", 
-    "Family Gathering", "Social Event", "Business Trip", "Grocery Shopping", 
-    "Health Checkup", "Workout Session", "Football Match", "Painting", 
-    "Photography", "Volunteer Work", "Miscellaneous Task"
+import sys
+import time
+from datetime import date
+from itertools import accumulate, islice
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from planner_model import (
+    CATEGORIES, COLUMNS, PRIORITIES, STATUSES, Database, from_epoch_day, to_epoch_day
+)
+
+# Relative frequency of categories; unlisted ones in CATEGORIES share OTHER_WEIGHT
+CATEGORY_WEIGHTS = {
+    "Meeting": 18, "Email": 10, "Coding": 9, "Errands": 7, "Appointment": 6, "Project Deadline": 6,
+    "Shopping": 5, "Household Chores": 5, "Fitness": 4, "Learning": 4, "Family": 4, "Social": 3,
+    "Health": 3, "Personal": 3, "Birthday": 2, "Travel": 2, "Budgeting": 2, "Anniversary": 1, "Holiday": 1,
+}
+OTHER_WEIGHT = 0.3
+TITLES = {
+    "Meeting": ["Team Meeting", "Sprint Planning", "One-on-one", "Client Call", "Retrospective", "Board Review"],
+    "Email": ["Reply to Inbox", "Send Weekly Update", "Follow Up", "Newsletter Draft"],
+    "Coding": ["Code Review", "Fix Bug", "Refactor Module", "Write Tests", "Release Build"],
+    "Project Deadline": ["Project X Deadline", "Milestone Delivery", "Report Due", "Proposal Submission"],
+    "Appointment": ["Doctor Appointment", "Dentist", "Haircut", "Bank Visit"],
+    "Birthday": ["Birthday Party", "Buy Birthday Present"],
+    "Anniversary": ["Wedding Anniversary", "Work Anniversary"],
+    "Holiday": ["Christmas Holiday", "Summer Holiday", "Easter Break"],
+    "Fitness": ["Workout Session", "Morning Run", "Yoga Class", "Swimming"],
+    "Shopping": ["Grocery Shopping", "Buy Shoes", "Order Supplies"],
+    "Learning": ["Online Course", "Read Chapter", "Language Lesson"],
+    "Travel": ["Business Trip", "Book Flights", "Pack Luggage"],
+}
+GENERIC_TITLES = ["Plan", "Prepare", "Review", "Organise", "Finish", "Check", "Call about", "Sort out"]
+SUBJECTS = [
+    "budget", "garden", "car", "taxes", "presentation", "roadmap", "website", "kitchen", "insurance",
+    "invoices", "holiday photos", "quarterly report", "team offsite", "passport", "mortgage", "newsletter",
 ]
+# Timeline segment counts and their weights: most activities have none or one
+SEGMENT_COUNTS = [0, 1, 2, 3, 4]
+SEGMENT_WEIGHTS = [45, 35, 12, 5, 3]
+PRIORITY_WEIGHTS = [2, 5, 3]
+# Reminder hours and their weights; reminders cluster around mornings and early evenings
+NOTIFY_HOURS = [6, 7, 8, 9, 12, 17, 18, 20]
+NOTIFY_HOUR_WEIGHTS = [10, 20, 25, 15, 8, 7, 10, 5]
+# Categories that repeat when an activity is picked to repeat
+REPEATS = {"Birthday": "yearly", "Anniversary": "yearly", "Meeting": "weekly", "Fitness": "weekly",
+           "Budgeting": "monthly", "Email": "daily"}
 
-# Function to generate random date within the year
-def random_date(start, end):
-    return start + timedelta(
-        seconds=random.randint(0, int((end - start).total_seconds())),
-    )
-
-start_date = datetime(2024, 1, 1)
-end_date = datetime(2024, 12, 31)
-
-# Generate activities
-data = []
-for i in range(65):  # One activity per day for simplicity
-    activity_status = random.choice(statuses)
-    if activity_status == "In Progress":
-        start_timeline = random_date(start_date, end_date)
-        end_timeline = start_timeline + timedelta(days=random.randint(1, 30))
-        timeline = f"{start_timeline.strftime('%Y-%m-%d')} - {end_timeline.strftime('%Y-%m-%d')}"
-    else:
-        timeline = ""
-    activity = {
-        "ID": i + 1,
-        "Category": random.choice(categories),
-        "activity": random.choice(activities),
-        "Status": activity_status,
-        "notification": random_date(start_date, end_date).strftime("%Y-%m-%d %H:%M:%S"),
-        "Timeline": timeline,
-        "Deadline": random_date(start_date, end_date).strftime("%Y-%m-%d"),
-        "Priority": random.choice(priorities),
-        "Notes": f"Note for activity {i+1}"
+
+class Activity(NamedTuple):
+    """One generated activity in typed form; ``timeline`` holds (start_day, end_day) pairs."""
+    category: str
+    activity: str
+    status: int
+    notification: Optional[int]
+    timeline: List[Tuple[int, int]]
+    deadline: int
+    priority: int
+    notes: Optional[str]
+    recurrence: Optional[str]
+
+
+def generate(count: int, seed: int = 0, start: str = '2024-01-01', years: int = 1,
+             today: Optional[str] = None, recurring: float = 0.01) -> Iterator[Activity]:
+    """Yield ``count`` activities with deadlines spread over ``years`` years from ``start``.
+
+    Deadlines favour weekdays; timelines have up to four segments of mostly short,
+    occasionally long stretches leading up to the deadline; about four in five
+    activities get a reminder a few days ahead at a typical hour. Activities due
+    before ``today`` (default: the middle of the range) are mostly completed and
+    later ones mostly pending. A ``recurring`` share of the categories in
+    ``REPEATS`` repeat. The same arguments always produce the same activities.
+    """
+    rng = random.Random(seed)
+    first = to_epoch_day(start)
+    year = date.fromisoformat(start).year
+    span = (date(year + years, 1, 1) - date(year, 1, 1)).days
+    now = to_epoch_day(today) if today else first + span // 2
+    categories = list(CATEGORIES)
+    # Cumulative weights spare choices() re-summing the long category list on every draw
+    weights = list(accumulate(CATEGORY_WEIGHTS.get(category, OTHER_WEIGHT) for category in categories))
+
+    for index in range(count):
+        category = rng.choices(categories, cum_weights=weights)[0]
+        titles = TITLES.get(category)
+        if titles:
+            title = rng.choice(titles)
+        else:
+            title = f"{rng.choice(GENERIC_TITLES)} {category.lower()}"
+        if rng.random() < 0.5:
+            title += f": {rng.choice(SUBJECTS)}"
+
+        deadline = first + rng.randrange(span)
+        # Weekend deadlines are half as likely: redraw once
+        if from_epoch_day(deadline).weekday() >= 5 and rng.random() < 0.5:
+            deadline = first + rng.randrange(span)
+
+        timeline = []
+        end = deadline
+        for _ in range(rng.choices(SEGMENT_COUNTS, SEGMENT_WEIGHTS)[0]):
+            length = min(int(rng.lognormvariate(1.0, 1.0)), 60)
+            timeline.append((end - length, end))
+            end -= length + 1 + int(rng.expovariate(0.2))
+        timeline.reverse()
+
+        notification = None
+        if rng.random() < 0.8:
+            day = deadline - min(int(rng.expovariate(0.4)), 30)
+            hour = rng.choices(NOTIFY_HOURS, NOTIFY_HOUR_WEIGHTS)[0]
+            notification = day * 86400 + hour * 3600 + rng.choice((0, 15, 30, 45)) * 60
+
+        if deadline < now:
+            status = rng.choices((0, 1, 2), (1, 2, 7))[0]
+        elif timeline and timeline[0][0] <= now:
+            status = rng.choices((0, 1, 2), (2, 7, 1))[0]
+        else:
+            status = rng.choices((0, 1, 2), (8, 1, 1))[0]
+
+        notes = f"Note for activity {index + 1}" if rng.random() < 0.6 else None
+        recurrence = REPEATS[category] if category in REPEATS and rng.random() < recurring else None
+        yield Activity(category, title, status, notification, timeline, deadline,
+                       rng.choices((0, 1, 2), PRIORITY_WEIGHTS)[0], notes, recurrence)
+
+
+def format_timeline(timeline: List[Tuple[int, int]]) -> Optional[str]:
+    if not timeline:
+        return None
+    return ', '.join(f"{from_epoch_day(start).isoformat()} - {from_epoch_day(end).isoformat()}" for start, end in timeline)
+
+
+def format_notification(seconds: int) -> str:
+    day, rest = divmod(seconds, 86400)
+    return f"{from_epoch_day(day).isoformat()} {rest // 3600:02d}:{rest % 3600 // 60:02d}:00"
+
+
+def as_dict(activity: Activity) -> dict:
+    """Display-string form, as ``Database.add_activities`` and the CSV export use."""
+    return {
+        'category': activity.category,
+        'activity': activity.activity,
+        'status': STATUSES[activity.status],
+        'notification': None if activity.notification is None else format_notification(activity.notification),
+        'timeline': format_timeline(activity.timeline),
+        'deadline': from_epoch_day(activity.deadline).isoformat(),
+        'priority': PRIORITIES[activity.priority],
+        'notes': activity.notes,
+        'recurrence': activity.recurrence,
     }
-    data.append(activity)
 
-# Convert to DataFrame
-df = pd.DataFrame(data)
 
-# Save to CSV
-df.to_csv("activities.csv", index=False)
-print("activities.csv file has been created.")
+def write_csv(activities: Iterator[Activity], path: str) -> int:
+    """Write activities to a CSV file with ``COLUMNS`` headers and return how many were written."""
+    written = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS + ['recurrence'])
+        for activity in activities:
+            written += 1
+            row = as_dict(activity)
+            writer.writerow([written] + ['' if row[column] is None else row[column] for column in COLUMNS[1:]]
+                            + [row['recurrence'] or ''])
+    return written
+
+
+def write_sqlite(activities: Iterator[Activity], path: str, batch_size: int = Database.WRITE_BATCH) -> int:
+    """Append activities to a planner database, one transaction per batch, and return how many were written.
+
+    Rows are encoded here from their typed form rather than parsed back from
+    display strings, which keeps generation the bottleneck even at millions of rows.
+    """
+    from planner_recurrence import parse_rule
+
+    db = Database(path)
+    db.create_table()
+    written = 0
+    categories = {}
+    rules = {name: parse_rule(name) for name in set(REPEATS.values())}
+    try:
+        while True:
+            batch = list(islice(activities, batch_size))
+            if not batch:
+                return written
+            with db.transaction() as conn:
+                for activity in batch:
+                    if activity.category not in categories:
+                        categories[activity.category] = db.category_id(conn, activity.category)
+                rows = [
+                    (None, categories[a.category], a.activity, a.status, a.notification, format_timeline(a.timeline),
+                     a.deadline, a.priority, a.notes)
+                    for a in batch
+                ]
+                repeat = [rules.get(a.recurrence) for a in batch]
+                written += db.add_encoded_activities(rows, rules=repeat if any(repeat) else None)
+    finally:
+        db.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output', nargs='?', default='activities.csv', help="a .csv file or an SQLite .db to append to")
+    parser.add_argument('--count', type=int, default=65)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start', default='2024-01-01', metavar='DATE', help="first day deadlines may fall on")
+    parser.add_argument('--years', type=int, default=1, help="years the deadlines are spread over")
+    parser.add_argument('--today', metavar='DATE', help="date that splits done from pending work (default: mid-range)")
+    parser.add_argument('--recurring', type=float, default=0.01,
+                        help="share of birthdays, meetings and the like that repeat (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    activities = generate(args.count, args.seed, args.start, args.years, args.today, args.recurring)
+    if os.path.splitext(args.output)[1].lower() == '.csv':
+        written = write_csv(activities, args.output)
+    else:
+        written = write_sqlite(activities, args.output)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {written:,} activities to {args.output} in {elapsed:.1f} s.", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
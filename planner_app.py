@@ -1,97 +1,417 @@
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QWidget, QTableWidget, QTableWidgetItem, QPushButton, QLineEdit, QComboBox, QDateEdit, QLabel, QHeaderView, QMessageBox, QFormLayout, QFileDialog, QDateTimeEdit
-from PyQt5.QtCore import Qt, QTimer, QDateTime
-from PyQt5.QtGui import QColor, QPalette, QBrush, QIcon, QPixmap
-import sqlite3
-import pandas as pd
-from datetime import datetime
-import os
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import matplotlib.patches as mpatches
-from plyer import notification
+from PyQt5.QtWidgets import QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QTableView, QPushButton, QLineEdit, QComboBox, QDateEdit, QLabel, QHeaderView, QMessageBox, QFormLayout, QFileDialog, QDateTimeEdit, QInputDialog, QProgressDialog, QShortcut, QSpinBox, QStyledItemDelegate, QUndoStack
+from PyQt5.QtCore import Qt, QTimer, QAbstractTableModel, QModelIndex, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QColor, QPalette, QIcon, QKeySequence, QPixmap
+from datetime import date, datetime
+import argparse
 import logging
-from typing import List, Tuple
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import cmp_to_key, partial
+from typing import List, Optional
+from planner_commands import DELETED, RESTORED, DeleteActivities, ShiftDeadlines, UpdateActivities
+from planner_dashboard import DashboardPanel
+from planner_metrics import timed
+from planner_model import (
+    CATEGORIES, COLUMNS, HEADERS, PRIORITIES, SORT_KEYS, STATUSES, ActivityModel, Database, compare_sort_keys,
+    from_epoch_day, to_epoch_day, to_epoch_seconds,
+)
+from planner_notifications import NotificationScheduler
+from planner_recurrence import FREQUENCIES, describe_rule, occurrence_days
+from planner_workers import FeedListener, Worker
 
 # Set up logging
 logging.basicConfig(filename='app.log', level=logging.INFO)
 
-class Database:
-    def __init__(self, db_name: str) -> None:
-        self.db_name = db_name
-        self.conn = None
-
-    def connect(self) -> sqlite3.Connection:
-        self.conn = sqlite3.connect(self.db_name)
-        return self.conn
-
-    def close(self) -> None:
-        if self.conn:
-            self.conn.close()
-
-    def create_table(self) -> None:
-        conn = self.connect()
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS activities (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                category TEXT,
-                activity TEXT,
-                status TEXT,
-                notification TEXT,
-                timeline TEXT,
-                deadline TEXT,
-                priority TEXT,
-                notes TEXT
+# One stylesheet for the main window, scoped to its central widget so dialogs keep
+# their native look; the buttons are told apart by object name
+STYLESHEET = """
+    #central QTableView {
+        background-color: #ffffff;
+        alternate-background-color: #f1f1f1;
+        border: 1px solid #ccc;
+        font-size: 14px;
+        border-radius: 8px;
+    }
+    #central QComboBox, #central QLineEdit, #central QDateTimeEdit {
+        padding: 8px;
+        border: 1px solid #ccc;
+        border-radius: 8px;
+        font-size: 14px;
+        background-color: #ffffff;
+    }
+    #central QPushButton {
+        color: white;
+        padding: 12px 20px;
+        border: none;
+        border-radius: 8px;
+        font-size: 16px;
+        font-weight: bold;
+        text-align: center;
+    }
+    #central QPushButton#add_button { background-color: #4CAF50; }
+    #central QPushButton#delete_button { background-color: #f44336; }
+    #central QPushButton#print_button { background-color: #2196F3; }
+    #central QPushButton#export_button { background-color: #FFC107; color: black; }
+    #central QPushButton#gantt_chart_button { background-color: #673AB7; }
+    #central QPushButton#calendar_button { background-color: #009688; }
+    #central QPushButton#archive_button { background-color: #795548; }
+    #central QPushButton#backup_button { background-color: #3F51B5; }
+    #central QPushButton#shift_button { background-color: #607D8B; padding: 8px 16px; font-size: 14px; }
+"""
+
+class ActivityTableModel(QAbstractTableModel):
+    """Qt table model that pages activities in from the database as the view scrolls.
+
+    Rows are kept column-wise (an int64 array of ids plus one list per column),
+    and only the windows the view has asked for via ``fetchMore`` are loaded.
+    While a search is active the model walks the sorted id set returned by the
+    full-text index instead of the whole table. With an ``order_by`` the rows come
+    from keyset-paged indexed queries in that order instead, search included, and
+    each loaded row's sort key is kept so single inserts can find their place.
+    Repeating rows are marked in the Deadline column, with their rule and next
+    occurrences in its tooltip.
+
+    Cells other than the id are editable. Edits show at once but are only
+    collected in ``pending_edits``; the view writes them out together with
+    ``take_edits`` once typing pauses (``edited`` fires on each one).
+    """
+    edited = pyqtSignal()
+
+    FETCH_SIZE = 500
+    # Occurrences listed in a repeating activity's tooltip
+    UPCOMING_OCCURRENCES = 3
+
+    def __init__(self, model: ActivityModel, parent=None) -> None:
+        super().__init__(parent)
+        self.model = model
+        self._ids = array('q')
+        self._columns: List[list] = [[] for _ in COLUMNS[1:]]
+        self._total = 0
+        self._filter: Optional[array] = None
+        self._keys: List[tuple] = []
+        # (Rule, anchor day) of the loaded rows that repeat
+        self._rules = {}
+        # Search text restricting the rows; an empty string shows everything
+        self.search_text = ''
+        # Sort columns as for Database.sort_keys; empty keeps id order
+        self.order_by: List[str] = []
+        # {id: {column: display string}} typed into cells and not yet written
+        self.pending_edits = {}
+
+    @timed()
+    def query_rows(self, search_text: str, order_by: List[str] = (), progress=None) -> tuple:
+        """Work out the row set for a search and order; only touches the database, so it can run on a worker."""
+        if order_by:
+            total = self.model.count_activities({'search': search_text})
+            return search_text, list(order_by), None, total
+        matches = self.model.search_ids(search_text)
+        row_filter = array('q', matches) if matches is not None else None
+        total = len(row_filter) if row_filter is not None else self.model.count_activities()
+        return search_text, [], row_filter, total
+
+    @timed()
+    def apply_rows(self, rows: tuple) -> None:
+        """Reset the model to a row set from ``query_rows``, ignoring results for an outdated search or order."""
+        search_text, order_by, row_filter, total = rows
+        if search_text != self.search_text or order_by != list(self.order_by):
+            return
+        self.beginResetModel()
+        self._ids = array('q')
+        self._columns = [[] for _ in COLUMNS[1:]]
+        self._keys = []
+        self._rules = {}
+        self._filter = row_filter
+        self._total = total
+        self.endResetModel()
+
+    def reload(self) -> None:
+        self.apply_rows(self.query_rows(self.search_text, self.order_by))
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._ids)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole, Qt.EditRole):
+            return None
+        text = self.cell_text(index.row(), index.column())
+        if role == Qt.EditRole:
+            return text
+        series = self._rules.get(self._ids[index.row()]) if COLUMNS[index.column()] == 'deadline' else None
+        if series is None:
+            return text
+        return f"{text} ↻" if role == Qt.DisplayRole else self.recurrence_tooltip(*series)
+
+    def recurrence_tooltip(self, rule, anchor: int) -> str:
+        today = to_epoch_day(date.today().isoformat())
+        upcoming = [from_epoch_day(day).isoformat()
+                    for day, _ in zip(occurrence_days(rule, anchor, today), range(self.UPCOMING_OCCURRENCES))]
+        return describe_rule(rule) + ("\nNext: " + ", ".join(upcoming) if upcoming else "\nNo further occurrences")
+
+    def flags(self, index: QModelIndex):
+        flags = super().flags(index)
+        return flags if index.column() == 0 else flags | Qt.ItemIsEditable
+
+    def setData(self, index: QModelIndex, value, role: int = Qt.EditRole) -> bool:
+        if role != Qt.EditRole or not index.isValid() or index.column() == 0:
+            return False
+        text = str(value).strip()
+        if text == self.cell_text(index.row(), index.column()):
+            return False
+        self._columns[index.column() - 1][index.row()] = text or None
+        self.pending_edits.setdefault(self._ids[index.row()], {})[COLUMNS[index.column()]] = text or None
+        self.dataChanged.emit(index, index)
+        self.edited.emit()
+        return True
+
+    def take_edits(self) -> dict:
+        """Hand over the buffered cell edits and start a new buffer."""
+        edits, self.pending_edits = self.pending_edits, {}
+        return edits
+
+    def headerData(self, section: int, orientation: int, role: int = Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and len(self._ids) < self._total
+
+    @timed()
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if parent.isValid():
+            return
+        if self.order_by:
+            rows, keys = self.model.query_activities(
+                filters={'search': self.search_text}, order_by=self.order_by,
+                after=self._keys[-1] if self._keys else None, limit=self.FETCH_SIZE
             )
-        """)
-        conn.commit()
-        self.close()
-
-    def load_data(self) -> pd.DataFrame:
-        conn = self.connect()
-        df = pd.read_sql_query("SELECT * FROM activities", conn)
-        self.close()
-        return df
-
-    def add_activity(self, activity: dict) -> None:
-        conn = self.connect()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO activities (category, activity, status, notification, timeline, deadline, priority, notes)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            activity['category'], activity['activity'], activity['status'], activity['notification'],
-            activity['timeline'], activity['deadline'], activity['priority'], activity['notes']
-        ))
-        conn.commit()
-        self.close()
-
-    def delete_activity(self, activity_id: int) -> None:
-        conn = self.connect()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM activities WHERE id=? ", (activity_id,))
-        conn.commit()
-        self.close()
-
-class ActivityModel:
-    def __init__(self, db: Database) -> None:
-        self.db = db
-
-    def load_data(self) -> pd.DataFrame:
-        return self.db.load_data()
-
-    def add_activity(self, activity: dict) -> None:
-        self.db.add_activity(activity)
-
-    def delete_activity(self, activity_id: int) -> None:
-        self.db.delete_activity(activity_id)
+            self._keys.extend(keys)
+            if not rows:
+                self._total = len(self._ids)
+        elif self._filter is not None:
+            # Loaded rows are always a prefix of the filter, so the next window starts where they end
+            wanted = self._filter[len(self._ids):len(self._ids) + self.FETCH_SIZE]
+            rows = self.model.fetch_activities_by_ids(wanted) if wanted else []
+            if len(rows) < len(wanted):
+                # Some matches were deleted since the search ran; drop them from the filter
+                found = {row[0] for row in rows}
+                start = len(self._ids)
+                self._filter[start:start + len(wanted)] = array('q', (i for i in wanted if i in found))
+                self._total = len(self._filter)
+        else:
+            after_id = self._ids[-1] if self._ids else None
+            rows = self.model.fetch_activities(after_id, self.FETCH_SIZE)
+            if not rows:
+                # Rows were deleted behind our back; stop asking for more
+                self._total = len(self._ids)
+        if not rows:
+            return
+        first = len(self._ids)
+        ids, *columns = zip(*rows)
+        self._rules.update(self.model.recurrences(ids))
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._ids.extend(ids)
+        for store, values in zip(self._columns, columns):
+            store.extend(values)
+        self.endInsertRows()
+
+    def insert_activity_row(self, row: tuple) -> None:
+        """Account for a freshly inserted activity without reloading the table.
+
+        New ids are always the largest, so the row belongs at the end: it is
+        appended directly when everything is already loaded, otherwise the next
+        ``fetchMore`` window picks it up. Rows outside the active search are ignored.
+        In a sorted table the row goes to its place among the loaded rows, or is
+        left for ``fetchMore`` when it sorts after all of them.
+        """
+        self._rules.update(self.model.recurrences([row[0]]))
+        if self.order_by:
+            self._insert_sorted_row(row)
+            return
+        if self._filter is not None:
+            if not self.model.matches_search(row[0], self.search_text):
+                return
+            self._filter.append(row[0])
+        self._total += 1
+        if len(self._ids) + 1 < self._total:
+            return
+        position = len(self._ids)
+        self.beginInsertRows(QModelIndex(), position, position)
+        self._ids.append(row[0])
+        for store, value in zip(self._columns, row[1:]):
+            store.append(value)
+        self.endInsertRows()
+
+    def _insert_sorted_row(self, row: tuple) -> None:
+        if self.search_text and not self.model.matches_search(row[0], self.search_text):
+            return
+        key = self.model.sort_key(row[0], self.order_by)
+        if key is None:
+            return
+        self._total += 1
+        order = cmp_to_key(partial(compare_sort_keys, keys=Database.sort_keys(self.order_by)))
+        position = bisect_left(self._keys, order(key), key=order)
+        if position == len(self._ids) and len(self._ids) + 1 < self._total:
+            return
+        self.beginInsertRows(QModelIndex(), position, position)
+        self._ids.insert(position, row[0])
+        self._keys.insert(position, key)
+        for store, value in zip(self._columns, row[1:]):
+            store.insert(position, value)
+        self.endInsertRows()
+
+    def remove_activity_row(self, activity_id: int) -> None:
+        """Drop a deleted activity from the loaded rows without reloading the table."""
+        self._rules.pop(activity_id, None)
+        if self.order_by:
+            # Sorted rows are not in id order, so look the row up directly
+            self._total = max(self._total - 1, 0)
+            try:
+                position = self._ids.index(activity_id)
+            except ValueError:
+                return
+            self.beginRemoveRows(QModelIndex(), position, position)
+            del self._ids[position]
+            del self._keys[position]
+            for store in self._columns:
+                del store[position]
+            self.endRemoveRows()
+            return
+        if self._filter is not None:
+            position = bisect_left(self._filter, activity_id)
+            if position == len(self._filter) or self._filter[position] != activity_id:
+                return
+            del self._filter[position]
+        self._total = max(self._total - 1, 0)
+        position = bisect_left(self._ids, activity_id)
+        if position == len(self._ids) or self._ids[position] != activity_id:
+            return
+        self.beginRemoveRows(QModelIndex(), position, position)
+        del self._ids[position]
+        for store in self._columns:
+            del store[position]
+        self.endRemoveRows()
+
+    def remove_activity_rows(self, activity_ids: List[int]) -> None:
+        """Drop many deleted activities from the loaded rows, one removal per run of adjacent rows."""
+        doomed = set(activity_ids)
+        for activity_id in doomed:
+            self._rules.pop(activity_id, None)
+            self.pending_edits.pop(activity_id, None)
+        if self._filter is not None:
+            kept = array('q', (i for i in self._filter if i not in doomed))
+            self._total = max(self._total - (len(self._filter) - len(kept)), 0)
+            self._filter = kept
+        else:
+            self._total = max(self._total - len(doomed), 0)
+        positions = [position for position, activity_id in enumerate(self._ids) if activity_id in doomed]
+        # Remove from the bottom up so earlier positions stay valid
+        while positions:
+            last = first = positions.pop()
+            while positions and positions[-1] == first - 1:
+                first = positions.pop()
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._ids[first:last + 1]
+            if self.order_by:
+                del self._keys[first:last + 1]
+            for store in self._columns:
+                del store[first:last + 1]
+            self.endRemoveRows()
+
+    def refresh_activity_rows(self, activity_ids: List[int]) -> None:
+        """Re-read changed activities that are loaded, keeping their place until the next reload."""
+        positions = {activity_id: position for position, activity_id in enumerate(self._ids)}
+        loaded = [activity_id for activity_id in activity_ids if activity_id in positions]
+        for start in range(0, len(loaded), self.FETCH_SIZE):
+            rows = self.model.fetch_activities_by_ids(loaded[start:start + self.FETCH_SIZE])
+            for row in rows:
+                position = positions[row[0]]
+                for store, value in zip(self._columns, row[1:]):
+                    store[position] = value
+            self._rules.update(self.model.recurrences([row[0] for row in rows]))
+        if loaded:
+            rows = [positions[activity_id] for activity_id in loaded]
+            self.dataChanged.emit(self.index(min(rows), 0), self.index(max(rows), len(COLUMNS) - 1))
+
+    def cell_text(self, row: int, column: int) -> str:
+        value = self._ids[row] if column == 0 else self._columns[column - 1][row]
+        return '' if value is None else str(value)
+
+    def activity_id(self, row: int) -> int:
+        return self._ids[row]
+
+class ChoiceDelegate(QStyledItemDelegate):
+    """Edits columns with a fixed set of values (category, status, priority) through a combo box."""
+
+    def __init__(self, choices: List[str], parent=None) -> None:
+        super().__init__(parent)
+        self.choices = choices
+
+    def createEditor(self, parent, option, index):
+        editor = QComboBox(parent)
+        editor.addItems(self.choices)
+        return editor
+
+    def setEditorData(self, editor, index) -> None:
+        editor.setCurrentText(index.data(Qt.EditRole))
+
+    def setModelData(self, editor, model, index) -> None:
+        model.setData(index, editor.currentText(), Qt.EditRole)
 
 class ActivityView(QMainWindow):
+    SEARCH_DEBOUNCE_MS = 200
+    # Cell edits are written together once typing has paused this long
+    WRITE_BEHIND_MS = 1500
+    # Edits in quick succession share one dashboard refresh
+    DASHBOARD_DEBOUNCE_MS = 250
+    # Prepared Gantt layouts kept for reopening, keyed by data version and date range
+    GANTT_LAYOUTS = 4
+    # Calendar years kept for flipping back and forth, each with the data version it was built at
+    CALENDAR_YEARS = 8
+    # Changes to more activities than this re-run the conflict analysis instead of patching it
+    CONFLICT_RECHECK_MAX = 200
+
     def __init__(self, model: ActivityModel) -> None:
         super().__init__()
         self.model = model
+        self._workers = set()
+        # Set when the window closes; background work started after that would outlive the database
+        self._closed = False
+        self.gantt_layouts = OrderedDict()
+        self.calendar_years = OrderedDict()
+        # Years with a check in flight, mapped to whether another was asked for meanwhile
+        self.calendar_loads = {}
+        self.calendar_window = None
+        # Conflict analysis of the Gantt date range, patched as single activities change; it is
+        # only kept up to date once the dashboard or a Gantt chart has asked for it
+        self.conflicts = None
+        self.track_conflicts = False
+        self._started = False
+        # Follows the server's change feed when the model is a planner_client.RemoteModel
+        self.feed: Optional[FeedListener] = None
         self.initUI()
+        self.setup_notifications()
+
+    def showEvent(self, event) -> None:
+        super().showEvent(event)
+        if not self._started:
+            # Queue the first queries behind the initial paint so the window appears straight away
+            self._started = True
+            QTimer.singleShot(0, self.start_session)
+
+    def start_session(self) -> None:
+        self.load_data()
+        self.notifications.start()
+        self.refresh_dashboard()
+        if hasattr(self.model, 'changes'):
+            self.feed = FeedListener(self.model.changes)
+            self.feed.signals.change.connect(self.apply_remote_change)
+            self.feed.start()
 
     def initUI(self) -> None:
         self.setWindowTitle('Comprehensive Yearly Planner')
@@ -107,29 +427,78 @@ class ActivityView(QMainWindow):
         palette = self.palette()
         palette.setColor(QPalette.Window, QColor("white"))  # or any other color
         self.setPalette(palette)
+        self.setStyleSheet(STYLESHEET)
 
 
         # Central widget
         central_widget = QWidget()
+        central_widget.setObjectName("central")
         self.setCentralWidget(central_widget)
         layout = QVBoxLayout()
         central_widget.setLayout(layout)
 
+        # Summary figures, refreshed from the summary tables after every change
+        self.dashboard = DashboardPanel()
+        self.dashboard.conflicts_requested.connect(self.request_conflicts)
+        layout.addWidget(self.dashboard)
+        self.dashboard_timer = QTimer(self)
+        self.dashboard_timer.setSingleShot(True)
+        self.dashboard_timer.setInterval(self.DASHBOARD_DEBOUNCE_MS)
+        self.dashboard_timer.timeout.connect(self.refresh_dashboard)
+
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(9)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Category", "Activity", "Status", "Notification", "Timeline", "Deadline", "Priority", "Notes"
-        ])
+        self.table_model = ActivityTableModel(self.model, self)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.setSelectionBehavior(QTableView.SelectRows)
+        self.table.setSelectionMode(QTableView.ExtendedSelection)
+        for column, choices in (('category', CATEGORIES), ('status', STATUSES), ('priority', PRIORITIES)):
+            self.table.setItemDelegateForColumn(COLUMNS.index(column), ChoiceDelegate(choices, self.table))
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.table.setStyleSheet("""
-            background-color: #ffffff;
-            alternate-background-color: #f1f1f1;
-            border: 1px solid #ccc;
-            font-size: 14px;
-            border-radius: 8px;
-        """)
-        layout.addWidget(self.table)
+        # Header clicks re-query in the new order rather than sorting loaded rows
+        self.table.horizontalHeader().setSortIndicatorShown(True)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.horizontalHeader().sortIndicatorChanged.connect(self.sort_table)
+        layout.addWidget(self.table, 1)
+
+        # Cell edits are buffered and written in one transaction after a pause
+        self.edit_timer = QTimer(self)
+        self.edit_timer.setSingleShot(True)
+        self.edit_timer.setInterval(self.WRITE_BEHIND_MS)
+        self.edit_timer.timeout.connect(self.flush_edits)
+        self.table_model.edited.connect(self.edit_timer.start)
+
+        # Bulk changes to the selected rows; these and cell edits can be undone
+        self.undo_stack = QUndoStack(self)
+        undo_action = self.undo_stack.createUndoAction(self, "Undo")
+        undo_action.setShortcut(QKeySequence.Undo)
+        redo_action = self.undo_stack.createRedoAction(self, "Redo")
+        redo_action.setShortcut(QKeySequence.Redo)
+        self.addActions([undo_action, redo_action])
+        QShortcut(QKeySequence.Delete, self.table, activated=self.delete_activity)
+
+        bulk_layout = QHBoxLayout()
+        bulk_layout.setContentsMargins(30, 0, 30, 0)
+        bulk_layout.addWidget(QLabel("Selected rows:"))
+        self.bulk_status_combobox = QComboBox()
+        self.bulk_status_combobox.addItems(["Set status…"] + STATUSES)
+        self.bulk_status_combobox.activated.connect(partial(self.bulk_set, 'status', self.bulk_status_combobox))
+        bulk_layout.addWidget(self.bulk_status_combobox)
+        self.bulk_priority_combobox = QComboBox()
+        self.bulk_priority_combobox.addItems(["Set priority…"] + PRIORITIES)
+        self.bulk_priority_combobox.activated.connect(partial(self.bulk_set, 'priority', self.bulk_priority_combobox))
+        bulk_layout.addWidget(self.bulk_priority_combobox)
+        self.shift_days_spinbox = QSpinBox()
+        self.shift_days_spinbox.setRange(-366, 366)
+        self.shift_days_spinbox.setValue(7)
+        self.shift_days_spinbox.setSuffix(" days")
+        bulk_layout.addWidget(self.shift_days_spinbox)
+        self.shift_button = QPushButton("Shift Deadlines")
+        self.shift_button.setObjectName("shift_button")
+        self.shift_button.clicked.connect(self.shift_deadlines)
+        bulk_layout.addWidget(self.shift_button)
+        bulk_layout.addStretch(1)
+        layout.addLayout(bulk_layout)
 
         # Form for adding new activity
         form_layout = QFormLayout()
@@ -139,108 +508,41 @@ class ActivityView(QMainWindow):
         form_layout.setContentsMargins(30, 20, 30, 20)
 
         self.category_combobox = QComboBox()
-        self.category_combobox.addItems([
-                    "Birthday", "Anniversary", "Holiday", "Project Deadline", "Meeting", "Appointment", "Email", "Tax Return", 
-                    "Learning", "Coding", "Personal", "Family", "Social", "Travel", "Errands", 
-                    "Shopping", "Health", "Fitness", "Sports", "Hobbies", "Creative Pursuits", 
-                    "Volunteer", "Other", "Wedding", "Graduation", "Party", "Conference", "Seminar", 
-                    "Workshop", "Training", "Exam", "Interview", "Job Search", "Career Development", 
-                    "Home Maintenance", "Household Chores", "Pet Care", "Gardening", "Cooking", 
-                    "Financial Planning", "Budgeting", "Investing", "Real Estate", "Automotive", 
-                    "Home Improvement", "DIY Project", "Renovation", "Moving", "Relocation", 
-                    "Education", "Research", "Thesis", "Dissertation", "Academic", "School Event", 
-                    "Community Service", "Charity Event", "Fundraiser", "Campaign", "Political Event", 
-                    "Religious Event", "Spiritual", "Wellness", "Self-Care", "Mental Health", 
-                    "Recreational", "Leisure", "Entertainment", "Arts", "Culture", "Music", 
-                    "Theater", "Dance", "Film", "Photography", "Gaming", "Outdoor Activities", 
-                    "Adventure", "Travel Planning", "Itinerary", "Trip", "Vacation", "Staycation"
-                    ])
-        self.category_combobox.setStyleSheet("""
-            padding: 8px;
-            border: 1px solid #ccc;
-            border-radius: 8px;
-            font-size: 14px;
-            background-color: #ffffff;
-        """)
+        self.category_combobox.addItems(CATEGORIES)
         form_layout.addRow(QLabel("Category:"), self.category_combobox)
 
         self.activity_entry = QLineEdit()
-        self.activity_entry.setStyleSheet("""
-            padding: 8px;
-            border: 1px solid #ccc;
-            border-radius: 8px;
-            font-size: 14px;
-            background-color: #ffffff;
-        """)
         form_layout.addRow(QLabel("Activity & Description:"), self.activity_entry)
 
         self.status_combobox = QComboBox()
-        self.status_combobox.addItems(["Pending", "In Progress", "Completed"])
-        self.status_combobox.setStyleSheet("""
-            padding: 8px;
-            border: 1px solid #ccc;
-            border-radius: 8px;
-            font-size: 14px;
-            background-color: #ffffff;
-        """)
+        self.status_combobox.addItems(STATUSES)
         form_layout.addRow(QLabel("Status:"), self.status_combobox)
 
         self.notification_edit = QDateTimeEdit()
         self.notification_edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
         self.notification_edit.setDateTime(datetime.now().replace(hour=6, minute=0, second=0))
         self.notification_edit.setCalendarPopup(True)  # Show calendar popup for date selection
-        self.notification_edit.setStyleSheet("""
-            padding: 8px;
-            border: 1px solid #ccc;
-            border-radius: 8px;
-            font-size: 14px;
-            background-color: #ffffff;
-        """)
         form_layout.addRow(QLabel("Notification Date and Time:"), self.notification_edit)
 
         self.timeline_edit = QLineEdit()
-        self.timeline_edit.setStyleSheet("""
-            padding: 8px;
-            border: 1px solid #ccc;
-            border-radius: 8px;
-            font-size: 14px;
-            background-color: #ffffff;
-        """)
         form_layout.addRow(QLabel("Timeline:"), self.timeline_edit)
 
         self.deadline_edit = QDateEdit(datetime.now().replace(month=12, day=31))
         self.deadline_edit.setDisplayFormat("yyyy-MM-dd")
         self.deadline_edit.setCalendarPopup(True)
-        self.deadline_edit.setStyleSheet("""
-            padding: 8px;
-            border: 1px solid #ccc;
-            border-radius: 8px;
-            font-size: 14px;
-            background-color: #ffffff;
-        """)
         form_layout.addRow(QLabel("Deadline:"), self.deadline_edit)
 
         self.priority_combobox = QComboBox()
-        self.priority_combobox.addItems(["High", "Medium", "Low"])
-        self.priority_combobox.setStyleSheet("""
-            padding: 8px;
-            border: 1px solid #ccc;
-            border-radius: 8px;
-            font-size: 14px;
-            background-color: #ffffff;
-        """)
+        self.priority_combobox.addItems(PRIORITIES)
         form_layout.addRow(QLabel("Priority:"), self.priority_combobox)
 
         self.notes_edit = QLineEdit()
-        self.notes_edit.setStyleSheet("""
-            padding: 8px;
-            border: 1px solid #ccc;
-            border-radius: 8px;
-            font-size: 14px;
-            background-color: #ffffff;
-        """)
         form_layout.addRow(QLabel("Notes:"), self.notes_edit)
 
+        self.repeat_combobox = QComboBox()
+        self.repeat_combobox.addItems(["Does not repeat"] + [frequency.capitalize() for frequency in FREQUENCIES])
+        form_layout.addRow(QLabel("Repeat:"), self.repeat_combobox)
+
         layout.addLayout(form_layout)
 
         # Buttons
@@ -249,83 +551,48 @@ class ActivityView(QMainWindow):
         button_layout.setContentsMargins(30, 20, 30, 20)
 
         self.add_button = QPushButton("Add Activity")
-        self.add_button.setStyleSheet("""
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                padding: 12px 20px;
-                border: none;
-                border-radius: 8px;
-                font-size: 16px;
-                font-weight: bold;
-                text-align: center;
-            }
-        """)
+        self.add_button.setObjectName("add_button")
         self.add_button.clicked.connect(self.add_activity)
         button_layout.addWidget(self.add_button)
 
-        self.delete_button = QPushButton("Delete Selected Activity")
-        self.delete_button.setStyleSheet("""
-            QPushButton {
-                background-color: #f44336;
-                color: white;
-                padding: 12px 20px;
-                border: none;
-                border-radius: 8px;
-                font-size: 16px;
-                font-weight: bold;
-                text-align: center;
-            }
-        """)
+        self.delete_button = QPushButton("Delete Selected Activities")
+        self.delete_button.setObjectName("delete_button")
         self.delete_button.clicked.connect(self.delete_activity)
         button_layout.addWidget(self.delete_button)
 
         self.search_box = QLineEdit()
         self.search_box.setPlaceholderText("Search...")
-        self.search_box.setStyleSheet("""
-            QLineEdit {
-                padding: 8px;
-                border: 1px solid #ccc;
-                border-radius: 8px;
-                font-size: 14px;
-                background-color: #ffffff;
-            }
-        """)
-        self.search_box.textChanged.connect(self.search_table)
+        # Debounce keystrokes so a burst of typing runs a single indexed search
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.search_table)
+        self.search_box.textChanged.connect(self.search_timer.start)
         button_layout.addWidget(self.search_box)
 
         self.print_button = QPushButton("Print Table")
-        self.print_button.setStyleSheet("""
-            QPushButton {
-                background-color: #2196F3;
-                color: white;
-                padding: 12px 20px;
-                border: none;
-                border-radius: 8px;
-                font-size: 16px;
-                font-weight: bold;
-                text-align: center;
-            }
-        """)
+        self.print_button.setObjectName("print_button")
         self.print_button.clicked.connect(self.print_table)
         button_layout.addWidget(self.print_button)
 
         self.export_button = QPushButton("Export Data")
-        self.export_button.setStyleSheet("""
-            QPushButton {
-                background-color: #FFC107;
-                color: black;
-                padding: 12px 20px;
-                border: none;
-                border-radius: 8px;
-                font-size: 16px;
-                font-weight: bold;
-                text-align: center;
-            }
-        """)
+        self.export_button.setObjectName("export_button")
         self.export_button.clicked.connect(self.export_data)
         button_layout.addWidget(self.export_button)
 
+        # Archives and backups are files next to the database, so only offered when it is opened directly
+        if hasattr(self.model, 'archive'):
+            files_layout = QHBoxLayout()
+            self.archive_button = QPushButton("Archive Past Years")
+            self.archive_button.setObjectName("archive_button")
+            self.archive_button.clicked.connect(self.archive_past_years)
+            files_layout.addWidget(self.archive_button)
+            self.backup_button = QPushButton("Back Up Database")
+            self.backup_button.setObjectName("backup_button")
+            self.backup_button.clicked.connect(self.backup_database)
+            files_layout.addWidget(self.backup_button)
+            button_layout.addLayout(files_layout)
+
         self.start_date_edit = QDateEdit(datetime.now().replace(month=4, day=1))
         self.start_date_edit.setDisplayFormat("yyyy-MM-dd")
         button_layout.addWidget(self.start_date_edit)
@@ -333,35 +600,138 @@ class ActivityView(QMainWindow):
         self.end_date_edit = QDateEdit(datetime.now().replace(month=12, day=31))
         self.end_date_edit.setDisplayFormat("yyyy-MM-dd")
         button_layout.addWidget(self.end_date_edit)
+        # The conflict analysis follows the chart's date range
+        self.conflicts_timer = QTimer(self)
+        self.conflicts_timer.setSingleShot(True)
+        self.conflicts_timer.setInterval(self.DASHBOARD_DEBOUNCE_MS)
+        self.conflicts_timer.timeout.connect(self.refresh_conflicts)
+        self.start_date_edit.dateChanged.connect(self.conflicts_timer.start)
+        self.end_date_edit.dateChanged.connect(self.conflicts_timer.start)
 
         self.gantt_chart_button = QPushButton("Generate Gantt Chart")
-        self.gantt_chart_button.setStyleSheet("""
-            QPushButton {
-                background-color: #673AB7;
-                color: white;
-                padding: 12px 20px;
-                border: none;
-                border-radius: 8px;
-                font-size: 16px;
-                font-weight: bold;
-                text-align: center;
-            }
-        """)
+        self.gantt_chart_button.setObjectName("gantt_chart_button")
         self.gantt_chart_button.clicked.connect(self.generate_gantt_chart)
         button_layout.addWidget(self.gantt_chart_button)
 
+        self.calendar_button = QPushButton("Calendar")
+        self.calendar_button.setObjectName("calendar_button")
+        self.calendar_button.clicked.connect(self.show_calendar)
+        button_layout.addWidget(self.calendar_button)
+
         layout.addLayout(button_layout)
 
-        self.load_data()
+        # F12 opens the timings panel; recording starts when it is switched on there
+        self.metrics_panel = None
+        QShortcut(QKeySequence(Qt.Key_F12), self, activated=self.show_metrics_panel)
+
+    def show_metrics_panel(self) -> None:
+        if self.metrics_panel is None:
+            from planner_debug import MetricsPanel
+
+            self.metrics_panel = MetricsPanel()
+        self.metrics_panel.show()
+        self.metrics_panel.raise_()
 
     def load_data(self):
-        df = self.model.load_data()
-        self.table.setRowCount(len(df))
-        for i, row in df.iterrows():
-            for j in range(len(row)):
-                self.table.setItem(i, j, QTableWidgetItem(str(row.iloc[j])))
+        # A reload drops the loaded rows, buffered edits included, so write them first
+        self.flush_edits()
+        self.run_in_background(
+            self.table_model.query_rows, self.table_model.search_text, self.table_model.order_by,
+            on_result=self.table_model.apply_rows
+        )
+
+    def run_in_background(self, fn, *args, on_result, label: Optional[str] = None, **kwargs) -> Worker:
+        """Run ``fn`` on the thread pool and hand its result to ``on_result`` on the GUI thread.
+
+        With a ``label`` a cancellable progress dialog is shown while it runs.
+        """
+        worker = Worker(fn, *args, **kwargs)
+        if self._closed:
+            return worker
+        worker.signals.result.connect(on_result)
+        worker.signals.error.connect(lambda message: QMessageBox.warning(self, 'Error', message))
+        # Keep the worker (and its signals) alive until it is done
+        self._workers.add(worker)
+        worker.signals.finished.connect(lambda: self._workers.discard(worker))
+        if label:
+            dialog = QProgressDialog(label, 'Cancel', 0, 0, self)
+            dialog.setWindowModality(Qt.WindowModal)
+            dialog.setMinimumDuration(300)
+            dialog.canceled.connect(worker.cancel)
+            worker.signals.progress.connect(lambda done, total: (dialog.setMaximum(total), dialog.setValue(done)))
+            worker.signals.finished.connect(dialog.reset)
+        QThreadPool.globalInstance().start(worker)
+        return worker
+
+    def refresh_dashboard(self) -> None:
+        self.run_in_background(self.query_summary, on_result=self.dashboard.update_summary)
+        if self.calendar_window is not None and self.calendar_window.isVisible():
+            self.load_calendar_year(self.calendar_window.year)
+
+    def query_summary(self, progress) -> dict:
+        """Read the dashboard figures; runs on a worker thread."""
+        return self.model.summary()
+
+    def gantt_range(self) -> tuple:
+        return self.start_date_edit.date().toString("yyyy-MM-dd"), self.end_date_edit.date().toString("yyyy-MM-dd")
+
+    def request_conflicts(self) -> None:
+        self.track_conflicts = True
+        self.refresh_conflicts()
+
+    def refresh_conflicts(self) -> None:
+        if not self.track_conflicts:
+            return
+        self.run_in_background(self.analyse_conflicts, *self.gantt_range(), on_result=self.show_conflicts)
+
+    def analyse_conflicts(self, start_date: str, end_date: str, progress):
+        """Run the full conflict analysis over the range; runs on a worker thread."""
+        from planner_conflicts import TimelineConflicts
 
-        self.table.resizeColumnsToContents()
+        return TimelineConflicts.load(self.model, start_date, end_date) if start_date <= end_date else None
+
+    def show_conflicts(self, conflicts) -> None:
+        self.conflicts = conflicts
+        if conflicts is not None:
+            self.dashboard.update_conflicts(conflicts)
+
+    def recheck_conflicts(self, activity_ids: List[int]) -> None:
+        """Bring the conflict analysis up to date after ``activity_ids`` changed."""
+        conflicts = self.conflicts
+        if conflicts is None or len(activity_ids) > self.CONFLICT_RECHECK_MAX:
+            self.refresh_conflicts()
+            return
+        self.run_in_background(
+            self.query_conflict_inputs, conflicts.start_day, conflicts.end_day, activity_ids,
+            on_result=self.apply_conflict_inputs
+        )
+
+    def query_conflict_inputs(self, start_day: int, end_day: int, activity_ids: List[int], progress) -> tuple:
+        return start_day, end_day, activity_ids, self.model.conflict_inputs(start_day, end_day, activity_ids)
+
+    def apply_conflict_inputs(self, result: tuple) -> None:
+        start_day, end_day, activity_ids, inputs = result
+        conflicts = self.conflicts
+        # A full analysis of another range may have replaced it meanwhile
+        if conflicts is not None and (conflicts.start_day, conflicts.end_day) == (start_day, end_day):
+            conflicts.recheck(activity_ids, inputs)
+            self.dashboard.update_conflicts(conflicts)
+
+    def setup_notifications(self) -> None:
+        # One single-shot timer, re-armed by the scheduler for the next due reminder
+        self.notification_timer = QTimer(self)
+        self.notification_timer.setSingleShot(True)
+        self.notifications = NotificationScheduler(
+            self.model,
+            notifier=self.show_notification,
+            arm=lambda seconds: self.notification_timer.start(int(seconds * 1000))
+        )
+        self.notification_timer.timeout.connect(self.notifications.fire_due)
+
+    def show_notification(self, title: str, message: str) -> None:
+        from plyer import notification
+
+        notification.notify(title=title, message=message, app_name='Comprehensive Yearly Planner', timeout=10)
 
     def add_activity(self):
         # Validate user input
@@ -373,13 +743,14 @@ class ActivityView(QMainWindow):
         deadline = self.deadline_edit.date().toString("yyyy-MM-dd")
         priority = self.priority_combobox.currentText()
         notes = self.notes_edit.text()
+        repeat = self.repeat_combobox.currentIndex()
 
         if not activity:
             QMessageBox.warning(self, 'Error', 'Activity description cannot be empty.')
             return
 
         # Insert activity into the database
-        self.model.add_activity({
+        row = self.model.add_activity({
             'category': category,
             'activity': activity,
             'status': status,
@@ -387,30 +758,150 @@ class ActivityView(QMainWindow):
             'timeline': timeline,
             'deadline': deadline,
             'priority': priority,
-            'notes': notes
+            'notes': notes,
+            'recurrence': FREQUENCIES[repeat - 1] if repeat else None
         })
 
-        # Update the table
-        self.load_data()
+        # Update the table and the reminder schedule
+        self.table_model.insert_activity_row(row)
+        if repeat:
+            # A series queues one reminder per occurrence; reload the window to pick them up
+            self.notifications.start()
+        elif row[4]:
+            self.notifications.schedule(row[0], to_epoch_seconds(row[4]), row[2])
+        self.dashboard_timer.start()
+        self.recheck_conflicts([row[0]])
         self.clear_form()
 
+    def selected_ids(self) -> List[int]:
+        return sorted(self.table_model.activity_id(index.row()) for index in self.table.selectionModel().selectedRows())
+
     def delete_activity(self):
-        selected_row = self.table.currentRow()
-        if selected_row >= 0:
-            activity_id = self.table.item(selected_row, 0).text()
-            self.model.delete_activity(activity_id)
+        activity_ids = self.selected_ids()
+        if activity_ids:
+            self.flush_edits()
+            self.undo_stack.push(DeleteActivities(self.model, activity_ids, self.activities_changed))
+
+    def bulk_set(self, column: str, combobox: QComboBox, index: int) -> None:
+        combobox.setCurrentIndex(0)
+        activity_ids = self.selected_ids()
+        if index > 0 and activity_ids:
+            self.flush_edits()
+            value = combobox.itemText(index)
+            self.undo_stack.push(UpdateActivities(
+                self.model, {activity_id: {column: value} for activity_id in activity_ids},
+                self.activities_changed, f"set {column} to {value}"
+            ))
+
+    def shift_deadlines(self) -> None:
+        activity_ids, days = self.selected_ids(), self.shift_days_spinbox.value()
+        if activity_ids and days:
+            self.flush_edits()
+            try:
+                command = ShiftDeadlines(self.model, activity_ids, days, self.activities_changed)
+            except ValueError as e:
+                QMessageBox.warning(self, 'Error', f'Could not shift deadlines: {e}')
+                return
+            self.undo_stack.push(command)
+
+    def flush_edits(self) -> None:
+        """Write the buffered cell edits in one transaction, as one undo step."""
+        self.edit_timer.stop()
+        edits = self.table_model.take_edits()
+        if not edits:
+            return
+        try:
+            command = UpdateActivities(self.model, edits, self.activities_changed)
+        except ValueError as e:
+            # Nothing was written; show the stored values again
+            self.table_model.refresh_activity_rows(sorted(edits))
+            QMessageBox.warning(self, 'Error', f'Edit not saved: {e}')
+            return
+        self.undo_stack.push(command)
+
+    def activities_changed(self, kind: str, activity_ids: List[int]) -> None:
+        """Bring the table, reminders and dashboard up to date after a bulk change or its undo."""
+        if kind == DELETED:
+            self.table_model.remove_activity_rows(activity_ids)
+        elif kind == RESTORED:
             self.load_data()
+        else:
+            self.table_model.refresh_activity_rows(activity_ids)
+        self.reschedule_notifications(activity_ids, deleted=kind == DELETED)
+        self.dashboard_timer.start()
+        self.recheck_conflicts(activity_ids)
+
+    def reschedule_notifications(self, activity_ids: List[int], deleted: bool = False) -> None:
+        """Drop the queued reminders of ``activity_ids`` and, unless they were deleted, queue their current ones."""
+        for activity_id in activity_ids:
+            self.notifications.cancel(activity_id)
+        if deleted:
+            return
+        for start in range(0, len(activity_ids), self.table_model.FETCH_SIZE):
+            chunk = activity_ids[start:start + self.table_model.FETCH_SIZE]
+            if self.model.recurrences(chunk):
+                # A series queues one reminder per occurrence; reload the window to pick them up
+                self.notifications.start()
+                return
+            for row in self.model.fetch_activities_by_ids(chunk):
+                self.notifications.schedule(row[0], to_epoch_seconds(row[4]) if row[4] else None, row[2])
+
+    def apply_remote_change(self, event: dict) -> None:
+        """Apply a change another client made through the planner server, as a delta where possible."""
+        kind, activity_ids = event['kind'], event['ids']
+        if kind in ('hello', 'ping') or event['origin'] == self.model.client_id:
+            return
+        if kind == 'added':
+            for start in range(0, len(activity_ids), self.table_model.FETCH_SIZE):
+                for row in self.model.fetch_activities_by_ids(activity_ids[start:start + self.table_model.FETCH_SIZE]):
+                    self.table_model.insert_activity_row(row)
+        elif kind == 'deleted':
+            self.table_model.remove_activity_rows(activity_ids)
+        elif kind == 'updated':
+            self.table_model.refresh_activity_rows(activity_ids)
+        else:
+            self.load_data()
+            self.refresh_conflicts()
+            # The event does not say which activities changed
+            self.notifications.start()
+        if kind in ('added', 'deleted', 'updated'):
+            self.recheck_conflicts(activity_ids)
+            self.reschedule_notifications(activity_ids, deleted=kind == 'deleted')
+        self.dashboard_timer.start()
+
+    def closeEvent(self, event) -> None:
+        self._closed = True
+        # Stop background work before the database it reads is closed on quit
+        for worker in list(self._workers):
+            worker.cancel()
+        QThreadPool.globalInstance().waitForDone()
+        self.flush_edits()
+        if self.feed is not None:
+            self.feed.stop()
+        super().closeEvent(event)
 
     def search_table(self):
-        search_text = self.search_box.text().lower()
-        for row in range(self.table.rowCount()):
-            match = False
-            for column in range(self.table.columnCount()):
-                item = self.table.item(row, column)
-                if item and search_text in item.text().lower():
-                    match = True
-                    break
-            self.table.setRowHidden(row, not match)
+        self.table_model.search_text = self.search_box.text()
+        self.load_data()
+
+    def sort_table(self, section: int, order: int) -> None:
+        column = COLUMNS[section]
+        if column not in SORT_KEYS:
+            # Only indexed columns can be paged in order; put the indicator back
+            header = self.table.horizontalHeader()
+            header.blockSignals(True)
+            if self.table_model.order_by:
+                current = self.table_model.order_by[0]
+                header.setSortIndicator(
+                    COLUMNS.index(current.lstrip('-')),
+                    Qt.DescendingOrder if current.startswith('-') else Qt.AscendingOrder
+                )
+            else:
+                header.setSortIndicator(-1, Qt.AscendingOrder)
+            header.blockSignals(False)
+            return
+        self.table_model.order_by = ['-' + column if order == Qt.DescendingOrder else column]
+        self.load_data()
 
     def print_table(self):
         try:
@@ -425,83 +916,200 @@ class ActivityView(QMainWindow):
             QMessageBox.warning(self, 'Error', f'Error printing table: {e}')
 
     def export_data(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Save File", "", "Excel Files (*.xlsx);;CSV Files (*.csv)")
+        from planner_export import FORMATS, export_activities
+
+        path, _ = QFileDialog.getSaveFileName(self, "Save File", "", ";;".join(FORMATS.values()))
         if path:
-            df = self.model.load_data()
-            try:
-                if path.endswith('.csv'):
-                    df.to_csv(path, index=False)
-                elif path.endswith('.xlsx'):
-                    df.to_excel(path, index=False)
-                QMessageBox.information(self, 'Success', 'Data exported successfully.')
-            except Exception as e:
-                QMessageBox.warning(self, 'Error', f'Error exporting data: {e}')
-
-#
-    def generate_gantt_chart(self):
-        start_date = self.start_date_edit.date().toString("yyyy-MM-dd")
-        end_date = self.end_date_edit.date().toString("yyyy-MM-dd")
+            self.export_button.setEnabled(False)
+            worker = self.run_in_background(
+                export_activities, self.model, path, label='Exporting activities...',
+                on_result=lambda _: QMessageBox.information(self, 'Success', 'Data exported successfully.')
+            )
+            worker.signals.finished.connect(lambda: self.export_button.setEnabled(True))
+
+    def archive_past_years(self) -> None:
+        this_year = date.today().year
+        year, ok = QInputDialog.getInt(
+            self, "Archive Past Years", "Archive completed activities dated before 1 January of:",
+            this_year, 1971, this_year
+        )
+        if not ok or QMessageBox.question(
+            self, "Archive Past Years",
+            f"Move the completed activities dated before {year} out of the working table into one archive "
+            f"file per year?\n\nThey can still be read with 'planner_cli.py archived YEAR' and brought back "
+            f"with 'planner_cli.py unarchive YEAR'."
+        ) != QMessageBox.Yes:
+            return
+        self.flush_edits()
+        self.archive_button.setEnabled(False)
+        worker = self.run_in_background(
+            self.archive_and_compact, year, label='Archiving activities...', on_result=self.show_archived
+        )
+        # Years archived before a cancel or an error stay archived, so reload whatever the outcome
+        worker.signals.finished.connect(self.reload_after_archive)
+
+    def archive_and_compact(self, before_year: int, progress) -> tuple:
+        """Archive the past years, then VACUUM/ANALYZE; runs on a worker thread."""
+        moved = self.model.archive(before_year, progress)
+        return moved, self.model.compact() if moved else None
+
+    def show_archived(self, result: tuple) -> None:
+        moved, sizes = result
+        if not moved:
+            QMessageBox.information(self, 'Archive', 'There is nothing to archive before that year.')
+            return
+        years = ', '.join(f"{year}: {count:,}" for year, count in moved.items())
+        before, after = (size / (1024 * 1024) for size in sizes)
+        QMessageBox.information(
+            self, 'Archive',
+            f"Archived {sum(moved.values()):,} activities ({years}).\n"
+            f"The database went from {before:,.1f} MiB to {after:,.1f} MiB."
+        )
+
+    def reload_after_archive(self) -> None:
+        self.archive_button.setEnabled(True)
+        # Undo steps may refer to rows that are now in an archive
+        self.undo_stack.clear()
+        self.load_data()
+        self.notifications.start()
+        self.dashboard_timer.start()
+        self.refresh_conflicts()
 
-        df = self.model.load_data()
+    def backup_database(self) -> None:
+        path, _ = QFileDialog.getSaveFileName(self, "Back Up Database", "", "SQLite Databases (*.db)")
+        if path:
+            self.backup_button.setEnabled(False)
+            worker = self.run_in_background(
+                self.model.backup, path, label='Backing up...',
+                on_result=lambda paths: QMessageBox.information(self, 'Success', "Backed up to " + ", ".join(paths))
+            )
+            worker.signals.finished.connect(lambda: self.backup_button.setEnabled(True))
 
-        if df.empty:
+    def generate_gantt_chart(self):
+        start_date, end_date = self.gantt_range()
+        # The worker only gets copies: the caches and the analysis are changed on the GUI thread
+        cached = {
+            version: layout for (version, start, end), layout in self.gantt_layouts.items()
+            if (start, end) == (start_date, end_date)
+        }
+        conflicts = self.conflicts
+        span = (to_epoch_day(start_date), to_epoch_day(end_date))
+        if conflicts is not None and (conflicts.start_day, conflicts.end_day) != span:
+            conflicts = None
+
+        self.gantt_chart_button.setEnabled(False)
+        worker = self.run_in_background(
+            self.prepare_gantt_chart, start_date, end_date, cached, conflicts, on_result=self.show_gantt_chart
+        )
+        worker.signals.finished.connect(lambda: self.gantt_chart_button.setEnabled(True))
+
+    @timed()
+    def prepare_gantt_chart(self, start_date: str, end_date: str, cached: dict, conflicts, progress) -> tuple:
+        """Load the chart data and index it for the widget; runs on a worker thread.
+
+        ``cached`` maps data versions to the layouts already built for this range,
+        so opening the same chart again skips the query and the indexing while the
+        data is unchanged; the cache itself is only written by ``show_gantt_chart``
+        on the GUI thread. ``conflicts`` is the analysis kept for the dashboard when
+        it covers the same range, and is run afresh otherwise.
+        """
+        from planner_gantt import GanttLayout, prepare_segments
+
+        if conflicts is None:
+            conflicts = self.analyse_conflicts(start_date, end_date, progress)
+        key = (self.model.data_version(), start_date, end_date)
+        if key[0] in cached:
+            return key, cached[key[0]], conflicts
+        df = self.model.load_timelines(start_date, end_date)
+        segments, labels = prepare_segments(df, start_date, end_date)
+        return key, GanttLayout(segments, labels) if not segments.empty else None, conflicts
+
+    def show_gantt_chart(self, chart: tuple) -> None:
+        key, layout, conflicts = chart
+        _, start_date, end_date = key
+        self.gantt_layouts[key] = layout
+        self.gantt_layouts.move_to_end(key)
+        while len(self.gantt_layouts) > self.GANTT_LAYOUTS:
+            self.gantt_layouts.popitem(last=False)
+        if conflicts is not None and conflicts is not self.conflicts and (start_date, end_date) == self.gantt_range():
+            # The chart has analysed the range the dashboard follows, so the dashboard can show it from now on
+            self.track_conflicts = True
+            self.show_conflicts(conflicts)
+        if layout is None:
             QMessageBox.warning(self, 'No Data', 'No activities found for the selected date range.')
             return
 
-        # Group activities by name and combine timelines
-        grouped_df = df.groupby('activity').agg({
-            'status': 'first',
-            'timeline': lambda x: ' ; '.join(x.dropna()),
-            'deadline': 'first'
-        }).reset_index()
-
-        fig, ax = plt.subplots(figsize=(15, 8))
-
-        # Customize colors and bar styles
-        colors = ['#4CAF50', '#FFC107', '#f44336']  # Completed, In Progress, Pending
-        status_to_color = {'Completed': 0, 'In Progress': 1, 'Pending': 2}
-        bar_style = {'linewidth': 2, 'edgecolor': 'black'}
-
-        for i, (activity, status, timelines, deadline) in enumerate(zip(grouped_df['activity'], grouped_df['status'], grouped_df['timeline'], grouped_df['deadline'])):
-            timelines = timelines.split(' ; ')
-            for timeline in timelines:
-                if timeline and ' - ' in timeline:
-                    try:
-                        start, end = timeline.split(' - ')
-                        start = datetime.strptime(start.strip(), "%Y-%m-%d")
-                        end = datetime.strptime(end.strip(), "%Y-%m-%d")
-                        ax.barh(i, (end - start).days, left=start, color=colors[status_to_color[status]], **bar_style)
-                        # Adding text labels
-                        #ax.text(start, i, start.strftime('%Y-%m-%d'), va='center', ha='right', fontsize=8, color='black')
-                        #ax.text(end, i, end.strftime('%Y-%m-%d'), va='center', ha='left', fontsize=8, color='black')
-                    except ValueError as e:
-                        print(f"Error parsing timeline for activity '{activity}': {e}")
-
-        # Add task labels
-        ax.set_yticks(range(len(grouped_df)))
-        ax.set_yticklabels(grouped_df['activity'], fontsize=12, fontweight='bold')
-
-        # Customize axis labels and gridlines
-        ax.xaxis.set_major_locator(mdates.MonthLocator())
-        ax.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m-%d"))
-        ax.grid(True, which='major', axis='both', linestyle='--', alpha=0.5)
-
-        # Set background color
-        ax.set_facecolor('#f9f9f9')
-
-        # Add legend
-        legend_handles = [mpatches.Rectangle((0, 0), 1, 1, facecolor=color) for color in colors]
-        legend_labels = ['Completed', 'In Progress', 'Pending']
-        ax.legend(legend_handles, legend_labels, loc='upper right', fontsize=10, frameon=False)
-
-        # Improve overall layout and aesthetics
-        plt.xlabel("Date", fontsize=14, fontweight='bold')
-        plt.ylabel("Activity", fontsize=14, fontweight='bold')
-        plt.title("Gantt Chart", fontsize=16, fontweight='bold')
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        plt.show()
-
+        from planner_gantt_widget import GanttWidget
+
+        self.gantt_window = GanttWidget(layout, start_date, end_date, conflicts)
+        self.gantt_window.setWindowTitle(f"Gantt Chart {start_date} – {end_date}")
+        self.gantt_window.resize(1200, 750)
+        self.gantt_window.show()
+
+    def show_calendar(self) -> None:
+        if self.calendar_window is None:
+            from planner_calendar_widget import CalendarWidget
+
+            self.calendar_window = CalendarWidget(date.today().year)
+            self.calendar_window.year_changed.connect(self.load_calendar_year)
+            self.calendar_window.resize(1100, 600)
+        self.calendar_window.show()
+        self.calendar_window.raise_()
+        self.load_calendar_year(self.calendar_window.year)
+
+    def load_calendar_year(self, year: int) -> None:
+        """Show ``year`` from the cache straight away, then bring it and its neighbours up to date.
+
+        The check runs in the background and only redraws when the data version
+        has moved on, so flipping through cached years never waits on a query.
+        """
+        cached = self.calendar_years.get(year)
+        if cached is not None:
+            self.calendar_window.set_occupancy(cached[1])
+        for neighbour in (year, year - 1, year + 1):
+            self.check_calendar_year(neighbour)
+
+    def check_calendar_year(self, year: int) -> None:
+        if year in self.calendar_loads:
+            # The check in flight may have read the data before the latest change, so go again after it
+            self.calendar_loads[year] = True
+            return
+        self.calendar_loads[year] = False
+        cached = self.calendar_years.get(year)
+        worker = self.run_in_background(
+            self.prepare_calendar_year, year, cached[0] if cached is not None else None,
+            on_result=self.show_calendar_year
+        )
+        worker.signals.finished.connect(lambda: self.calendar_year_checked(year))
+
+    def calendar_year_checked(self, year: int) -> None:
+        if self.calendar_loads.pop(year):
+            self.check_calendar_year(year)
+
+    @timed()
+    def prepare_calendar_year(self, year: int, cached_version: Optional[int], progress):
+        """Build a year's occupancy unless the cached one is current; runs on a worker thread.
+
+        ``cached_version`` is the data version of the cached occupancy, if any.
+        Returns ``(year, version, occupancy)`` for ``show_calendar_year`` to cache on
+        the GUI thread, or None when there is nothing new to show.
+        """
+        from planner_calendar import YearOccupancy
+
+        version = self.model.data_version()
+        if version == cached_version:
+            return None
+        return year, version, YearOccupancy.load(self.model, year)
+
+    def show_calendar_year(self, result) -> None:
+        if result is None:
+            return
+        year, version, occupancy = result
+        self.calendar_years[year] = (version, occupancy)
+        self.calendar_years.move_to_end(year)
+        while len(self.calendar_years) > self.CALENDAR_YEARS:
+            self.calendar_years.popitem(last=False)
+        self.calendar_window.set_occupancy(occupancy)
 
     def clear_form(self):
         self.category_combobox.setCurrentIndex(0)
@@ -512,12 +1120,23 @@ class ActivityView(QMainWindow):
         self.deadline_edit.setDate(datetime.now())
         self.priority_combobox.setCurrentIndex(0)
         self.notes_edit.clear()
+        self.repeat_combobox.setCurrentIndex(0)
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    db = Database('activities.db')
-    db.create_table()
-    model = ActivityModel(db)
+    parser = argparse.ArgumentParser(description="Comprehensive Yearly Planner")
+    parser.add_argument('--db', default='activities.db', help="SQLite database to open (default: %(default)s)")
+    parser.add_argument('--server', metavar='HOST:PORT', help="work against a shared planner server instead of --db")
+    args, qt_args = parser.parse_known_args()
+    app = QApplication(sys.argv[:1] + qt_args)
+    if args.server:
+        from planner_client import PlannerClient, RemoteModel
+
+        model = RemoteModel(PlannerClient(args.server))
+    else:
+        db = Database(args.db)
+        db.create_table()
+        model = ActivityModel(db)
+        app.aboutToQuit.connect(db.close)
     view = ActivityView(model)
     view.show()
     sys.exit(app.exec_())
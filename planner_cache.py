@@ -0,0 +1,129 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# Default byte budgets for the in-memory and on-disk tiers
+MEMORY_BYTES = 64 * 1024 * 1024
+DISK_BYTES = 512 * 1024 * 1024
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'planner')
+
+
+class RenderCache:
+    """Least-recently-used cache of rendered output, in memory and optionally on disk.
+
+    Keys come from ``key(*parts)``, a digest of the parts' reprs, so callers key
+    entries by whatever determines the output: the data version, the date range
+    and the render options. Both tiers are bounded in bytes and drop the least
+    recently used entries first; disk entries are files named by key whose
+    modification time records their last use. Safe to share between threads.
+    """
+
+    def __init__(self, directory: Optional[str] = None, memory_bytes: int = MEMORY_BYTES,
+                 disk_bytes: int = DISK_BYTES) -> None:
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._disk_used = None
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(*parts) -> str:
+        return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except OSError:
+            return None
+        self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        self._remember(key, data)
+        if not self.directory or len(data) > self.disk_bytes:
+            return
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            # Rewriting a key replaces its file, so its old size no longer counts
+            try:
+                replaced = os.stat(self._path(key)).st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp, self._path(key))
+        except OSError:
+            logging.exception("Could not write %s to the render cache", key)
+            return
+        with self._lock:
+            if self._disk_used is not None:
+                self._disk_used += len(data) - replaced
+        self._evict_disk()
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_used -= len(previous)
+            self._memory[key] = data
+            self._memory_used += len(data)
+            while self._memory_used > self.memory_bytes:
+                _, dropped = self._memory.popitem(last=False)
+                self._memory_used -= len(dropped)
+
+    def _evict_disk(self) -> None:
+        with self._lock:
+            # The directory is only scanned when the running total says it is over budget
+            if self._disk_used is not None and self._disk_used <= self.disk_bytes:
+                return
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            used = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if used <= self.disk_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    used -= size
+                except OSError:
+                    pass
+            self._disk_used = used
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+            if self.directory:
+                for entry in os.scandir(self.directory):
+                    if entry.is_file():
+                        os.remove(entry.path)
+                self._disk_used = 0
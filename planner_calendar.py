@@ -0,0 +1,72 @@
+from datetime import date
+from typing import Optional
+
+import numpy as np
+
+from planner_metrics import timed
+from planner_model import EPOCH_ORDINAL, STATUSES
+
+# What a calendar cell can show
+ACTIVE, DUE = 'active', 'due'
+
+
+def _rows(rows: list, width: int) -> np.ndarray:
+    return np.asarray(rows, dtype=np.int64).reshape(-1, width)
+
+
+class YearOccupancy:
+    """Per-day counts for one calendar year as ``(status, day)`` arrays, day 0 being 1 January.
+
+    ``active`` counts the timeline segments covering each day and ``due`` the
+    deadlines on it. Both come from ``day_counts``, whose rows are already
+    aggregated by the summary triggers, in one vectorised pass: the +1/-1 steps
+    are summed per day with ``bincount`` and a running sum turns them into
+    counts, so building a year costs the same for a thousand activities or a
+    million. Views read slices and totals straight from the arrays.
+    """
+
+    @timed()
+    def __init__(self, year: int, counts: dict) -> None:
+        self.year = year
+        self.first_day = date(year, 1, 1).toordinal() - EPOCH_ORDINAL
+        self.days = date(year + 1, 1, 1).toordinal() - EPOCH_ORDINAL - self.first_day
+        load, segments, due = _rows(counts['load'], 3), _rows(counts['segments'], 4), _rows(counts['due'], 3)
+        # Steps before the year land on its first day so they still count towards it
+        days = np.maximum(np.concatenate([load[:, 0], segments[:, 0], segments[:, 1] + 1]) - self.first_day, 0)
+        statuses = np.concatenate([load[:, 1], segments[:, 2], segments[:, 2]])
+        deltas = np.concatenate([load[:, 2], segments[:, 3], -segments[:, 3]])
+        self.active = np.cumsum(self._tally(days, statuses, deltas), axis=1)
+        self.due = self._tally(due[:, 0] - self.first_day, due[:, 1], due[:, 2])
+        dates = np.arange(self.days) + np.datetime64(f'{year}-01-01', 'D')
+        months = dates.astype('datetime64[M]')
+        # Month (0-11) and day of month (0-30) of every day, for laying the year out as a grid
+        self.months = months.astype(np.int64) % 12
+        self.month_days = (dates - months).astype(np.int64)
+
+    def _tally(self, days: np.ndarray, statuses: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        keep = (days >= 0) & (days < self.days)
+        cells = statuses[keep] * self.days + days[keep]
+        totals = np.bincount(cells, weights=weights[keep], minlength=len(STATUSES) * self.days)
+        return np.rint(totals).astype(np.int64).reshape(len(STATUSES), self.days)
+
+    @classmethod
+    def load(cls, model, year: int) -> "YearOccupancy":
+        """Read and build ``year`` from an ActivityModel (or RemoteModel)."""
+        first = date(year, 1, 1).toordinal() - EPOCH_ORDINAL
+        last = date(year, 12, 31).toordinal() - EPOCH_ORDINAL
+        return cls(year, model.day_counts(first, last))
+
+    def values(self, measure: str, status: Optional[int] = None) -> np.ndarray:
+        """Counts per day of the year for ``measure``, over all statuses or just ``status``."""
+        counts = self.active if measure == ACTIVE else self.due
+        return counts.sum(axis=0) if status is None else counts[status]
+
+    def grid(self, values: np.ndarray) -> np.ndarray:
+        """Lay per-day values out as 12 months x 31 days, with -1 for days a month does not have."""
+        grid = np.full((12, 31), -1, dtype=np.int64)
+        grid[self.months, self.month_days] = values
+        return grid
+
+    def day_index(self, month: int, day: int) -> int:
+        """Index into the day arrays of ``day`` (1-31) of ``month`` (1-12)."""
+        return date(self.year, month, day).toordinal() - EPOCH_ORDINAL - self.first_day
@@ -0,0 +1,238 @@
+import calendar
+from datetime import date
+from typing import Optional, Tuple
+
+import numpy as np
+from PyQt5.QtCore import QEvent, QRectF, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter
+from PyQt5.QtWidgets import QComboBox, QHBoxLayout, QLabel, QPushButton, QToolTip, QVBoxLayout, QWidget
+
+from planner_calendar import ACTIVE, DUE, YearOccupancy
+from planner_gantt import STATUS_COLORS
+from planner_metrics import timed
+from planner_model import STATUSES
+
+MEASURES = {ACTIVE: "Active activities", DUE: "Deadlines"}
+# Cell colour for the busiest day when all statuses are shown, and for empty days and padding
+ALL_COLOR = '#673AB7'
+EMPTY_COLOR = '#ffffff'
+NO_DAY_COLOR = '#eeeeee'
+# Margins for the month names and day numbers around the year grid, in pixels
+LABEL_WIDTH = 40
+HEADER_HEIGHT = 20
+# Shade of the quietest non-empty day, so it stands apart from days with nothing on
+MIN_SHARE = 0.15
+
+
+def blend(color: str, share: float) -> QColor:
+    """``color`` faded towards white, fully there at ``share`` 1."""
+    target = QColor(color)
+    return QColor(*(round(255 + (channel - 255) * share) for channel in (target.red(), target.green(), target.blue())))
+
+
+class CalendarHeatmap(QWidget):
+    """Paints one year as a 12 x 31 grid, or one month as weeks, shaded by a per-day count.
+
+    The cells are filled from ``YearOccupancy`` arrays on every paint; there are
+    at most 372 of them, so redrawing costs the same whatever the data size.
+    """
+    day_activated = pyqtSignal(int)
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.occupancy: Optional[YearOccupancy] = None
+        self.measure = ACTIVE
+        self.status: Optional[int] = None
+        # 0 for the whole year, else the month shown
+        self.month = 0
+        self.setMouseTracking(True)
+        self.setMinimumSize(600, 300)
+
+    def cell_rects(self) -> Tuple[np.ndarray, list]:
+        """Day indices and their cell rectangles for the current layout."""
+        occupancy = self.occupancy
+        if self.month == 0:
+            width = (self.width() - LABEL_WIDTH) / 31
+            height = (self.height() - HEADER_HEIGHT) / 12
+            return np.arange(occupancy.days), [
+                QRectF(LABEL_WIDTH + day * width, HEADER_HEIGHT + month * height, width, height)
+                for month, day in zip(occupancy.months, occupancy.month_days)
+            ]
+        first = occupancy.day_index(self.month, 1)
+        days = np.arange(first, first + calendar.monthrange(occupancy.year, self.month)[1])
+        offset = date(occupancy.year, self.month, 1).weekday()
+        width, height = self.width() / 7, (self.height() - HEADER_HEIGHT) / 6
+        return days, [
+            QRectF((offset + index) % 7 * width, HEADER_HEIGHT + (offset + index) // 7 * height, width, height)
+            for index in range(len(days))
+        ]
+
+    def day_at(self, x: float, y: float) -> Optional[int]:
+        if self.occupancy is None:
+            return None
+        days, rects = self.cell_rects()
+        for day, rect in zip(days, rects):
+            if rect.contains(x, y):
+                return int(day)
+        return None
+
+    @timed()
+    def paintEvent(self, event) -> None:
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(NO_DAY_COLOR))
+        if self.occupancy is None:
+            painter.drawText(self.rect(), Qt.AlignCenter, "Loading…")
+            return
+        values = self.occupancy.values(self.measure, self.status)
+        color = ALL_COLOR if self.status is None else STATUS_COLORS.get(STATUSES[self.status], ALL_COLOR)
+        peak = max(int(values.max()), 1)
+        days, rects = self.cell_rects()
+        painter.setPen(QColor('#cccccc'))
+        for day, rect in zip(days, rects):
+            value = values[day]
+            share = MIN_SHARE + (1 - MIN_SHARE) * value / peak
+            painter.setBrush(blend(color, share) if value > 0 else QColor(EMPTY_COLOR))
+            painter.drawRect(rect)
+        painter.setPen(Qt.black)
+        if self.month == 0:
+            width = (self.width() - LABEL_WIDTH) / 31
+            for day in range(31):
+                painter.drawText(QRectF(LABEL_WIDTH + day * width, 0, width, HEADER_HEIGHT), Qt.AlignCenter, str(day + 1))
+            height = (self.height() - HEADER_HEIGHT) / 12
+            for month in range(12):
+                painter.drawText(QRectF(0, HEADER_HEIGHT + month * height, LABEL_WIDTH, height),
+                                 Qt.AlignCenter, calendar.month_abbr[month + 1])
+            # Counts go in the cells only when the largest one fits
+            if painter.fontMetrics().horizontalAdvance(f"{peak:,}") + 4 <= width:
+                for day, rect in zip(days, rects):
+                    if values[day]:
+                        painter.drawText(rect, Qt.AlignCenter, f"{values[day]:,}")
+        else:
+            width = self.width() / 7
+            for weekday in range(7):
+                painter.drawText(QRectF(weekday * width, 0, width, HEADER_HEIGHT),
+                                 Qt.AlignCenter, calendar.day_abbr[weekday])
+            active, due = self.occupancy.values(ACTIVE, self.status), self.occupancy.values(DUE, self.status)
+            for index, (day, rect) in enumerate(zip(days, rects)):
+                painter.drawText(rect.adjusted(4, 2, -4, -2), Qt.AlignLeft | Qt.AlignTop, str(index + 1))
+                painter.drawText(rect.adjusted(4, 2, -4, -2), Qt.AlignRight | Qt.AlignBottom,
+                                 f"{active[day]:,} active\n{due[day]:,} due")
+
+    def event(self, event) -> bool:
+        if event.type() == QEvent.ToolTip:
+            day = self.day_at(event.pos().x(), event.pos().y())
+            if day is None:
+                QToolTip.hideText()
+            else:
+                QToolTip.showText(event.globalPos(), self.describe_day(day), self)
+            return True
+        return super().event(event)
+
+    def describe_day(self, day: int) -> str:
+        occupancy = self.occupancy
+        when = date.fromordinal(date(occupancy.year, 1, 1).toordinal() + day)
+        lines = [f"<b>{when:%A %d %B %Y}</b>"]
+        for measure, counts in ((ACTIVE, occupancy.active), (DUE, occupancy.due)):
+            split = ' · '.join(f"{status} {counts[code, day]:,}" for code, status in enumerate(STATUSES))
+            lines.append(f"{MEASURES[measure]}: {counts[:, day].sum():,} ({split})")
+        return '<br>'.join(lines)
+
+    def mouseDoubleClickEvent(self, event) -> None:
+        day = self.day_at(event.x(), event.y())
+        if day is not None:
+            self.day_activated.emit(day)
+
+
+class CalendarWidget(QWidget):
+    """Year/month heatmap of activities per day, with controls to flip years and pick what to show.
+
+    The widget only draws; ``year_changed`` asks the owner for a year's
+    ``YearOccupancy``, which it hands back through ``set_occupancy``. Double-
+    clicking a day in the year view opens its month.
+    """
+    year_changed = pyqtSignal(int)
+
+    def __init__(self, year: int, parent=None) -> None:
+        super().__init__(parent)
+        self.year = year
+        self.heatmap = CalendarHeatmap()
+        self.heatmap.day_activated.connect(self.open_month)
+
+        previous_button = QPushButton("◀")
+        previous_button.clicked.connect(lambda: self.set_year(self.year - 1))
+        next_button = QPushButton("▶")
+        next_button.clicked.connect(lambda: self.set_year(self.year + 1))
+        self.year_label = QLabel()
+        self.year_label.setAlignment(Qt.AlignCenter)
+        self.year_label.setMinimumWidth(60)
+        self.view_combobox = QComboBox()
+        self.view_combobox.addItems(["Whole year"] + list(calendar.month_name[1:]))
+        self.view_combobox.currentIndexChanged.connect(self.set_month)
+        self.measure_combobox = QComboBox()
+        self.measure_combobox.addItems(MEASURES.values())
+        self.measure_combobox.currentIndexChanged.connect(self.redraw)
+        self.status_combobox = QComboBox()
+        self.status_combobox.addItems(["All statuses"] + STATUSES)
+        self.status_combobox.currentIndexChanged.connect(self.redraw)
+
+        controls = QHBoxLayout()
+        for widget in (previous_button, self.year_label, next_button, self.view_combobox,
+                       self.measure_combobox, self.status_combobox):
+            controls.addWidget(widget)
+        controls.addStretch(1)
+        self.status_label = QLabel()
+        box = QVBoxLayout(self)
+        box.addLayout(controls)
+        box.addWidget(self.heatmap, 1)
+        box.addWidget(self.status_label)
+        self.set_year(year, notify=False)
+
+    def keyPressEvent(self, event) -> None:
+        if event.key() in (Qt.Key_Left, Qt.Key_PageUp):
+            self.set_year(self.year - 1)
+        elif event.key() in (Qt.Key_Right, Qt.Key_PageDown):
+            self.set_year(self.year + 1)
+        else:
+            super().keyPressEvent(event)
+
+    def set_year(self, year: int, notify: bool = True) -> None:
+        if not date.min.year < year < date.max.year:
+            return
+        self.year = year
+        self.year_label.setText(str(year))
+        self.setWindowTitle(f"Calendar {year}")
+        if self.heatmap.occupancy is not None and self.heatmap.occupancy.year != year:
+            self.heatmap.occupancy = None
+        if notify:
+            self.year_changed.emit(year)
+        self.redraw()
+
+    def set_occupancy(self, occupancy: YearOccupancy) -> None:
+        """Show freshly loaded counts; results for a year no longer on screen are ignored."""
+        if occupancy.year == self.year:
+            self.heatmap.occupancy = occupancy
+            self.redraw()
+
+    def set_month(self, month: int) -> None:
+        self.heatmap.month = month
+        self.redraw()
+
+    def open_month(self, day: int) -> None:
+        if self.heatmap.month == 0:
+            self.view_combobox.setCurrentIndex(int(self.heatmap.occupancy.months[day]) + 1)
+
+    def redraw(self) -> None:
+        heatmap = self.heatmap
+        heatmap.measure = list(MEASURES)[self.measure_combobox.currentIndex()]
+        status = self.status_combobox.currentIndex()
+        heatmap.status = status - 1 if status else None
+        occupancy = heatmap.occupancy
+        if occupancy is not None:
+            values = occupancy.values(heatmap.measure, heatmap.status)
+            busiest = int(values.argmax())
+            when = date.fromordinal(date(occupancy.year, 1, 1).toordinal() + busiest)
+            self.status_label.setText(
+                f"{MEASURES[heatmap.measure]}: busiest day {when:%a %d %b} with {values[busiest]:,}; "
+                f"shading is relative to it." + (" Double-click a day to open its month." if heatmap.month == 0 else "")
+            )
+        heatmap.update()
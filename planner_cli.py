@@ -0,0 +1,364 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from typing import Iterator, List, Optional
+
+from planner_cache import DISK_BYTES, RenderCache, default_cache_dir
+from planner_defaults import DEFAULT_CAPACITY, DEFAULT_HOST, DEFAULT_PORT
+from planner_metrics import METRICS
+from planner_model import (
+    COLUMNS, PRIORITIES, SORT_KEYS, STATUSES, ActivityModel, Database, archive_path, from_epoch_day,
+)
+
+DEFAULT_DB = 'activities.db'
+# Rows fetched per keyset page by 'query'
+QUERY_PAGE = 1000
+
+
+def add_filter_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group('filters')
+    group.add_argument('--from', dest='start_date', metavar='DATE', help="deadline on or after this ISO date")
+    group.add_argument('--to', dest='end_date', metavar='DATE', help="deadline on or before this ISO date")
+    group.add_argument('--status', action='append', choices=STATUSES, help="repeat to match several")
+    group.add_argument('--priority', action='append', choices=PRIORITIES, help="repeat to match several")
+    group.add_argument('--category', action='append', help="repeat to match several")
+    group.add_argument('--search', help="free text matched against activity, notes and category")
+
+
+def filters_from(args: argparse.Namespace) -> dict:
+    keys = ('start_date', 'end_date', 'status', 'priority', 'category', 'search')
+    return {key: getattr(args, key) for key in keys if getattr(args, key)}
+
+
+def read_activities(path: str) -> Iterator[dict]:
+    """Yield activity dicts from a CSV file with ``COLUMNS`` headers or a JSON-lines file; '-' reads stdin."""
+    stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+    try:
+        first = stream.readline()
+        if first.lstrip().startswith('{'):
+            for line in _chain(first, stream):
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(_chain(first, stream)):
+                row.pop('id', None)
+                yield {key: value or None for key, value in row.items()}
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _chain(first: str, stream) -> Iterator[str]:
+    yield first
+    yield from stream
+
+
+def cmd_add(model: ActivityModel, args: argparse.Namespace) -> None:
+    row = model.add_activity({**{column: getattr(args, column, None) for column in COLUMNS}, 'recurrence': args.repeat})
+    print(row[0])
+
+
+def cmd_bulk_add(model: ActivityModel, args: argparse.Namespace) -> None:
+    added = model.add_activities(read_activities(args.file), args.batch_size)
+    print(f"Added {added:,} activities.", file=sys.stderr)
+
+
+def cmd_delete(model: ActivityModel, args: argparse.Namespace) -> None:
+    filters = filters_from(args)
+    if not filters and not args.all:
+        sys.exit("Refusing to delete every activity without --all.")
+    if args.dry_run:
+        print(f"Would delete {model.count_activities(filters):,} activities.", file=sys.stderr)
+        return
+    print(f"Deleted {model.delete_activities(filters):,} activities.", file=sys.stderr)
+
+
+def cmd_query(model: ActivityModel, args: argparse.Namespace) -> None:
+    filters = filters_from(args)
+    if args.count:
+        print(model.count_activities(filters))
+        return
+    columns = args.columns.split(',') if args.columns else COLUMNS
+    unknown = set(columns) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown column(s) {sorted(unknown)}, expected some of {COLUMNS}")
+    Database.sort_keys(args.sort)
+    writer = csv.writer(sys.stdout, delimiter='\t' if args.format == 'tsv' else ',')
+    if args.format != 'json':
+        writer.writerow(columns)
+    remaining, after = args.limit, None
+    while remaining is None or remaining > 0:
+        page = QUERY_PAGE if remaining is None else min(remaining, QUERY_PAGE)
+        rows, keys = model.query_activities(columns, filters, args.sort, after, page)
+        if args.format == 'json':
+            sys.stdout.writelines(json.dumps(dict(zip(columns, row))) + '\n' for row in rows)
+        else:
+            writer.writerows(rows)
+        if len(rows) < page:
+            break
+        after = keys[-1]
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+def cmd_export(model: ActivityModel, args: argparse.Namespace) -> None:
+    from planner_export import export_activities
+
+    def report(done: int, total: int) -> None:
+        print(f"\r{done:,}/{total:,} rows", end='', file=sys.stderr, flush=True)
+
+    written = export_activities(model, args.path, filters_from(args), report if sys.stderr.isatty() else None)
+    print(f"\rExported {written:,} activities to {args.path}.", file=sys.stderr)
+
+
+def cmd_gantt(model: ActivityModel, args: argparse.Namespace) -> None:
+    fmt = os.path.splitext(args.path)[1].lstrip('.').lower() or 'png'
+    cache = None if args.no_cache else RenderCache(args.cache_dir, disk_bytes=args.cache_size * 1024 * 1024)
+    # Unchanged data, range and options give the same chart, found without querying anything
+    source = args.server or os.path.abspath(args.db)
+    key = RenderCache.key('gantt', source, model.data_version(), args.start, args.end, fmt, args.dpi)
+    data = cache.get(key) if cache else None
+    if data is None:
+        from planner_gantt import prepare_segments, render_gantt
+
+        segments, labels = prepare_segments(model.load_timelines(args.start, args.end), args.start, args.end)
+        if segments.empty:
+            sys.exit("No activities found for the selected date range.")
+        data = render_gantt(segments, labels, args.start, args.end, fmt, args.dpi, cache)
+        if cache:
+            cache.put(key, data)
+        logging.info("Rendered %d activities", len(labels))
+    else:
+        logging.info("Chart unchanged since it was last rendered; using the cached image")
+    with open(args.path, 'wb') as f:
+        f.write(data)
+    print(f"Wrote {args.path}.", file=sys.stderr)
+
+
+def cmd_conflicts(model: ActivityModel, args: argparse.Namespace) -> None:
+    from planner_conflicts import TimelineConflicts
+
+    conflicts = TimelineConflicts.load(model, args.start, args.end, args.capacity)
+    print(conflicts.summary())
+    runs = conflicts.overloaded()
+    if runs:
+        print("\nOverloaded periods:")
+        for first, last, peak in runs[:args.list]:
+            print(f"  {from_epoch_day(first)} – {from_epoch_day(last)}  up to {peak:,} open activities")
+    pairs, risky = conflicts.pairs[:args.list].tolist(), conflicts.deadlines_at_risk()[:args.list]
+    names = {row[0]: row[2] for row in model.fetch_activities_by_ids(
+        sorted({activity_id for pair in pairs for activity_id in pair[:2]} | {row[0] for row in risky})
+    )}
+    if pairs:
+        print("\nOverlapping High-priority activities:")
+        for first, second, start, end in pairs:
+            print(f"  {from_epoch_day(start)} – {from_epoch_day(end)}  #{first} {names.get(first)!r} / "
+                  f"#{second} {names.get(second)!r}")
+    if risky:
+        print("\nDeadlines in saturated weeks:")
+        for activity_id, day in risky:
+            print(f"  {from_epoch_day(day)}  #{activity_id} {names.get(activity_id)!r}")
+
+
+def mebibytes(size: int) -> str:
+    return f"{size / (1024 * 1024):,.1f} MiB"
+
+
+def require_local(args: argparse.Namespace) -> None:
+    if args.server:
+        raise ValueError(f"{args.command} works on the --db files themselves; run it where the server runs")
+
+
+def cmd_archive(model: ActivityModel, args: argparse.Namespace) -> None:
+    require_local(args)
+    if args.dry_run:
+        counts = model.count_archivable(args.before)
+        for year, count in counts.items():
+            print(f"{year}: {count:,} activities")
+        print(f"Would archive {sum(counts.values()):,} activities.", file=sys.stderr)
+        return
+    moved = model.archive(args.before)
+    for year, count in moved.items():
+        print(f"{year}: {count:,} activities -> {archive_path(args.db, year)}")
+    print(f"Archived {sum(moved.values()):,} activities.", file=sys.stderr)
+    if moved and not args.no_compact:
+        cmd_compact(model, args)
+
+
+def cmd_unarchive(model: ActivityModel, args: argparse.Namespace) -> None:
+    require_local(args)
+    print(f"Restored {model.unarchive(args.year):,} activities from {args.year}.", file=sys.stderr)
+
+
+def cmd_archived(model: ActivityModel, args: argparse.Namespace) -> None:
+    if args.year is None:
+        for year in model.archive_years():
+            print(year)
+        return
+    rows = model.archived_activities(args.year, args.search)
+    if args.format == 'json':
+        sys.stdout.writelines(json.dumps(dict(zip(COLUMNS, row))) + '\n' for row in rows)
+        return
+    writer = csv.writer(sys.stdout, delimiter='\t' if args.format == 'tsv' else ',')
+    writer.writerow(COLUMNS)
+    writer.writerows(rows)
+
+
+def cmd_compact(model: ActivityModel, args: argparse.Namespace) -> None:
+    require_local(args)
+    before, after = model.compact()
+    print(f"Compacted {args.db}: {mebibytes(before)} -> {mebibytes(after)}.", file=sys.stderr)
+
+
+def cmd_backup(model: ActivityModel, args: argparse.Namespace) -> None:
+    require_local(args)
+    for path in model.backup(args.path):
+        print(f"Wrote {path}.", file=sys.stderr)
+
+
+def cmd_serve(model: ActivityModel, args: argparse.Namespace) -> None:
+    import asyncio
+
+    from planner_server import PlannerServer
+
+    if args.server:
+        raise ValueError("serve shares the --db database; it cannot itself use --server")
+    print(f"Serving {args.db} on http://{args.host}:{args.port} (Ctrl+C stops).", file=sys.stderr)
+    try:
+        asyncio.run(PlannerServer(model, args.host, args.port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='planner', description="Work with the planner database without the GUI.")
+    parser.add_argument('--db', default=DEFAULT_DB, help=f"SQLite database (default: {DEFAULT_DB})")
+    parser.add_argument('--server', metavar='HOST:PORT', help="work through a planner server instead of opening --db")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log progress to stderr")
+    parser.add_argument('--metrics', metavar='FILE', help="write operation and SQL timings of the run to FILE as JSON")
+    parser.add_argument('--profile', metavar='FILE', help="with --metrics, also save a cProfile of the run to FILE")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help="add one activity and print its id")
+    add.add_argument('activity')
+    add.add_argument('--category')
+    add.add_argument('--status', choices=STATUSES, default=STATUSES[0])
+    add.add_argument('--notification', metavar='DATETIME', help="ISO date and time of the reminder")
+    add.add_argument('--timeline', help="e.g. '2024-04-01 - 2024-04-15'")
+    add.add_argument('--deadline', metavar='DATE')
+    add.add_argument('--priority', choices=PRIORITIES, default=PRIORITIES[1])
+    add.add_argument('--notes')
+    add.add_argument('--repeat', metavar='RULE',
+                     help="repeat the activity, e.g. 'weekly' or 'FREQ=MONTHLY;INTERVAL=3;UNTIL=2025-12-31;EXDATE=2025-08-01'")
+    add.set_defaults(handler=cmd_add)
+
+    bulk_add = commands.add_parser('bulk-add', help="add activities from a CSV or JSON-lines file")
+    bulk_add.add_argument('file', help="CSV with the export column names and an optional recurrence column, "
+                                       "or JSON lines; '-' for stdin")
+    bulk_add.add_argument('--batch-size', type=int, default=Database.WRITE_BATCH, help="rows per transaction")
+    bulk_add.set_defaults(handler=cmd_bulk_add)
+
+    delete = commands.add_parser('delete', help="delete the activities matching the filters")
+    add_filter_arguments(delete)
+    delete.add_argument('--all', action='store_true', help="allow deleting without any filter")
+    delete.add_argument('--dry-run', action='store_true', help="only report how many would be deleted")
+    delete.set_defaults(handler=cmd_delete)
+
+    query = commands.add_parser('query', help="print the activities matching the filters")
+    add_filter_arguments(query)
+    query.add_argument('--format', choices=('csv', 'tsv', 'json'), default='csv')
+    query.add_argument('--limit', type=int)
+    query.add_argument('--sort', action='append', metavar='COLUMN',
+                       help=f"sort column, e.g. --sort=-deadline for descending; repeat for ties ({', '.join(SORT_KEYS)})")
+    query.add_argument('--columns', metavar='A,B,...', help=f"columns to print (default: all of {','.join(COLUMNS)})")
+    query.add_argument('--count', action='store_true', help="print only the number of matches")
+    query.set_defaults(handler=cmd_query)
+
+    export = commands.add_parser('export', help="export the matching activities (.csv, .xlsx, .parquet, .arrow)")
+    export.add_argument('path')
+    add_filter_arguments(export)
+    export.set_defaults(handler=cmd_export)
+
+    gantt = commands.add_parser('gantt', help="render a Gantt chart to an image file")
+    gantt.add_argument('path', help="output image; the format follows the extension (.png, .svg, .pdf)")
+    gantt.add_argument('--start', required=True, metavar='DATE')
+    gantt.add_argument('--end', required=True, metavar='DATE')
+    gantt.add_argument('--dpi', type=int, default=100)
+    gantt.add_argument('--cache-dir', default=default_cache_dir(), help="where rendered charts are kept (default: %(default)s)")
+    gantt.add_argument('--cache-size', type=int, default=DISK_BYTES // (1024 * 1024), metavar='MIB',
+                       help="disk space the cache may use before evicting the least recently used charts")
+    gantt.add_argument('--no-cache', action='store_true', help="render from scratch and leave the cache alone")
+    gantt.set_defaults(handler=cmd_gantt)
+
+    conflicts = commands.add_parser('conflicts', help="report overloaded days and overlapping High-priority activities")
+    conflicts.add_argument('--start', required=True, metavar='DATE')
+    conflicts.add_argument('--end', required=True, metavar='DATE')
+    conflicts.add_argument('--capacity', type=int, default=DEFAULT_CAPACITY,
+                           help="open activities a day can hold before it is overloaded (default: %(default)s)")
+    conflicts.add_argument('--list', type=int, default=10, metavar='N', help="examples to print of each kind")
+    conflicts.set_defaults(handler=cmd_conflicts)
+
+    archive = commands.add_parser('archive', help="move completed activities of past years into per-year archive files")
+    archive.add_argument('--before', type=int, required=True, metavar='YEAR',
+                         help="archive what is dated before 1 January of this year (at most the current year)")
+    archive.add_argument('--dry-run', action='store_true', help="only report how many would be archived")
+    archive.add_argument('--no-compact', action='store_true', help="skip the VACUUM/ANALYZE pass afterwards")
+    archive.set_defaults(handler=cmd_archive)
+
+    unarchive = commands.add_parser('unarchive', help="move a year's archived activities back into the database")
+    unarchive.add_argument('year', type=int)
+    unarchive.set_defaults(handler=cmd_unarchive)
+
+    archived = commands.add_parser('archived', help="list the archived years, or print a year's archived activities")
+    archived.add_argument('year', type=int, nargs='?')
+    archived.add_argument('--search', help="text to look for in the activity, notes and category")
+    archived.add_argument('--format', choices=('csv', 'tsv', 'json'), default='csv')
+    archived.set_defaults(handler=cmd_archived)
+
+    compact = commands.add_parser('compact', help="reclaim free space and refresh query statistics (VACUUM/ANALYZE)")
+    compact.set_defaults(handler=cmd_compact)
+
+    backup = commands.add_parser('backup', help="copy the database and its archives while it is in use")
+    backup.add_argument('path', help="backup file; archives are written next to it")
+    backup.set_defaults(handler=cmd_backup)
+
+    serve = commands.add_parser('serve', help="share the database with several planner apps over HTTP/JSON")
+    serve.add_argument('--host', default=DEFAULT_HOST, help="address to listen on (default: %(default)s)")
+    serve.add_argument('--port', type=int, default=DEFAULT_PORT, help="(default: %(default)s)")
+    serve.set_defaults(handler=cmd_serve)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format='%(levelname)s: %(message)s')
+    if args.metrics:
+        METRICS.enable()
+        if args.profile:
+            METRICS.start_capture(profile=True)
+    db = None
+    try:
+        if args.server:
+            from planner_client import PlannerClient, RemoteModel
+
+            model = RemoteModel(PlannerClient(args.server))
+        else:
+            db = Database(args.db)
+            db.create_table()
+            model = ActivityModel(db)
+        args.handler(model, args)
+    except ValueError as e:
+        sys.exit(f"error: {e}")
+    finally:
+        if db is not None:
+            db.close()
+        if args.metrics:
+            METRICS.stop_capture(profile_path=args.profile)
+            METRICS.dump(args.metrics)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+import http.client
+import json
+import threading
+import uuid
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from planner_server import CLIENT_HEADER, REQUEST_HEADER, decode_rule, to_json
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from planner_recurrence import Rule
+
+
+class ServerError(Exception):
+    """The planner server failed a call for a reason other than invalid input."""
+
+
+class PlannerClient:
+    """Calls a ``planner_server`` over HTTP/JSON; safe to share between threads.
+
+    Each thread keeps one keep-alive connection of its own. Calls that the
+    server rejects as invalid raise ValueError, as the local model would;
+    other failures raise ServerError. ``client_id`` tags this client's writes
+    in the change feed so it can skip its own changes.
+
+    A request that fails on a dropped connection is sent once more on a new one.
+    Every request carries an id of its own, which the server uses to answer a
+    repeated write with the first outcome, so a write is never applied twice.
+    """
+    TIMEOUT = 60
+
+    def __init__(self, url: str) -> None:
+        parts = urlsplit(url if '//' in url else f'http://{url}')
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.client_id = uuid.uuid4().hex
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.TIMEOUT)
+        return conn
+
+    def _request(self, method: str, path: str, body: Optional[bytes] = None) -> Tuple[int, dict]:
+        headers = {CLIENT_HEADER: self.client_id, REQUEST_HEADER: uuid.uuid4().hex, 'Content-Type': 'application/json'}
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body, headers)
+                response = conn.getresponse()
+                return response.status, json.loads(response.read())
+            except (ConnectionError, http.client.BadStatusLine):
+                # Usually the server dropped an idle keep-alive connection; reconnect once.
+                # A write that did reach the server is answered from its replies, not applied again
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+
+    def call(self, name: str, *args, **kwargs):
+        status, reply = self._request('POST', f'/call/{name}', to_json({'args': args, 'kwargs': kwargs}))
+        if status == 400:
+            raise ValueError(reply['error'])
+        if status != 200:
+            raise ServerError(reply.get('error', f"HTTP {status}"))
+        return reply['result']
+
+    def status(self) -> dict:
+        return self._request('GET', '/status')[1]
+
+    def changes(self, since: Optional[int] = None) -> Iterator[dict]:
+        """Follow the change feed from after ``since``, yielding events until the connection drops."""
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=None)
+        try:
+            conn.request('GET', '/changes' + (f'?since={since}' if since is not None else ''))
+            response = conn.getresponse()
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            conn.close()
+
+
+def _frame(value: dict) -> "pd.DataFrame":
+    import pandas as pd
+
+    return pd.DataFrame(value['data'], columns=value['columns'])
+
+
+def _recurrences(value: dict) -> dict:
+    return {int(activity_id): (decode_rule(rule), anchor) for activity_id, (rule, anchor) in value.items()}
+
+
+def _rows(rows: list) -> List[tuple]:
+    return [tuple(row) for row in rows]
+
+
+class RemoteModel:
+    """``ActivityModel`` stand-in that runs every operation on a planner server.
+
+    Results come back in the same shapes as from the local model, so the GUI,
+    the CLI and the undo commands work unchanged; ``changes`` additionally
+    follows the server's change feed. Archives can be read, but archiving,
+    compaction and backups work on the database files and are run where they are.
+    """
+
+    def __init__(self, client: PlannerClient) -> None:
+        self.client = client
+        self.client_id = client.client_id
+
+    def changes(self, since: Optional[int] = None) -> Iterator[dict]:
+        return self.client.changes(since)
+
+    def load_data(self, columns: Optional[List[str]] = None, filters: Optional[dict] = None,
+                  order_by: Optional[List[str]] = None) -> "pd.DataFrame":
+        return _frame(self.client.call('load_data', columns, filters, order_by))
+
+    def load_timelines(self, start_date: str, end_date: str) -> "pd.DataFrame":
+        return _frame(self.client.call('load_timelines', start_date, end_date))
+
+    def data_version(self) -> int:
+        return self.client.call('data_version')
+
+    def summary(self, today: Optional[int] = None, days: int = 7) -> dict:
+        summary = self.client.call('summary', today, days)
+        for key in ('completion_by_month', 'upcoming'):
+            summary[key] = _rows(summary[key])
+        return summary
+
+    def day_counts(self, start_day: int, end_day: int) -> dict:
+        return self.client.call('day_counts', start_day, end_day)
+
+    def conflict_inputs(self, start_day: int, end_day: int, activity_ids: Optional[Iterable[int]] = None) -> dict:
+        return self.client.call('conflict_inputs', start_day, end_day, None if activity_ids is None else list(activity_ids))
+
+    def active_between(self, start_date: str, end_date: str) -> List[int]:
+        return self.client.call('active_between', start_date, end_date)
+
+    def recurrences(self, activity_ids: Optional[Iterable[int]] = None) -> dict:
+        return _recurrences(self.client.call('recurrences', None if activity_ids is None else list(activity_ids)))
+
+    def set_recurrence(self, activity_id: int, rule: Optional["Rule"]) -> None:
+        self.client.call('set_recurrence', activity_id, rule)
+
+    def upcoming_notifications(self, after: Tuple[int, int], limit: int) -> List[Tuple[int, int, str]]:
+        return _rows(self.client.call('upcoming_notifications', after, limit))
+
+    def count_activities(self, filters: Optional[dict] = None) -> int:
+        return self.client.call('count_activities', filters)
+
+    def iter_activities(self, filters: Optional[dict] = None, chunk_size: int = 10000) -> Iterator[List[tuple]]:
+        # Keyset pages by id, the order the local model streams in
+        after = None
+        while True:
+            rows, keys = self.query_activities(filters=filters, after=after, limit=chunk_size)
+            if not rows:
+                return
+            yield rows
+            after = keys[-1]
+
+    def query_activities(self, columns: Optional[List[str]] = None, filters: Optional[dict] = None,
+                         order_by: Optional[List[str]] = None, after: Optional[tuple] = None,
+                         limit: Optional[int] = None) -> Tuple[List[tuple], List[tuple]]:
+        rows, keys = self.client.call('query_activities', columns, filters, order_by, after, limit)
+        return _rows(rows), _rows(keys)
+
+    def sort_key(self, activity_id: int, order_by: Optional[List[str]]) -> Optional[tuple]:
+        key = self.client.call('sort_key', activity_id, order_by)
+        return None if key is None else tuple(key)
+
+    def fetch_activities(self, after_id: Optional[int], limit: int) -> List[tuple]:
+        return _rows(self.client.call('fetch_activities', after_id, limit))
+
+    def fetch_activities_by_ids(self, activity_ids: List[int]) -> List[tuple]:
+        return _rows(self.client.call('fetch_activities_by_ids', list(activity_ids)))
+
+    def search_ids(self, text: str) -> Optional[List[int]]:
+        return self.client.call('search_ids', text)
+
+    def matches_search(self, activity_id: int, text: str) -> bool:
+        return self.client.call('matches_search', activity_id, text)
+
+    def add_activity(self, activity: dict) -> tuple:
+        return tuple(self.client.call('add_activity', activity))
+
+    def add_activities(self, activities: Iterable[dict], batch_size: Optional[int] = None) -> int:
+        return self.client.call('add_activities', list(activities), batch_size)
+
+    def add_encoded_activities(self, rows: List[tuple], upsert: bool = False,
+                               rules: Optional[List[Optional["Rule"]]] = None) -> int:
+        return self.client.call('add_encoded_activities', rows, upsert, rules)
+
+    def delete_activity(self, activity_id: int) -> Optional[int]:
+        return self.client.call('delete_activity', activity_id)
+
+    def delete_activities_by_ids(self, activity_ids: Iterable[int]) -> Tuple[List[tuple], dict]:
+        rows, rules = self.client.call('delete_activities_by_ids', list(activity_ids))
+        return _rows(rows), _recurrences(rules)
+
+    def update_activities(self, changes: dict, encoded: bool = False) -> dict:
+        before = self.client.call('update_activities', changes, encoded)
+        return {int(activity_id): fields for activity_id, fields in before.items()}
+
+    def shift_deadlines(self, activity_ids: Iterable[int], days: int) -> int:
+        return self.client.call('shift_deadlines', list(activity_ids), days)
+
+    def delete_activities(self, filters: Optional[dict] = None) -> int:
+        return self.client.call('delete_activities', filters)
+
+    def archive_years(self) -> List[int]:
+        return self.client.call('archive_years')
+
+    def archived_activities(self, year: int, search: Optional[str] = None) -> List[tuple]:
+        return _rows(self.client.call('archived_activities', year, search))
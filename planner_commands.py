@@ -0,0 +1,95 @@
+from typing import Callable, Dict, Iterable, List
+
+from PyQt5.QtWidgets import QUndoCommand
+
+from planner_model import ActivityModel
+
+# Kinds of change passed to a command's ``changed(kind, ids)`` callback
+DELETED, RESTORED, UPDATED = 'deleted', 'restored', 'updated'
+
+
+class ActivityCommand(QUndoCommand):
+    """Undoable bulk change to the activities table, each direction one database transaction.
+
+    The change is made when the command is created, so validation errors reach
+    the caller instead of being raised inside ``QUndoStack.push``; the redo run by
+    ``push`` only reports it. ``changed(kind, ids)`` is called after every
+    direction so the view can refresh the affected rows.
+
+    Subclasses define ``apply()`` and ``revert()``, which make and undo the change,
+    and ``report(redo)``, which calls ``changed`` for the direction just taken.
+    """
+
+    def __init__(self, model: ActivityModel, changed: Callable[[str, List[int]], None]) -> None:
+        super().__init__()
+        self.model = model
+        self.changed = changed
+        self._pushed = False
+
+    def redo(self) -> None:
+        if self._pushed:
+            self.apply()
+        self._pushed = True
+        self.report(redo=True)
+
+    def undo(self) -> None:
+        self.revert()
+        self.report(redo=False)
+
+
+class DeleteActivities(ActivityCommand):
+    """Delete activities; undo puts the rows back with their ids and recurrences."""
+
+    def __init__(self, model: ActivityModel, activity_ids: Iterable[int], changed) -> None:
+        super().__init__(model, changed)
+        self.activity_ids = list(activity_ids)
+        self.apply()
+        self.setText(f"delete {len(self.rows)} activities")
+
+    def apply(self) -> None:
+        self.rows, self.rules = self.model.delete_activities_by_ids(self.activity_ids)
+
+    def revert(self) -> None:
+        self.model.add_encoded_activities(self.rows, rules=[self.rules.get(row[0], (None,))[0] for row in self.rows])
+
+    def report(self, redo: bool) -> None:
+        self.changed(DELETED if redo else RESTORED, [row[0] for row in self.rows])
+
+
+class UpdateActivities(ActivityCommand):
+    """Change columns of activities, given as ``{id: {column: display string}}``."""
+
+    def __init__(self, model: ActivityModel, changes: Dict[int, dict], changed, text: str = 'edit activities') -> None:
+        super().__init__(model, changed)
+        self.changes, self.encoded = changes, False
+        self.apply()
+        self.setText(text)
+
+    def apply(self) -> None:
+        self.before = self.model.update_activities(self.changes, self.encoded)
+
+    def revert(self) -> None:
+        # Putting the old values back returns the typed new ones, which a redo then writes as they are
+        self.changes, self.encoded = self.model.update_activities(self.before, encoded=True), True
+
+    def report(self, redo: bool) -> None:
+        self.changed(UPDATED, sorted(self.before))
+
+
+class ShiftDeadlines(ActivityCommand):
+    """Move deadlines by a number of days; undo moves them back."""
+
+    def __init__(self, model: ActivityModel, activity_ids: Iterable[int], days: int, changed) -> None:
+        super().__init__(model, changed)
+        self.activity_ids, self.days = list(activity_ids), days
+        self.apply()
+        self.setText(f"shift deadlines by {days} days")
+
+    def apply(self) -> None:
+        self.model.shift_deadlines(self.activity_ids, self.days)
+
+    def revert(self) -> None:
+        self.model.shift_deadlines(self.activity_ids, -self.days)
+
+    def report(self, redo: bool) -> None:
+        self.changed(UPDATED, self.activity_ids)
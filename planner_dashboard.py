@@ -0,0 +1,59 @@
+from datetime import date
+
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtWidgets import QGridLayout, QGroupBox, QLabel
+
+from planner_model import from_epoch_day
+
+# How many categories and past months the panel lists
+TOP_CATEGORIES = 5
+RECENT_MONTHS = 6
+
+
+class DashboardPanel(QGroupBox):
+    """Compact read-out of ``Database.summary()``; call ``update_summary`` with a fresh result.
+
+    ``update_conflicts`` fills the last row from a ``planner_conflicts.TimelineConflicts``;
+    until then the row offers a link that emits ``conflicts_requested``.
+    """
+
+    conflicts_requested = pyqtSignal()
+
+    def __init__(self, parent=None) -> None:
+        super().__init__("Dashboard", parent)
+        layout = QGridLayout(self)
+        self.labels = {}
+        rows = ['Status', 'Priority', 'Categories', 'Completion', 'Next 7 days', 'Conflicts']
+        for row, name in enumerate(rows):
+            layout.addWidget(QLabel(f"<b>{name}:</b>"), row, 0)
+            self.labels[name] = QLabel("…")
+            layout.addWidget(self.labels[name], row, 1)
+        layout.setColumnStretch(1, 1)
+        # The analysis reads every open timeline in the range, so it only runs when asked for
+        self.labels['Conflicts'].setText("not checked — <a href='check'>check now</a>")
+        self.labels['Conflicts'].linkActivated.connect(lambda _: self.conflicts_requested.emit())
+
+    def update_summary(self, summary: dict) -> None:
+        def counts(values: dict) -> str:
+            return ' · '.join(f"{name or 'None'} {count:,}" for name, count in values.items())
+
+        self.labels['Status'].setText(
+            f"{summary['total']:,} activities — {counts(summary['by_status'])} — "
+            f"<span style='color:#f44336'>{summary['overdue']:,} overdue</span>"
+        )
+        self.labels['Priority'].setText(counts(summary['by_priority']))
+        self.labels['Categories'].setText(counts(dict(list(summary['by_category'].items())[:TOP_CATEGORIES])))
+
+        current = date.today().strftime('%Y-%m')
+        months = [row for row in summary['completion_by_month'] if row[0] <= current][-RECENT_MONTHS:]
+        self.labels['Completion'].setText(' · '.join(
+            f"{month} {completed / total:.0%}" for month, completed, total in months
+        ) or 'no deadlines yet')
+        self.labels['Next 7 days'].setText(' · '.join(
+            f"{date.fromisoformat(day):%a %d}: {due} due, {active} active" for day, due, active in summary['upcoming']
+        ))
+
+    def update_conflicts(self, conflicts) -> None:
+        clash = conflicts.overloaded() or conflicts.pair_count
+        text = f"{from_epoch_day(conflicts.start_day)} – {from_epoch_day(conflicts.end_day)}: {conflicts.summary()}"
+        self.labels['Conflicts'].setText(f"<span style='color:#f44336'>{text}</span>" if clash else text)
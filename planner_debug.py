@@ -0,0 +1,123 @@
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (
+    QCheckBox, QFileDialog, QHBoxLayout, QLabel, QPlainTextEdit, QPushButton, QTableWidget, QTableWidgetItem,
+    QTabWidget, QVBoxLayout, QWidget
+)
+
+from planner_metrics import METRICS, Metrics
+
+FIELDS = ['count', 'mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms', 'total_ms', 'rows']
+HEADERS = ['Calls', 'Mean ms', 'p50 ms', 'p90 ms', 'p99 ms', 'Max ms', 'Total ms', 'Rows']
+
+
+class MetricsPanel(QWidget):
+    """Debug window over ``planner_metrics.METRICS``: live timings, statements and capture toggles.
+
+    The tables refresh every ``REFRESH_MS`` while the window is visible.
+    """
+    REFRESH_MS = 1000
+
+    def __init__(self, metrics: Metrics = METRICS, parent=None) -> None:
+        super().__init__(parent)
+        self.metrics = metrics
+        self.setWindowTitle("Planner metrics")
+
+        self.record_box = QCheckBox("Record timings")
+        self.record_box.setChecked(metrics.enabled)
+        self.record_box.toggled.connect(metrics.enable)
+        self.profile_box = QCheckBox("Profile GUI thread (cProfile)")
+        self.profile_box.toggled.connect(self.toggle_profile)
+        self.memory_box = QCheckBox("Track memory (tracemalloc)")
+        self.memory_box.toggled.connect(self.toggle_memory)
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        save_button = QPushButton("Save JSON…")
+        save_button.clicked.connect(self.save)
+        controls = QHBoxLayout()
+        for widget in (self.record_box, self.profile_box, self.memory_box):
+            controls.addWidget(widget)
+        controls.addStretch(1)
+        controls.addWidget(reset_button)
+        controls.addWidget(save_button)
+
+        self.operations = self._table('Operation')
+        self.statements = self._table('Statement')
+        self.report = QPlainTextEdit(readOnly=True)
+        self.report.setLineWrapMode(QPlainTextEdit.NoWrap)
+        tabs = QTabWidget()
+        tabs.addTab(self.operations, "Operations")
+        tabs.addTab(self.statements, "SQL statements")
+        tabs.addTab(self.report, "Profile / memory")
+        self.status_label = QLabel()
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(controls)
+        layout.addWidget(tabs, 1)
+        layout.addWidget(self.status_label)
+        self.resize(1000, 600)
+
+        self.refresh_timer = QTimer(self, interval=self.REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    @staticmethod
+    def _table(first: str) -> QTableWidget:
+        table = QTableWidget(0, len(HEADERS) + 1)
+        table.setHorizontalHeaderLabels([first] + HEADERS)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.verticalHeader().hide()
+        return table
+
+    @staticmethod
+    def _fill(table: QTableWidget, rows: list) -> None:
+        table.setRowCount(len(rows))
+        for row, (name, values) in enumerate(rows):
+            table.setItem(row, 0, QTableWidgetItem(name))
+            for column, field in enumerate(FIELDS, 1):
+                table.setItem(row, column, QTableWidgetItem(f"{values[field]:,}"))
+        table.resizeColumnToContents(0)
+
+    def refresh(self) -> None:
+        stats = self.metrics.snapshot()
+        self._fill(self.operations, sorted(stats['operations'].items(), key=lambda item: -item[1]['total_ms']))
+        self._fill(self.statements, [(entry['sql'], entry) for entry in stats['statements']])
+        text = self.metrics.profile_report
+        memory = stats.get('memory')
+        if memory:
+            text += f"\nMemory: {memory['current_bytes']:,} bytes now, {memory['peak_bytes']:,} at peak\n"
+            text += '\n'.join(f"{entry['bytes']:>12,}  {entry['site']}" for entry in memory['top'])
+        if text != self.report.toPlainText():
+            self.report.setPlainText(text)
+        state = "recording" if stats['enabled'] else "paused"
+        self.status_label.setText(f"Timings since {stats['since']}, {state}")
+
+    def toggle_profile(self, on: bool) -> None:
+        if on:
+            self.metrics.start_capture(profile=True)
+        else:
+            self.metrics.stop_capture(profile=True, memory=False)
+        self.refresh()
+
+    def toggle_memory(self, on: bool) -> None:
+        if on:
+            self.metrics.start_capture(profile=False, memory=True)
+        else:
+            self.metrics.stop_capture(profile=False, memory=True)
+        self.refresh()
+
+    def reset(self) -> None:
+        self.metrics.reset()
+        self.refresh()
+
+    def save(self) -> None:
+        path, _ = QFileDialog.getSaveFileName(self, "Save metrics", "planner_metrics.json", "JSON (*.json)")
+        if path:
+            self.metrics.dump(path)
+
+    def showEvent(self, event) -> None:
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event) -> None:
+        self.refresh_timer.stop()
+        super().hideEvent(event)
@@ -0,0 +1,8 @@
+# Defaults shared by the planner modules and the command-line options that override them. Kept free of
+# imports so that building the CLI parser does not load numpy or asyncio for every subcommand.
+
+# Open activities a day can hold before it counts as overloaded
+DEFAULT_CAPACITY = 10
+# Where 'planner serve' listens by default
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
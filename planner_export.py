@@ -0,0 +1,127 @@
+import csv
+import logging
+import os
+from typing import Callable, List, Optional
+
+from planner_metrics import timed
+from planner_model import COLUMNS
+
+CHUNK_SIZE = 10000
+
+# Extension -> file dialog filter, in the order offered by the save dialog
+FORMATS = {
+    '.xlsx': 'Excel Files (*.xlsx)',
+    '.csv': 'CSV Files (*.csv)',
+    '.parquet': 'Parquet Files (*.parquet)',
+    '.arrow': 'Arrow IPC Files (*.arrow)',
+}
+
+
+class CsvWriter:
+    def __init__(self, path: str) -> None:
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(COLUMNS)
+
+    def write(self, rows: List[tuple]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class XlsxWriter:
+    """Writes through openpyxl's write-only mode, which streams rows to disk instead of building cells."""
+
+    def __init__(self, path: str) -> None:
+        from openpyxl import Workbook
+
+        self.path = path
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+        self._sheet.append(COLUMNS)
+
+    def write(self, rows: List[tuple]) -> None:
+        for row in rows:
+            self._sheet.append(row)
+
+    def close(self) -> None:
+        self._workbook.save(self.path)
+
+
+class ArrowWriter:
+    """Writes each chunk as one record batch, with dates and reminders stored as real temporal types."""
+
+    def __init__(self, path: str) -> None:
+        import pyarrow as pa
+
+        self._pa = pa
+        self.schema = pa.schema([
+            ('id', pa.int64()), ('category', pa.string()), ('activity', pa.string()), ('status', pa.string()),
+            ('notification', pa.timestamp('s')), ('timeline', pa.string()), ('deadline', pa.date32()),
+            ('priority', pa.string()), ('notes', pa.string()),
+        ])
+        self._writer = self.open(path)
+
+    def open(self, path: str):
+        return self._pa.ipc.new_file(path, self.schema)
+
+    def write(self, rows: List[tuple]) -> None:
+        pa = self._pa
+        # The view returns dates as ISO text, which Arrow parses in the cast
+        arrays = [
+            pa.array(values, pa.string()).cast(field.type) if pa.types.is_temporal(field.type)
+            else pa.array(values, field.type)
+            for field, values in zip(self.schema, zip(*rows))
+        ]
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class ParquetWriter(ArrowWriter):
+    def open(self, path: str):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(path, self.schema)
+
+
+WRITERS = {'.csv': CsvWriter, '.xlsx': XlsxWriter, '.parquet': ParquetWriter, '.arrow': ArrowWriter}
+
+
+@timed(rows=int)
+def export_activities(model, path: str, filters: Optional[dict] = None,
+                      progress: Optional[Callable[[int, int], None]] = None, chunk_size: int = CHUNK_SIZE) -> int:
+    """Stream the activities matching ``filters`` into ``path`` and return how many were written.
+
+    The format follows the file extension (see ``FORMATS``). Rows are read from a
+    single cursor ``chunk_size`` at a time and written straight out, so memory use
+    depends on the chunk size rather than the table size. ``progress(done, total)``
+    is called before every chunk; if it raises (for example when a worker is
+    cancelled) or writing fails, the partial file is removed.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in WRITERS:
+        raise ValueError(f"Unsupported export format {extension!r}, expected one of {list(WRITERS)}")
+    total = model.count_activities(filters)
+    writer = WRITERS[extension](path)
+    written = 0
+    try:
+        for rows in model.iter_activities(filters, chunk_size):
+            if progress:
+                progress(written, total)
+            writer.write(rows)
+            written += len(rows)
+        writer.close()
+    except BaseException:
+        try:
+            writer.close()
+        except Exception as e:
+            logging.debug("Could not close partial export %s: %s", path, e)
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    if progress:
+        progress(written, total)
+    return written
@@ -0,0 +1,405 @@
+import io
+import struct
+import zlib
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+import matplotlib.dates as mdates
+import matplotlib.patches as mpatches
+import numpy as np
+import pandas as pd
+from matplotlib.collections import PolyCollection
+
+from planner_metrics import timed
+
+if TYPE_CHECKING:
+    from planner_cache import RenderCache
+
+# Bar colours per status, in legend order
+STATUS_COLORS = {'Completed': '#4CAF50', 'In Progress': '#FFC107', 'Pending': '#f44336'}
+OTHER_COLOR = '#9E9E9E'
+BAR_HEIGHT = 0.8
+BAR_STYLE = {'linewidth': 2, 'edgecolor': 'black'}
+# Static chart geometry in inches; a fixed label column and row height let tiles stack seamlessly
+CHART_WIDTH_IN = 15
+LABEL_WIDTH_IN = 3
+MARGIN_IN = 0.3
+ROW_HEIGHT_IN = 0.35
+HEADER_HEIGHT_IN = 0.8
+AXIS_HEIGHT_IN = 1.4
+# Average rows per tile of the static PNG chart
+TILE_ROWS = 25
+# Tile preamble: width, height, scanline bytes and their Adler-32; largest IDAT chunk written
+TILE_HEADER = struct.Struct('<IIQI')
+PNG_CHUNK_BYTES = 1 << 20
+
+
+@timed(rows=lambda result: len(result[0]))
+def prepare_segments(df: pd.DataFrame, start: str, end: str) -> Tuple[pd.DataFrame, pd.Index]:
+    """Turn timeline segment rows into chart rows clipped to ``start``..``end``.
+
+    ``df`` holds one row per segment with ``activity``, ``status`` and the
+    ``start_day``/``end_day`` bounds in days since 1970-01-01. Returns a frame with
+    ``row``, ``status``, ``start`` and ``end`` columns and the activity labels
+    indexed by ``row``. Activities are grouped by name, taking the first status,
+    as the chart always did.
+    """
+    range_start, range_end = pd.Timestamp(start), pd.Timestamp(end)
+    starts = pd.to_datetime(df['start_day'], unit='D')
+    ends = pd.to_datetime(df['end_day'], unit='D')
+    keep = (starts <= range_end) & (ends >= range_start)
+    segments = df[keep]
+    rows, labels = pd.factorize(segments['activity'], sort=True)
+    first_status = segments.groupby(rows)['status'].first()
+    return pd.DataFrame({
+        'row': rows,
+        'status': first_status.reindex(rows).to_numpy(),
+        'start': starts[keep].clip(lower=range_start).to_numpy(),
+        'end': ends[keep].clip(upper=range_end).to_numpy(),
+    }), pd.Index(labels)
+
+
+def segment_verts(segments: pd.DataFrame) -> np.ndarray:
+    """Return an (n, 4, 2) array of bar rectangles in matplotlib date coordinates."""
+    return bar_verts(
+        segments['row'].to_numpy(),
+        mdates.date2num(segments['start'].to_numpy()),
+        mdates.date2num(segments['end'].to_numpy()),
+    )
+
+
+def bar_verts(rows: np.ndarray, x0: np.ndarray, x1: np.ndarray) -> np.ndarray:
+    """Return an (n, 4, 2) array of bar rectangles for rows and start/end x coordinates."""
+    y0 = rows - BAR_HEIGHT / 2
+    y1 = y0 + BAR_HEIGHT
+    return np.stack([
+        np.column_stack([x0, y0]), np.column_stack([x0, y1]),
+        np.column_stack([x1, y1]), np.column_stack([x1, y0]),
+    ], axis=1)
+
+
+def draw_rows(ax, segments: pd.DataFrame, labels: pd.Index, start: str, end: str) -> None:
+    """Draw the segments onto ``ax`` with one collection per status, first row at the top."""
+    for status, group in segments.groupby('status', sort=False):
+        ax.add_collection(PolyCollection(
+            segment_verts(group), facecolors=STATUS_COLORS.get(status, OTHER_COLOR), **BAR_STYLE
+        ))
+
+    # Collections do not autoscale, so frame the requested range explicitly
+    ax.set_xlim(mdates.date2num(pd.Timestamp(start)), mdates.date2num(pd.Timestamp(end)))
+    ax.set_ylim(len(labels) - 0.5, -0.5)
+
+    # Add task labels
+    ax.set_yticks(range(len(labels)))
+    ax.set_yticklabels(labels, fontsize=12, fontweight='bold')
+    ax.xaxis.set_major_locator(mdates.MonthLocator())
+    style_gantt_axes(ax)
+
+
+def style_gantt_axes(ax) -> None:
+    """Date formatting, grid and background shared by the static chart and the widget."""
+    ax.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m-%d"))
+    ax.grid(True, which='major', axis='both', linestyle='--', alpha=0.5)
+    ax.set_facecolor('#f9f9f9')
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment('right')
+
+
+def legend_handles() -> List[mpatches.Rectangle]:
+    return [mpatches.Rectangle((0, 0), 1, 1, facecolor=color) for color in STATUS_COLORS.values()]
+
+
+def add_gantt_titles(ax) -> None:
+    """Title, axis names and status legend drawn on the axes themselves, as in the widget."""
+    ax.legend(legend_handles(), list(STATUS_COLORS), loc='upper right', fontsize=10, frameon=False)
+    ax.set_xlabel("Date", fontsize=14, fontweight='bold')
+    ax.set_ylabel("Activity", fontsize=14, fontweight='bold')
+    ax.set_title("Gantt Chart", fontsize=16, fontweight='bold')
+
+
+def tile_bounds(labels: pd.Index) -> List[int]:
+    """Row numbers where the static chart's tiles start, plus the row count at the end.
+
+    A tile ends after a label whose checksum is a multiple of ``TILE_ROWS`` (or
+    once it holds ``2 * TILE_ROWS`` rows), so the boundaries depend on the labels
+    rather than on positions: adding or removing an activity only changes the
+    tile it falls into, and every other tile can come from the cache.
+    """
+    bounds = [0]
+    for row, label in enumerate(labels, start=1):
+        if row - bounds[-1] >= 2 * TILE_ROWS or zlib.crc32(str(label).encode()) % TILE_ROWS == 0:
+            bounds.append(row)
+    if bounds[-1] != len(labels):
+        bounds.append(len(labels))
+    return bounds
+
+
+def _figure(height_in: float, dpi: int):
+    from matplotlib.figure import Figure
+
+    return Figure(figsize=(CHART_WIDTH_IN, height_in), dpi=dpi)
+
+
+def _chart_axes(fig, bottom_in: float, height_in: float):
+    # The same label column and margin in every figure, so stacked tiles line up
+    width, height = fig.get_size_inches()
+    return fig.add_axes([
+        LABEL_WIDTH_IN / width, bottom_in / height,
+        (width - LABEL_WIDTH_IN - MARGIN_IN) / width, height_in / height,
+    ])
+
+
+def _draw_header(fig, top_in: float) -> None:
+    width, height = fig.get_size_inches()
+    bottom_in = top_in - HEADER_HEIGHT_IN
+    fig.text(0.5, (top_in - 0.35) / height, "Gantt Chart", ha='center', va='center', fontsize=16, fontweight='bold')
+    fig.text(LABEL_WIDTH_IN / 2 / width, (bottom_in + 0.1) / height, "Activity",
+             ha='center', va='bottom', fontsize=14, fontweight='bold')
+    fig.legend(legend_handles(), list(STATUS_COLORS), loc='lower right', ncol=len(STATUS_COLORS),
+               bbox_to_anchor=(1 - MARGIN_IN / width, bottom_in / height), fontsize=10, frameon=False)
+
+
+def _draw_date_axis(ax, start: str, end: str) -> None:
+    ax.set_xlim(mdates.date2num(pd.Timestamp(start)), mdates.date2num(pd.Timestamp(end)))
+    ax.xaxis.set_major_locator(mdates.MonthLocator())
+    ax.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m-%d"))
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment('right')
+    ax.set_xlabel("Date", fontsize=14, fontweight='bold')
+
+
+def _encode(fig, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def _raster(fig) -> bytes:
+    """Draw ``fig`` with Agg and return it as a tile of a PNG image stream.
+
+    The tile holds its size, the length and Adler-32 checksum of its scanlines
+    (each prefixed with PNG filter type 0) and those scanlines deflated up to a
+    full flush, so tiles can be joined into one PNG by plain concatenation.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    pixels = np.asarray(canvas.buffer_rgba())[:, :, :3]
+    height, width = pixels.shape[:2]
+    scanlines = np.hstack([np.zeros((height, 1), dtype=np.uint8), pixels.reshape(height, width * 3)]).tobytes()
+    deflate = zlib.compressobj(6, zlib.DEFLATED, -15)
+    data = deflate.compress(scanlines) + deflate.flush(zlib.Z_FULL_FLUSH)
+    return TILE_HEADER.pack(width, height, len(scanlines), zlib.adler32(scanlines)) + data
+
+
+def _adler32_combine(first: int, second: int, second_length: int) -> int:
+    # zlib's adler32_combine: the checksum of two byte runs from the checksums of each
+    base = 65521
+    remainder = second_length % base
+    sum1 = first & 0xffff
+    sum2 = remainder * sum1 % base
+    sum1 = (sum1 + (second & 0xffff) + base - 1) % base
+    sum2 = (sum2 + (first >> 16) + (second >> 16) + base - remainder) % base
+    return sum2 << 16 | sum1
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def _assemble_png(tiles: List[bytes]) -> bytes:
+    """Join tiles from ``_raster`` top to bottom into one RGB PNG without decoding any of them."""
+    width, height, checksum, parts = None, 0, 1, [b'\x78\x9c']
+    for tile in tiles:
+        tile_width, tile_height, length, adler = TILE_HEADER.unpack_from(tile)
+        if width is not None and tile_width != width:
+            raise ValueError(f"Tile is {tile_width} pixels wide, expected {width}")
+        width, height = tile_width, height + tile_height
+        checksum = _adler32_combine(checksum, adler, length)
+        parts.append(tile[TILE_HEADER.size:])
+    parts.append(zlib.compressobj(6, zlib.DEFLATED, -15).flush(zlib.Z_FINISH))
+    parts.append(struct.pack('>I', checksum))
+    stream = b''.join(parts)
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n', _png_chunk(b'IHDR', header),
+        *(_png_chunk(b'IDAT', stream[i:i + PNG_CHUNK_BYTES]) for i in range(0, len(stream), PNG_CHUNK_BYTES)),
+        _png_chunk(b'IEND', b''),
+    ])
+
+
+def _render_header(dpi: int) -> bytes:
+    fig = _figure(HEADER_HEIGHT_IN, dpi)
+    _draw_header(fig, HEADER_HEIGHT_IN)
+    return _raster(fig)
+
+
+def _render_rows(segments: pd.DataFrame, labels: pd.Index, start: str, end: str, first: bool, dpi: int) -> bytes:
+    height = len(labels) * ROW_HEIGHT_IN
+    fig = _figure(height, dpi)
+    ax = _chart_axes(fig, 0, height)
+    draw_rows(ax, segments, labels, start, end)
+    ax.tick_params(axis='x', bottom=False, labelbottom=False)
+    # The first tile closes the chart at the top; the date axis tile closes it at the bottom
+    ax.spines['top'].set_visible(first)
+    ax.spines['bottom'].set_visible(False)
+    return _raster(fig)
+
+
+def _render_axis(start: str, end: str, dpi: int) -> bytes:
+    fig = _figure(AXIS_HEIGHT_IN, dpi)
+    ax = _chart_axes(fig, AXIS_HEIGHT_IN - 1 / dpi, 1 / dpi)
+    ax.set_yticks([])
+    _draw_date_axis(ax, start, end)
+    return _raster(fig)
+
+
+def _cached(cache: Optional["RenderCache"], parts: tuple, render: Callable[[], bytes]) -> bytes:
+    if cache is None:
+        return render()
+    key = cache.key(*parts)
+    data = cache.get(key)
+    if data is None:
+        data = render()
+        cache.put(key, data)
+    return data
+
+
+@timed()
+def render_gantt(segments: pd.DataFrame, labels: pd.Index, start: str, end: str, fmt: str = 'png',
+                 dpi: int = 100, cache: Optional["RenderCache"] = None) -> bytes:
+    """Render the chart as an image in ``fmt`` without pyplot or a display.
+
+    Every activity gets a row of ``ROW_HEIGHT_IN``, so the image grows with the
+    plan instead of squeezing the labels together. PNG output is stacked from a
+    header, tiles of rows (see ``tile_bounds``) and the date axis, each looked up
+    in ``cache`` by its content first, so after a change only the tiles whose
+    activities changed are drawn again. Other formats are drawn in one figure.
+    """
+    if fmt != 'png':
+        chart_in = len(labels) * ROW_HEIGHT_IN
+        fig = _figure(HEADER_HEIGHT_IN + chart_in + AXIS_HEIGHT_IN, dpi)
+        _draw_header(fig, HEADER_HEIGHT_IN + chart_in + AXIS_HEIGHT_IN)
+        ax = _chart_axes(fig, AXIS_HEIGHT_IN, chart_in)
+        draw_rows(ax, segments, labels, start, end)
+        _draw_date_axis(ax, start, end)
+        return _encode(fig, fmt)
+
+    rows = segments['row'].to_numpy()
+    order = np.argsort(rows, kind='stable')
+    segments, rows = segments.iloc[order], rows[order]
+    bounds = tile_bounds(labels)
+    parts = [_cached(cache, ('gantt-header', dpi), lambda: _render_header(dpi))]
+    for r0, r1 in zip(bounds, bounds[1:]):
+        lo, hi = np.searchsorted(rows, [r0, r1])
+        tile = segments.iloc[lo:hi].assign(row=rows[lo:hi] - r0)
+        tile_labels = labels[r0:r1]
+        key = (
+            'gantt-rows', start, end, dpi, r0 == 0, list(tile_labels), list(tile['status']),
+            tile['row'].to_numpy().tobytes(), tile['start'].to_numpy().tobytes(), tile['end'].to_numpy().tobytes(),
+        )
+        parts.append(_cached(cache, key, lambda: _render_rows(tile, tile_labels, start, end, r0 == 0, dpi)))
+    parts.append(_cached(cache, ('gantt-axis', start, end, dpi), lambda: _render_axis(start, end, dpi)))
+    return _assemble_png(parts)
+
+
+class GanttLayout:
+    """Chart segments indexed for viewport queries, built off the GUI thread.
+
+    Segments are sorted by row, so the ones in a band of rows are a contiguous
+    slice found by binary search; ``visible`` culls that slice by date. When too
+    many rows are in view to draw as bars, ``density`` aggregates them into bands
+    showing segments per row over time. Up to ``DIRECT_ROWS`` visible rows the
+    bands are computed from the visible segments; beyond that they are sliced from
+    a pyramid of precomputed band sizes, so either way the work depends on what is
+    in view rather than on the size of the plan.
+    """
+    # Most rows drawn as individual bars, most density bands drawn when zoomed out
+    DETAIL_ROWS = 150
+    BANDS = 150
+    # Density columns across the visible dates, and across the whole range in the pyramid
+    COLUMNS = 400
+    PYRAMID_COLUMNS = 1024
+    DIRECT_ROWS = 50000
+
+    @timed()
+    def __init__(self, segments: pd.DataFrame, labels: pd.Index) -> None:
+        order = np.argsort(segments['row'].to_numpy(), kind='stable')
+        self.rows = segments['row'].to_numpy()[order]
+        self.x0 = mdates.date2num(segments['start'].to_numpy())[order]
+        self.x1 = mdates.date2num(segments['end'].to_numpy())[order]
+        self.statuses = segments['status'].to_numpy()[order]
+        self.labels = labels
+        self.row_count = len(labels)
+        # Segments of row r are [row_starts[r], row_starts[r + 1])
+        self.row_starts = np.searchsorted(self.rows, np.arange(self.row_count + 1))
+        self.xmin = float(self.x0.min()) if len(self.x0) else 0.0
+        self.xmax = float(self.x1.max()) if len(self.x1) else 1.0
+        self.pyramid = self._build_pyramid() if self.row_count > self.DIRECT_ROWS else []
+
+    def _row_range(self, y0: float, y1: float) -> Tuple[int, int]:
+        return max(int(np.floor(y0 + 0.5)), 0), min(int(np.ceil(y1 + 0.5)), self.row_count)
+
+    def visible(self, y0: float, y1: float, x0: float, x1: float) -> np.ndarray:
+        """Indices of the segments overlapping rows ``y0``..``y1`` and dates ``x0``..``x1``."""
+        r0, r1 = self._row_range(y0, y1)
+        if r0 >= r1:
+            return np.empty(0, dtype=np.intp)
+        lo, hi = self.row_starts[r0], self.row_starts[r1]
+        keep = (self.x1[lo:hi] >= x0) & (self.x0[lo:hi] <= x1)
+        return np.flatnonzero(keep) + lo
+
+    @staticmethod
+    def _band_counts(rows: np.ndarray, x0: np.ndarray, x1: np.ndarray, band: int, bands: int,
+                     left: float, width: float, columns: int) -> np.ndarray:
+        """Count the segments overlapping each (band, column) cell with one difference array."""
+        first = np.clip(np.floor((x0 - left) / width), 0, columns).astype(np.int64)
+        last = np.clip(np.floor((x1 - left) / width), -1, columns - 1).astype(np.int64)
+        keep = first <= last
+        cells = (rows[keep] // band) * (columns + 1)
+        size = bands * (columns + 1)
+        diff = (np.bincount(cells + first[keep], minlength=size)
+                - np.bincount(cells + last[keep] + 1, minlength=size))
+        return np.cumsum(diff.reshape(bands, columns + 1), axis=1)[:, :columns].astype(np.int32)
+
+    def _build_pyramid(self) -> List[Tuple[int, np.ndarray]]:
+        band = 1 << int(np.ceil(np.log2(self.DIRECT_ROWS / self.BANDS)))
+        width = (self.xmax - self.xmin) / self.PYRAMID_COLUMNS or 1.0
+        bands = -(-self.row_count // band)
+        counts = self._band_counts(self.rows, self.x0, self.x1, band, bands, self.xmin, width, self.PYRAMID_COLUMNS)
+        levels = [(band, counts)]
+        while len(counts) > self.BANDS:
+            if len(counts) % 2:
+                counts = np.vstack([counts, np.zeros((1, counts.shape[1]), dtype=counts.dtype)])
+            counts = counts[0::2] + counts[1::2]
+            band *= 2
+            levels.append((band, counts))
+        return levels
+
+    def density(self, y0: float, y1: float, x0: float, x1: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Segments per row in bands of rows over the view.
+
+        Returns the density matrix (bands x columns) with the row and x coordinates
+        of its cell edges.
+        """
+        r0, r1 = self._row_range(y0, y1)
+        r1 = max(r1, r0 + 1)
+        band = max(1, -(-(r1 - r0) // self.BANDS))
+        if r1 - r0 <= self.DIRECT_ROWS or not self.pyramid:
+            lo, hi = self.row_starts[r0], self.row_starts[min(r1, self.row_count)]
+            width = (x1 - x0) / self.COLUMNS or 1.0
+            bands = -(-(r1 - r0) // band)
+            counts = self._band_counts(self.rows[lo:hi] - r0, self.x0[lo:hi], self.x1[lo:hi], band, bands,
+                                       x0, width, self.COLUMNS)
+            row_edges = np.minimum(r0 + band * np.arange(bands + 1), r1)
+            return counts / band, row_edges, x0 + width * np.arange(self.COLUMNS + 1)
+
+        band, counts = next(((size, level) for size, level in self.pyramid if size >= band), self.pyramid[-1])
+        b0, b1 = r0 // band, -(-r1 // band)
+        width = (self.xmax - self.xmin) / self.PYRAMID_COLUMNS or 1.0
+        c0 = int(np.clip(np.floor((x0 - self.xmin) / width), 0, self.PYRAMID_COLUMNS - 1))
+        c1 = int(np.clip(np.ceil((x1 - self.xmin) / width), c0 + 1, self.PYRAMID_COLUMNS))
+        row_edges = np.minimum(band * np.arange(b0, b1 + 1), self.row_count)
+        return counts[b0:b1, c0:c1] / band, row_edges, self.xmin + width * np.arange(c0, c1 + 1)
@@ -0,0 +1,180 @@
+import matplotlib.dates as mdates
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, NavigationToolbar2QT
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtWidgets import QLabel, QVBoxLayout, QWidget
+
+from planner_gantt import (
+    BAR_STYLE, OTHER_COLOR, STATUS_COLORS, GanttLayout, add_gantt_titles, bar_verts, style_gantt_axes
+)
+from planner_metrics import timed
+from planner_model import from_epoch_day
+
+# Zoom factor per wheel step, and the share of the view one plain wheel step scrolls
+ZOOM_STEP = 1.25
+SCROLL_STEP = 0.1
+# Rows shown when the chart opens, if there are more than fit as bars
+INITIAL_ROWS = 40
+# Longer activity names are cut short so the margin fits whatever rows scroll into view
+LABEL_CHARS = 30
+# Vertical pixels per row label; rows get a label each when they are at least this tall
+ROW_LABEL_PX = 20
+# Shading behind the bars for days with more open activities than the conflict capacity
+OVERLOAD_STYLE = {'color': '#f44336', 'alpha': 0.12, 'linewidth': 0, 'zorder': 0}
+
+
+class GanttWidget(QWidget):
+    """Interactive Gantt chart that only draws what is in view.
+
+    Bars are kept in one collection per status whose vertices are replaced on
+    every view change with the segments ``GanttLayout.visible`` returns, and when
+    more than ``GanttLayout.DETAIL_ROWS`` rows are in view an image of density
+    bands takes their place. Row labels come from a locator that spaces ticks to
+    the axis height, so they never pile up however many rows there are.
+
+    Wheel scrolls the rows, Ctrl+wheel zooms the dates and Shift+wheel zooms the
+    rows around the cursor; dragging pans. The toolbar's pan, zoom and home work
+    too since every limit change goes through the same redraw.
+
+    Given a ``planner_conflicts.TimelineConflicts`` for the range, its overloaded
+    periods are shaded behind the bars and its summary is shown underneath.
+    """
+
+    def __init__(self, layout: GanttLayout, start: str, end: str, conflicts=None, parent=None) -> None:
+        super().__init__(parent)
+        self.layout_data = layout
+        self.figure = Figure(figsize=(15, 8))
+        self.canvas = FigureCanvasQTAgg(self.figure)
+        self.canvas.setFocusPolicy(Qt.WheelFocus)
+        self.ax = self.figure.subplots()
+        self.ax.set_autoscale_on(False)
+
+        self.bars = {}
+        for status, color in [*STATUS_COLORS.items(), (None, OTHER_COLOR)]:
+            self.bars[status] = self.ax.add_collection(PolyCollection([], facecolors=color, **BAR_STYLE))
+        self.density = self.ax.imshow(
+            np.zeros((1, 1)), aspect='auto', cmap='Blues', vmin=0, vmax=1,
+            interpolation='nearest', origin='upper', visible=False
+        )
+
+        self.row_locator = MaxNLocator(integer=True, steps=[1, 2, 2.5, 5, 10])
+        self.ax.yaxis.set_major_locator(self.row_locator)
+        self.ax.yaxis.set_major_formatter(FuncFormatter(self.row_label))
+        self.ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+        style_gantt_axes(self.ax)
+        add_gantt_titles(self.ax)
+        self.ax.set_xlim(mdates.date2num(pd.Timestamp(start)), mdates.date2num(pd.Timestamp(end)))
+        if conflicts is not None:
+            for first, last, _ in conflicts.overloaded():
+                self.ax.axvspan(mdates.date2num(from_epoch_day(first)), mdates.date2num(from_epoch_day(last + 1)),
+                                **OVERLOAD_STYLE)
+        rows = layout.row_count if layout.row_count <= GanttLayout.DETAIL_ROWS else INITIAL_ROWS
+        self.ax.set_ylim(rows - 0.5, -0.5)
+        self.figure.tight_layout()
+        # Leave room for the longest label any scroll position can show
+        self.figure.subplots_adjust(left=max(self.figure.subplotpars.left, 0.2))
+
+        # Limit changes arrive in bursts while dragging; coalesce them into one update
+        self.update_timer = QTimer(self, singleShot=True, interval=0)
+        self.update_timer.timeout.connect(self.update_view)
+        self.ax.callbacks.connect('xlim_changed', lambda _: self.update_timer.start())
+        self.ax.callbacks.connect('ylim_changed', lambda _: self.update_timer.start())
+        self.canvas.mpl_connect('scroll_event', self.on_scroll)
+        self.canvas.mpl_connect('button_press_event', self.on_press)
+        self.canvas.mpl_connect('motion_notify_event', self.on_drag)
+        self.canvas.mpl_connect('button_release_event', self.on_release)
+        self.drag = None
+
+        self.toolbar = NavigationToolbar2QT(self.canvas, self)
+        self.status_label = QLabel()
+        box = QVBoxLayout(self)
+        box.addWidget(self.toolbar)
+        box.addWidget(self.canvas, 1)
+        box.addWidget(self.status_label)
+        if conflicts is not None:
+            box.addWidget(QLabel(f"Conflicts: {conflicts.summary()}; overloaded days are shaded red"))
+        self.update_view()
+
+    def row_label(self, y: float, _) -> str:
+        labels = self.layout_data.labels
+        if y != int(y) or not 0 <= y < len(labels):
+            return ''
+        label = str(labels[int(y)])
+        return label if len(label) <= LABEL_CHARS else label[:LABEL_CHARS - 1] + '…'
+
+    def view_limits(self):
+        x0, x1 = sorted(self.ax.get_xlim())
+        y0, y1 = sorted(self.ax.get_ylim())
+        return x0, x1, y0, y1
+
+    @timed()
+    def update_view(self) -> None:
+        """Refill the artists for the current limits; the cost follows the rows in view."""
+        layout = self.layout_data
+        x0, x1, y0, y1 = self.view_limits()
+        detail = y1 - y0 <= GanttLayout.DETAIL_ROWS
+        self.row_locator.set_params(nbins=max(1, int(self.ax.bbox.height / ROW_LABEL_PX)))
+        if detail:
+            shown = layout.visible(y0, y1, x0, x1)
+            statuses = layout.statuses[shown].astype(str)
+            known = np.isin(statuses, list(STATUS_COLORS))
+            for status, collection in self.bars.items():
+                mask = ~known if status is None else statuses == status
+                picked = shown[mask]
+                collection.set_verts(bar_verts(layout.rows[picked], layout.x0[picked], layout.x1[picked]))
+            self.status_label.setText(f"{len(shown):,} segments in view of {len(layout.rows):,}")
+        else:
+            matrix, row_edges, x_edges = layout.density(y0, y1, x0, x1)
+            self.density.set_data(matrix)
+            self.density.set_extent((x_edges[0], x_edges[-1], row_edges[-1] - 0.5, row_edges[0] - 0.5))
+            band = int(row_edges[1] - row_edges[0]) if len(row_edges) > 1 else 1
+            self.status_label.setText(
+                f"Rows {int(row_edges[0]):,}–{int(row_edges[-1]):,} of {layout.row_count:,} "
+                f"in bands of {band:,}; shading shows segments per activity"
+            )
+        for collection in self.bars.values():
+            collection.set_visible(detail)
+        self.density.set_visible(not detail)
+        self.canvas.draw_idle()
+
+    def set_view(self, x0: float, x1: float, y0: float, y1: float) -> None:
+        # Keep at least one row and at most all of them, with row 0 at the top
+        rows = self.layout_data.row_count
+        height = min(max(y1 - y0, 1.0), rows)
+        y0 = min(max(y0, -0.5), rows - 0.5 - height)
+        self.ax.set_xlim(x0, x1)
+        self.ax.set_ylim(y0 + height, y0)
+
+    def on_scroll(self, event) -> None:
+        x0, x1, y0, y1 = self.view_limits()
+        factor = ZOOM_STEP ** -event.step
+        if event.key == 'control' and event.xdata is not None:
+            x = event.xdata
+            self.set_view(x - (x - x0) * factor, x + (x1 - x) * factor, y0, y1)
+        elif event.key == 'shift' and event.ydata is not None:
+            y = event.ydata
+            self.set_view(x0, x1, y - (y - y0) * factor, y + (y1 - y) * factor)
+        else:
+            shift = -event.step * SCROLL_STEP * (y1 - y0)
+            self.set_view(x0, x1, y0 + shift, y1 + shift)
+
+    def on_press(self, event) -> None:
+        # Leave dragging to the toolbar while one of its modes is active
+        if event.button == 1 and event.inaxes is self.ax and not self.toolbar.mode:
+            self.drag = (event.x, event.y, self.view_limits())
+
+    def on_drag(self, event) -> None:
+        if self.drag is None:
+            return
+        px, py, (x0, x1, y0, y1) = self.drag
+        bbox = self.ax.bbox
+        dx = (event.x - px) * (x1 - x0) / bbox.width
+        dy = (event.y - py) * (y1 - y0) / bbox.height
+        self.set_view(x0 - dx, x1 - dx, y0 + dy, y1 + dy)
+
+    def on_release(self, event) -> None:
+        self.drag = None
@@ -0,0 +1,235 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sqlite3
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterator, Optional
+
+# Latency buckets are powers of two in microseconds: bucket b holds [2**(b-1), 2**b) µs
+BUCKETS = 32
+# Statements reported by snapshot(), by total time, and allocation sites listed while tracing memory
+TOP_STATEMENTS = 25
+TOP_ALLOCATIONS = 15
+WHITESPACE = re.compile(r'\s+')
+
+
+class Histogram:
+    """Latency distribution of one operation in log2 buckets, with call, time and row totals."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, seconds: float, rows: Optional[int] = None) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if rows is not None:
+            self.rows += rows
+        self.buckets[min(int(seconds * 1e6).bit_length(), BUCKETS - 1)] += 1
+
+    def percentile(self, q: float) -> float:
+        """Upper edge of the bucket holding the ``q`` quantile, in seconds, capped at the slowest call."""
+        wanted = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return min((1 << bucket) / 1e6, self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.5) * 1000, 3),
+            'p90_ms': round(self.percentile(0.9) * 1000, 3),
+            'p99_ms': round(self.percentile(0.99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+            'rows': self.rows,
+        }
+
+
+class Metrics:
+    """Process-wide timings of planner operations and SQLite statements, off until enabled.
+
+    Operations are recorded through ``timed`` (a decorator) or ``timer`` (a
+    context manager) and statements by connections made with
+    ``InstrumentedConnection``. While disabled each of those costs one attribute
+    check, so they can stay on hot paths. ``start_capture`` additionally runs
+    cProfile over the calling thread and/or tracemalloc. Recording is
+    thread-safe; ``snapshot`` and ``dump`` report everything as JSON.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.operations: Dict[str, Histogram] = {}
+        self.statements: Dict[str, Histogram] = {}
+        # Statement text as written in the code, mapped to its whitespace-collapsed form
+        self._sql_keys: Dict[str, str] = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._profile: Optional[cProfile.Profile] = None
+        self.profile_report = ''
+        self.memory_report: Optional[dict] = None
+
+    def enable(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+
+    def reset(self) -> None:
+        with self._lock:
+            self.operations, self.statements = {}, {}
+            self.started = time.time()
+
+    def record(self, name: str, seconds: float, rows: Optional[int] = None) -> None:
+        with self._lock:
+            histogram = self.operations.get(name)
+            if histogram is None:
+                histogram = self.operations[name] = Histogram()
+            histogram.add(seconds, rows)
+
+    def record_statement(self, sql: str, seconds: float, rows: Optional[int] = None) -> None:
+        key = self._sql_keys.get(sql)
+        if key is None:
+            key = self._sql_keys[sql] = WHITESPACE.sub(' ', sql).strip()
+        with self._lock:
+            histogram = self.statements.get(key)
+            if histogram is None:
+                histogram = self.statements[key] = Histogram()
+            histogram.add(seconds, rows)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[dict]:
+        """Time the enclosed block as ``name``; set ``rows`` in the yielded dict to count rows."""
+        if not self.enabled:
+            yield {}
+            return
+        span = {}
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            self.record(name, time.perf_counter() - start, span.get('rows'))
+
+    def timed(self, name: Optional[str] = None, rows: Optional[Callable[[object], int]] = None):
+        """Decorator timing each call as ``name`` (default: the function's qualified name).
+
+        ``rows(result)`` gives the row count to record, e.g. ``len`` for a list of rows.
+        """
+        def decorate(fn):
+            label = name or fn.__qualname__
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start = time.perf_counter()
+                result = fn(*args, **kwargs)
+                self.record(label, time.perf_counter() - start, rows(result) if rows else None)
+                return result
+            return wrapper
+        return decorate
+
+    def start_capture(self, profile: bool = True, memory: bool = False) -> None:
+        """Start cProfile on the calling thread and/or tracemalloc until ``stop_capture``."""
+        if profile and self._profile is None:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop_capture(self, profile: bool = True, memory: bool = True, profile_path: Optional[str] = None) -> None:
+        """Stop the chosen captures, keeping their reports in ``profile_report`` and ``memory_report``.
+
+        ``profile_path`` also saves the raw profile for pstats or snakeviz.
+        """
+        if profile and self._profile is not None:
+            self._profile.disable()
+            if profile_path:
+                self._profile.dump_stats(profile_path)
+            out = io.StringIO()
+            pstats.Stats(self._profile, stream=out).sort_stats('cumulative').print_stats(30)
+            self.profile_report = out.getvalue()
+            self._profile = None
+        if memory and tracemalloc.is_tracing():
+            self.memory_report = self._memory()
+            tracemalloc.stop()
+
+    @property
+    def profiling(self) -> bool:
+        return self._profile is not None
+
+    @staticmethod
+    def _memory() -> dict:
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            'current_bytes': current,
+            'peak_bytes': peak,
+            'top': [
+                {'site': str(stat.traceback), 'bytes': stat.size, 'blocks': stat.count}
+                for stat in tracemalloc.take_snapshot().statistics('lineno')[:TOP_ALLOCATIONS]
+            ],
+        }
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            operations = {name: h.as_dict() for name, h in sorted(self.operations.items())}
+            statements = sorted(self.statements.items(), key=lambda item: item[1].total, reverse=True)
+            statements = [{'sql': sql, **h.as_dict()} for sql, h in statements[:TOP_STATEMENTS]]
+        stats = {
+            'enabled': self.enabled,
+            'since': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'operations': operations,
+            'statements': statements,
+        }
+        memory = self._memory() if tracemalloc.is_tracing() else self.memory_report
+        if memory:
+            stats['memory'] = memory
+        return stats
+
+    def dump(self, path: str) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+            f.write('\n')
+
+
+METRICS = Metrics()
+# PLANNER_METRICS=1 turns recording on from start-up, e.g. to time a CLI run
+METRICS.enable(os.environ.get('PLANNER_METRICS', '') not in ('', '0'))
+
+timed = METRICS.timed
+timer = METRICS.timer
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection that reports ``execute``/``executemany`` times to ``METRICS`` while enabled.
+
+    Times cover running the statement up to its first row, not fetching the rest.
+    """
+
+    def execute(self, sql: str, parameters=()):
+        if not METRICS.enabled:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        cursor = super().execute(sql, parameters)
+        METRICS.record_statement(sql, time.perf_counter() - start)
+        return cursor
+
+    def executemany(self, sql: str, parameters):
+        if not METRICS.enabled:
+            return super().executemany(sql, parameters)
+        start = time.perf_counter()
+        cursor = super().executemany(sql, parameters)
+        METRICS.record_statement(sql, time.perf_counter() - start, cursor.rowcount if cursor.rowcount >= 0 else None)
+        return cursor
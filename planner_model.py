@@ -0,0 +1,1780 @@
+import calendar
+import glob
+import heapq
+import logging
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from planner_metrics import InstrumentedConnection, timed
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from planner_recurrence import Rule
+
+# Column order shared by the activities table, the SQL projection and the view
+COLUMNS = ['id', 'category', 'activity', 'status', 'notification', 'timeline', 'deadline', 'priority', 'notes']
+HEADERS = ["ID", "Category", "Activity", "Status", "Notification", "Timeline", "Deadline", "Priority", "Notes"]
+
+# Fixed lookup values; the list index is the code stored in the activities table
+STATUSES = ["Pending", "In Progress", "Completed"]
+PRIORITIES = ["High", "Medium", "Low"]
+# Categories offered in the form; they are seeded first so their codes are stable, others get added on use
+CATEGORIES = [
+    "Birthday", "Anniversary", "Holiday", "Project Deadline", "Meeting", "Appointment", "Email", "Tax Return",
+    "Learning", "Coding", "Personal", "Family", "Social", "Travel", "Errands",
+    "Shopping", "Health", "Fitness", "Sports", "Hobbies", "Creative Pursuits",
+    "Volunteer", "Other", "Wedding", "Graduation", "Party", "Conference", "Seminar",
+    "Workshop", "Training", "Exam", "Interview", "Job Search", "Career Development",
+    "Home Maintenance", "Household Chores", "Pet Care", "Gardening", "Cooking",
+    "Financial Planning", "Budgeting", "Investing", "Real Estate", "Automotive",
+    "Home Improvement", "DIY Project", "Renovation", "Moving", "Relocation",
+    "Education", "Research", "Thesis", "Dissertation", "Academic", "School Event",
+    "Community Service", "Charity Event", "Fundraiser", "Campaign", "Political Event",
+    "Religious Event", "Spiritual", "Wellness", "Self-Care", "Mental Health",
+    "Recreational", "Leisure", "Entertainment", "Arts", "Culture", "Music",
+    "Theater", "Dance", "Film", "Photography", "Gaming", "Outdoor Activities",
+    "Adventure", "Travel Planning", "Itinerary", "Trip", "Vacation", "Staycation"
+]
+
+# Typed activities table: lookup codes for status/priority/category, deadline as days since
+# 1970-01-01 and notification as local wall-clock seconds since 1970-01-01
+TYPED_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS statuses (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS priorities (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS categories (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+    """
+    CREATE TABLE activities_typed (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category INTEGER REFERENCES categories (id),
+        activity TEXT,
+        status INTEGER NOT NULL DEFAULT 0 REFERENCES statuses (id) CHECK (status BETWEEN 0 AND 2),
+        notification INTEGER CHECK (notification IS NULL OR typeof(notification) = 'integer'),
+        timeline TEXT,
+        deadline INTEGER CHECK (deadline IS NULL OR typeof(deadline) = 'integer'),
+        priority INTEGER NOT NULL DEFAULT 1 REFERENCES priorities (id) CHECK (priority BETWEEN 0 AND 2),
+        notes TEXT
+    )
+    """,
+]
+
+# Indexes and the decoded view created once the typed table is in place
+TYPED_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_activities_deadline ON activities (deadline)",
+    "CREATE INDEX IF NOT EXISTS idx_activities_status_deadline ON activities (status, deadline)",
+    "CREATE INDEX IF NOT EXISTS idx_activities_category ON activities (category)",
+    """
+    CREATE VIEW IF NOT EXISTS activity_rows AS
+    SELECT a.id, c.name AS category, a.activity, s.name AS status,
+           strftime('%Y-%m-%d %H:%M:%S', a.notification, 'unixepoch') AS notification,
+           a.timeline, date(a.deadline * 86400, 'unixepoch') AS deadline, p.name AS priority, a.notes
+    FROM activities a
+    LEFT JOIN categories c ON c.id = a.category
+    JOIN statuses s ON s.id = a.status
+    JOIN priorities p ON p.id = a.priority
+    """,
+]
+
+# Decoded rows plus the raw codes/epoch values, so filters and sorts can hit the typed indexes.
+# Every lookup is a LEFT JOIN (status and priority are never NULL, so no rows change) because
+# that fixes activities as the outer loop; with inner joins and no ANALYZE statistics the
+# planner may drive from a lookup table and sort instead of walking an activities index.
+ACTIVITY_ROWS_VIEW = """
+    CREATE VIEW activity_rows AS
+    SELECT a.id, c.name AS category, a.activity, s.name AS status,
+           strftime('%Y-%m-%d %H:%M:%S', a.notification, 'unixepoch') AS notification,
+           a.timeline, date(a.deadline * 86400, 'unixepoch') AS deadline, p.name AS priority, a.notes,
+           a.category AS category_code, a.status AS status_code, a.priority AS priority_code,
+           a.deadline AS deadline_day, a.notification AS notification_at
+    FROM activities a
+    LEFT JOIN categories c ON c.id = a.category
+    LEFT JOIN statuses s ON s.id = a.status
+    LEFT JOIN priorities p ON p.id = a.priority
+"""
+
+# Columns the table can be sorted by, mapped to the indexed activity_rows column each sorts on
+SORT_KEYS = {
+    'id': 'id',
+    'activity': 'activity',
+    'status': 'status_code',
+    'notification': 'notification_at',
+    'deadline': 'deadline_day',
+    'priority': 'priority_code',
+}
+
+# Full-text index over the searchable columns, kept in sync with activities by triggers.
+# Its content is the decoded view so category names, not codes, are what gets matched.
+FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS activities_fts USING fts5(
+        activity, notes, category,
+        content='activity_rows', content_rowid='id', prefix='1 2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS activities_fts_insert AFTER INSERT ON activities BEGIN
+        INSERT INTO activities_fts(rowid, activity, notes, category)
+        VALUES (new.id, new.activity, new.notes, (SELECT name FROM categories WHERE id = new.category));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS activities_fts_delete AFTER DELETE ON activities BEGIN
+        INSERT INTO activities_fts(activities_fts, rowid, activity, notes, category)
+        VALUES ('delete', old.id, old.activity, old.notes, (SELECT name FROM categories WHERE id = old.category));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS activities_fts_update AFTER UPDATE ON activities BEGIN
+        INSERT INTO activities_fts(activities_fts, rowid, activity, notes, category)
+        VALUES ('delete', old.id, old.activity, old.notes, (SELECT name FROM categories WHERE id = old.category));
+        INSERT INTO activities_fts(rowid, activity, notes, category)
+        VALUES (new.id, new.activity, new.notes, (SELECT name FROM categories WHERE id = new.category));
+    END
+    """,
+]
+
+# Timelines split into one row per "YYYY-MM-DD - YYYY-MM-DD" range, as days since 1970-01-01.
+# The two covering indexes let SQLite answer overlap queries from whichever bound is more selective.
+SEGMENTS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS timeline_segments (
+        activity_id INTEGER NOT NULL,
+        start_day INTEGER NOT NULL,
+        end_day INTEGER NOT NULL,
+        CHECK (start_day <= end_day)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_segments_start ON timeline_segments (start_day, end_day, activity_id)",
+    "CREATE INDEX IF NOT EXISTS idx_segments_end ON timeline_segments (end_day, start_day, activity_id)",
+    "CREATE INDEX IF NOT EXISTS idx_segments_activity ON timeline_segments (activity_id)",
+    """
+    CREATE TRIGGER IF NOT EXISTS timeline_segments_delete AFTER DELETE ON activities BEGIN
+        DELETE FROM timeline_segments WHERE activity_id = old.id;
+    END
+    """,
+]
+
+# Running totals kept up to date by triggers so the dashboard never scans activities:
+# counts per (category, status, priority) with 0 for no category, counts per
+# (deadline, status) for dated activities, and the change in the number of active
+# timeline segments at each day (+1 where a segment starts, -1 the day after it ends).
+SUMMARY_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS summary_counts (
+        category INTEGER NOT NULL, status INTEGER NOT NULL, priority INTEGER NOT NULL, count INTEGER NOT NULL,
+        PRIMARY KEY (category, status, priority)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS summary_deadlines (
+        deadline INTEGER NOT NULL, status INTEGER NOT NULL, count INTEGER NOT NULL,
+        PRIMARY KEY (deadline, status)
+    ) WITHOUT ROWID
+    """,
+    "CREATE TABLE IF NOT EXISTS summary_load (day INTEGER PRIMARY KEY, delta INTEGER NOT NULL)",
+    """
+    CREATE TRIGGER IF NOT EXISTS summary_insert AFTER INSERT ON activities BEGIN
+        INSERT INTO summary_counts VALUES (IFNULL(new.category, 0), new.status, new.priority, 1)
+        ON CONFLICT (category, status, priority) DO UPDATE SET count = count + 1;
+        INSERT INTO summary_deadlines SELECT new.deadline, new.status, 1 WHERE new.deadline IS NOT NULL
+        ON CONFLICT (deadline, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS summary_delete AFTER DELETE ON activities BEGIN
+        UPDATE summary_counts SET count = count - 1
+        WHERE category = IFNULL(old.category, 0) AND status = old.status AND priority = old.priority;
+        UPDATE summary_deadlines SET count = count - 1 WHERE deadline = old.deadline AND status = old.status;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS summary_update AFTER UPDATE OF category, status, priority, deadline ON activities
+    BEGIN
+        UPDATE summary_counts SET count = count - 1
+        WHERE category = IFNULL(old.category, 0) AND status = old.status AND priority = old.priority;
+        UPDATE summary_deadlines SET count = count - 1 WHERE deadline = old.deadline AND status = old.status;
+        INSERT INTO summary_counts VALUES (IFNULL(new.category, 0), new.status, new.priority, 1)
+        ON CONFLICT (category, status, priority) DO UPDATE SET count = count + 1;
+        INSERT INTO summary_deadlines SELECT new.deadline, new.status, 1 WHERE new.deadline IS NOT NULL
+        ON CONFLICT (deadline, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS summary_load_insert AFTER INSERT ON timeline_segments BEGIN
+        INSERT INTO summary_load VALUES (new.start_day, 1) ON CONFLICT (day) DO UPDATE SET delta = delta + 1;
+        INSERT INTO summary_load VALUES (new.end_day + 1, -1) ON CONFLICT (day) DO UPDATE SET delta = delta - 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS summary_load_delete AFTER DELETE ON timeline_segments BEGIN
+        UPDATE summary_load SET delta = delta - 1 WHERE day = old.start_day;
+        UPDATE summary_load SET delta = delta + 1 WHERE day = old.end_day + 1;
+    END
+    """,
+]
+
+# A counter bumped by every change to activities, so anything derived from them
+# (rendered charts, prepared layouts) can be keyed by it and checked in one lookup
+VERSION_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS data_version (id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO data_version VALUES (0, 0)",
+    """
+    CREATE TRIGGER IF NOT EXISTS version_insert AFTER INSERT ON activities BEGIN
+        UPDATE data_version SET version = version + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS version_update AFTER UPDATE ON activities BEGIN
+        UPDATE data_version SET version = version + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS version_delete AFTER DELETE ON activities BEGIN
+        UPDATE data_version SET version = version + 1;
+    END
+    """,
+]
+
+# Repetition rules, stored once per activity (see planner_recurrence). The activity row itself
+# is the first occurrence and ``anchor`` its day; later occurrences are the same activity moved
+# by whole days, worked out on demand for whatever range is asked for.
+RECURRENCE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS recurrences (
+        activity_id INTEGER PRIMARY KEY,
+        frequency INTEGER NOT NULL CHECK (frequency BETWEEN 0 AND 3),
+        interval INTEGER NOT NULL DEFAULT 1 CHECK (interval >= 1),
+        until INTEGER,
+        count INTEGER CHECK (count IS NULL OR count >= 1),
+        anchor INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS recurrence_exceptions (
+        activity_id INTEGER NOT NULL, day INTEGER NOT NULL, PRIMARY KEY (activity_id, day)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS recurrences_delete AFTER DELETE ON activities BEGIN
+        DELETE FROM recurrences WHERE activity_id = old.id;
+        DELETE FROM recurrence_exceptions WHERE activity_id = old.id;
+    END
+    """,
+    # Rules are replaced as a whole, so these two cover every change to them
+    """
+    CREATE TRIGGER IF NOT EXISTS version_recurrence_insert AFTER INSERT ON recurrences BEGIN
+        UPDATE data_version SET version = version + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS version_recurrence_delete AFTER DELETE ON recurrences BEGIN
+        UPDATE data_version SET version = version + 1;
+    END
+    """,
+]
+
+# summary_load split by the owning activity's status, so per-day occupancy can be drawn
+# per status without touching the segments. The segment triggers look the status up,
+# which is why segments are now removed BEFORE their activity rather than after it, and
+# a status change moves the activity's +1/-1 steps from the old status to the new one.
+LOAD_BY_STATUS_SCHEMA = [
+    "DROP TRIGGER IF EXISTS summary_load_insert",
+    "DROP TRIGGER IF EXISTS summary_load_delete",
+    "DROP TRIGGER IF EXISTS timeline_segments_delete",
+    "DROP TABLE IF EXISTS summary_load",
+    """
+    CREATE TABLE summary_load (
+        day INTEGER NOT NULL, status INTEGER NOT NULL, delta INTEGER NOT NULL,
+        PRIMARY KEY (day, status)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER timeline_segments_delete BEFORE DELETE ON activities BEGIN
+        DELETE FROM timeline_segments WHERE activity_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER summary_load_insert AFTER INSERT ON timeline_segments BEGIN
+        INSERT INTO summary_load SELECT new.start_day, status, 1 FROM activities WHERE id = new.activity_id
+        ON CONFLICT (day, status) DO UPDATE SET delta = delta + 1;
+        INSERT INTO summary_load SELECT new.end_day + 1, status, -1 FROM activities WHERE id = new.activity_id
+        ON CONFLICT (day, status) DO UPDATE SET delta = delta - 1;
+    END
+    """,
+    """
+    CREATE TRIGGER summary_load_delete AFTER DELETE ON timeline_segments BEGIN
+        UPDATE summary_load SET delta = delta - 1
+        WHERE day = old.start_day AND status = (SELECT status FROM activities WHERE id = old.activity_id);
+        UPDATE summary_load SET delta = delta + 1
+        WHERE day = old.end_day + 1 AND status = (SELECT status FROM activities WHERE id = old.activity_id);
+    END
+    """,
+    """
+    CREATE TRIGGER summary_load_status AFTER UPDATE OF status ON activities WHEN old.status != new.status BEGIN
+        INSERT INTO summary_load
+        SELECT day, old.status, -SUM(delta) FROM (
+            SELECT start_day AS day, 1 AS delta FROM timeline_segments WHERE activity_id = new.id
+            UNION ALL
+            SELECT end_day + 1, -1 FROM timeline_segments WHERE activity_id = new.id
+        ) WHERE true GROUP BY day
+        ON CONFLICT (day, status) DO UPDATE SET delta = delta + excluded.delta;
+        INSERT INTO summary_load
+        SELECT day, new.status, SUM(delta) FROM (
+            SELECT start_day AS day, 1 AS delta FROM timeline_segments WHERE activity_id = new.id
+            UNION ALL
+            SELECT end_day + 1, -1 FROM timeline_segments WHERE activity_id = new.id
+        ) WHERE true GROUP BY day
+        ON CONFLICT (day, status) DO UPDATE SET delta = delta + excluded.delta;
+    END
+    """,
+]
+
+# Completed activities of past years, moved out of the working database into a file per year
+# (see Database.archive) and attached as ``archive`` whenever one is read or written. Rows keep
+# their ids and typed values; the category is kept by name so each file stands on its own.
+ARCHIVE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS archive.activities (
+        id INTEGER PRIMARY KEY,
+        category TEXT,
+        activity TEXT,
+        status INTEGER NOT NULL,
+        notification INTEGER,
+        timeline TEXT,
+        deadline INTEGER,
+        priority INTEGER NOT NULL,
+        notes TEXT
+    )
+"""
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+TIMELINE_RANGE = re.compile(r'(\d{4}-\d{2}-\d{2})\s*-\s*(\d{4}-\d{2}-\d{2})')
+
+def to_epoch_day(value: str) -> int:
+    return date.fromisoformat(value).toordinal() - EPOCH_ORDINAL
+
+def from_epoch_day(day: int) -> date:
+    return date.fromordinal(day + EPOCH_ORDINAL)
+
+def to_epoch_seconds(value: str) -> int:
+    """Seconds since 1970-01-01 for a naive local timestamp, without any timezone shift."""
+    return calendar.timegm(datetime.fromisoformat(value).timetuple())
+
+def from_epoch_seconds(seconds: int) -> datetime:
+    return datetime(1970, 1, 1) + timedelta(seconds=seconds)
+
+def is_blank(value) -> bool:
+    """True for empty cells, including the 'NaT'/'None'/'nan' strings older exports wrote."""
+    return value is None or (isinstance(value, float) and value != value) or str(value).strip() in ('', 'NaT', 'None', 'nan')
+
+def parse_timeline(timeline: Optional[str]) -> List[Tuple[int, int]]:
+    """Return the (start_day, end_day) pairs in a timeline, skipping malformed or reversed ranges."""
+    segments = []
+    for start, end in TIMELINE_RANGE.findall(timeline or ''):
+        try:
+            segment = (to_epoch_day(start), to_epoch_day(end))
+        except ValueError:
+            logging.warning("Skipping invalid timeline segment %r - %r", start, end)
+            continue
+        if segment[0] <= segment[1]:
+            segments.append(segment)
+    return segments
+
+def archive_path(db_name: str, year: int) -> str:
+    """File that keeps ``year``'s archived activities for the database file ``db_name``."""
+    root, extension = os.path.splitext(db_name)
+    return f"{root}.archive-{year}{extension}"
+
+def compare_sort_keys(a: tuple, b: tuple, keys: List[Tuple[str, bool]]) -> int:
+    """Order two ``query_activities`` keys the way SQL does for ``keys``: -1, 0 or 1."""
+    for x, y, (_, descending) in zip(a, b, keys):
+        if x == y:
+            continue
+        less = x is None or (y is not None and x < y)
+        return (1 if less else -1) if descending else (-1 if less else 1)
+    return 0
+
+class Database:
+    """SQLite access layer holding one long-lived, tuned connection.
+
+    The connection is shared across threads behind a re-entrant lock and runs in
+    autocommit mode; writes are grouped explicitly with ``transaction()``.
+    """
+    # Schema steps applied in order by migrate(); the index is the resulting user_version - 1
+    MIGRATIONS = [
+        '_migrate_timeline_segments', '_migrate_typed_columns', '_migrate_notification_index',
+        '_migrate_activity_rows_codes', '_migrate_sort_indexes', '_migrate_summary_tables',
+        '_migrate_data_version', '_migrate_recurrences', '_migrate_load_by_status',
+    ]
+    # Batch size for copying rows during table rebuilds
+    MIGRATION_BATCH = 10000
+    # Rows per transaction for add_activities
+    WRITE_BATCH = 10000
+    # Page cache in KiB (negative PRAGMA value), memory-mapped I/O window in bytes
+    CACHE_SIZE_KIB = 64 * 1024
+    MMAP_SIZE = 256 * 1024 * 1024
+    # Number of compiled statements sqlite3 keeps around for reuse
+    STATEMENT_CACHE_SIZE = 256
+
+    def __init__(self, db_name: str) -> None:
+        self.db_name = db_name
+        self.conn = None
+        self._lock = threading.RLock()
+        self._savepoints = 0
+        self._transaction_thread = None
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._category_ids = {}
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_name,
+            factory=InstrumentedConnection,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.STATEMENT_CACHE_SIZE
+        )
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{self.CACHE_SIZE_KIB}")
+        conn.execute(f"PRAGMA mmap_size={self.MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def connect(self) -> sqlite3.Connection:
+        """Return the shared connection, opening and configuring it on first use."""
+        with self._lock:
+            if self.conn is None:
+                conn = self._open()
+                conn.execute("PRAGMA journal_mode=WAL")
+                self.conn = conn
+            return self.conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+            self._local = threading.local()
+
+    @contextmanager
+    def reading(self) -> Iterator[sqlite3.Connection]:
+        """Connection for read-only queries.
+
+        Each thread reads through a connection of its own, so a long query on a
+        worker thread never holds the lock the GUI thread needs; WAL lets those
+        readers run alongside the writer. Inside a transaction, and for in-memory
+        databases, reads go through the shared connection instead.
+        """
+        if self._transaction_thread == threading.get_ident() or self.db_name == ':memory:':
+            with self._lock:
+                yield self.connect()
+            return
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.connect()  # make sure the file is in WAL mode first
+            conn = self._local.conn = self._open()
+            with self._lock:
+                self._readers.append(conn)
+        yield conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run the enclosed statements as one commit.
+
+        Nested blocks become savepoints of the outer transaction, so helpers can
+        open their own block and still join a caller's bulk operation.
+        """
+        with self._lock:
+            conn = self.connect()
+            depth = self._savepoints
+            conn.execute("BEGIN" if depth == 0 else f"SAVEPOINT sp{depth}")
+            self._savepoints += 1
+            self._transaction_thread = threading.get_ident()
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK" if depth == 0 else f"ROLLBACK TO sp{depth}")
+                # Category codes registered inside the rolled back work no longer exist
+                self._category_ids = {}
+                if depth:
+                    conn.execute(f"RELEASE sp{depth}")
+                raise
+            else:
+                conn.execute("COMMIT" if depth == 0 else f"RELEASE sp{depth}")
+            finally:
+                self._savepoints = depth
+                if depth == 0:
+                    self._transaction_thread = None
+
+    def create_table(self) -> None:
+        """Create the original text-column table if needed, then migrate it to the current schema."""
+        with self.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS activities (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    category TEXT,
+                    activity TEXT,
+                    status TEXT,
+                    notification TEXT,
+                    timeline TEXT,
+                    deadline TEXT,
+                    priority TEXT,
+                    notes TEXT
+                )
+            """)
+        self.migrate()
+
+    @timed()
+    def migrate(self) -> None:
+        """Apply the schema steps in ``MIGRATIONS`` that this file has not seen yet.
+
+        ``PRAGMA user_version`` records how many steps have run; each step commits
+        together with its version bump. Space freed by table rebuilds is reclaimed
+        with a VACUUM afterwards.
+        """
+        with self._lock:
+            conn = self.connect()
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for target, step in enumerate(self.MIGRATIONS[version:], start=version + 1):
+                logging.info("Migrating %s to schema version %d (%s)", self.db_name, target, step)
+                with self.transaction() as conn:
+                    getattr(self, step)(conn)
+                    conn.execute(f"PRAGMA user_version = {target}")
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free_pages > conn.execute("PRAGMA page_count").fetchone()[0] // 4:
+                conn.execute("VACUUM")
+
+    def _migrate_timeline_segments(self, conn: sqlite3.Connection) -> None:
+        for statement in SEGMENTS_SCHEMA:
+            conn.execute(statement)
+        rows = conn.execute("SELECT id, timeline FROM activities WHERE id IS NOT NULL AND timeline != ''").fetchall()
+        conn.executemany(
+            "INSERT INTO timeline_segments (activity_id, start_day, end_day) VALUES (?, ?, ?)",
+            ((activity_id, start, end) for activity_id, timeline in rows for start, end in parse_timeline(timeline))
+        )
+        conn.execute("ANALYZE timeline_segments")
+
+    def _migrate_typed_columns(self, conn: sqlite3.Connection) -> None:
+        """Rebuild activities with integer codes and dates, lookup tables and indexes."""
+        for statement in TYPED_SCHEMA:
+            conn.execute(statement)
+        conn.executemany("INSERT OR IGNORE INTO statuses (id, name) VALUES (?, ?)", enumerate(STATUSES))
+        conn.executemany("INSERT OR IGNORE INTO priorities (id, name) VALUES (?, ?)", enumerate(PRIORITIES))
+        conn.executemany("INSERT OR IGNORE INTO categories (name) VALUES (?)", ((name,) for name in CATEGORIES))
+        self._category_ids = {}
+        # The old full-text index and its triggers point at the text columns
+        for trigger in ('activities_fts_insert', 'activities_fts_delete', 'activities_fts_update'):
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.execute("DROP TABLE IF EXISTS activities_fts")
+
+        # Copy rows over in batches, keeping ids; rows without a usable id (as written by
+        # older CSV imports) are added at the end with fresh ones
+        insert = f"INSERT INTO activities_typed ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        seen_ids, deferred = set(), []
+        cursor = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM activities ORDER BY id")
+        while True:
+            batch = cursor.fetchmany(self.MIGRATION_BATCH)
+            if not batch:
+                break
+            rows = []
+            for row in batch:
+                activity = dict(zip(COLUMNS, row))
+                values = self.encode_activity(conn, activity, strict=False)
+                if isinstance(activity['id'], int) and activity['id'] not in seen_ids:
+                    seen_ids.add(activity['id'])
+                    rows.append((activity['id'],) + values)
+                else:
+                    deferred.append((None,) + values)
+            conn.executemany(insert, rows)
+        conn.executemany(insert, deferred)
+        conn.execute("DROP TABLE activities")
+        conn.execute("ALTER TABLE activities_typed RENAME TO activities")
+
+        for statement in TYPED_INDEXES + FTS_SCHEMA + SEGMENTS_SCHEMA:
+            conn.execute(statement)
+        conn.execute("INSERT INTO activities_fts(activities_fts) VALUES ('rebuild')")
+        # Ids may have been reassigned, so derive the segments again
+        conn.execute("DELETE FROM timeline_segments")
+        rows = conn.execute("SELECT id, timeline FROM activities WHERE timeline != ''").fetchall()
+        conn.executemany(
+            "INSERT INTO timeline_segments (activity_id, start_day, end_day) VALUES (?, ?, ?)",
+            ((activity_id, start, end) for activity_id, timeline in rows for start, end in parse_timeline(timeline))
+        )
+        conn.execute("ANALYZE")
+
+    def _migrate_notification_index(self, conn: sqlite3.Connection) -> None:
+        # Ordered by (notification, id) through the implicit rowid, which the scheduler pages on
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_activities_notification ON activities (notification)")
+
+    def _migrate_activity_rows_codes(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DROP VIEW IF EXISTS activity_rows")
+        conn.execute(ACTIVITY_ROWS_VIEW)
+
+    def _migrate_sort_indexes(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DROP VIEW IF EXISTS activity_rows")
+        conn.execute(ACTIVITY_ROWS_VIEW)
+        # Together with the deadline and notification indexes these cover every SORT_KEYS column;
+        # the implicit trailing rowid makes each one a (key, id) index for keyset paging
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_activities_activity ON activities (activity)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_activities_status ON activities (status)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_activities_priority ON activities (priority)")
+
+    def _migrate_summary_tables(self, conn: sqlite3.Connection) -> None:
+        for statement in SUMMARY_SCHEMA:
+            conn.execute(statement)
+        # Seed the totals once; from here on the triggers keep them current
+        conn.execute("""
+            INSERT INTO summary_counts
+            SELECT IFNULL(category, 0), status, priority, COUNT(*) FROM activities GROUP BY 1, 2, 3
+        """)
+        conn.execute("""
+            INSERT INTO summary_deadlines
+            SELECT deadline, status, COUNT(*) FROM activities WHERE deadline IS NOT NULL GROUP BY 1, 2
+        """)
+        conn.execute("""
+            INSERT INTO summary_load
+            SELECT day, SUM(delta) FROM (
+                SELECT start_day AS day, 1 AS delta FROM timeline_segments
+                UNION ALL
+                SELECT end_day + 1, -1 FROM timeline_segments
+            ) GROUP BY day
+        """)
+
+    def _migrate_data_version(self, conn: sqlite3.Connection) -> None:
+        for statement in VERSION_SCHEMA:
+            conn.execute(statement)
+
+    def _migrate_recurrences(self, conn: sqlite3.Connection) -> None:
+        for statement in RECURRENCE_SCHEMA:
+            conn.execute(statement)
+
+    def _migrate_load_by_status(self, conn: sqlite3.Connection) -> None:
+        for statement in LOAD_BY_STATUS_SCHEMA:
+            conn.execute(statement)
+        conn.execute("""
+            INSERT INTO summary_load
+            SELECT day, status, SUM(delta) FROM (
+                SELECT s.start_day AS day, a.status, 1 AS delta
+                FROM timeline_segments s JOIN activities a ON a.id = s.activity_id
+                UNION ALL
+                SELECT s.end_day + 1, a.status, -1
+                FROM timeline_segments s JOIN activities a ON a.id = s.activity_id
+            ) GROUP BY day, status
+        """)
+
+    def category_id(self, conn: sqlite3.Connection, name: Optional[str]) -> Optional[int]:
+        """Return the code for a category name, registering new names on first use."""
+        if is_blank(name):
+            return None
+        code = self._category_ids.get(name)
+        if code is None:
+            conn.execute("INSERT OR IGNORE INTO categories (name) VALUES (?)", (name,))
+            code = conn.execute("SELECT id FROM categories WHERE name = ?", (name,)).fetchone()[0]
+            self._category_ids[name] = code
+        return code
+
+    def encode_activity(self, conn: sqlite3.Connection, activity: dict, strict: bool = True) -> tuple:
+        """Convert an activity dict of display strings into the typed column values.
+
+        With ``strict`` unknown statuses/priorities and unparseable dates raise
+        ValueError; otherwise they fall back to the defaults/NULL with a warning,
+        which is what migrating old free-text rows needs.
+        """
+        def lookup(values: List[str], value, default: int) -> int:
+            if value in values:
+                return values.index(value)
+            if strict and not is_blank(value):
+                raise ValueError(f"Unknown value {value!r}, expected one of {values}")
+            if not is_blank(value):
+                logging.warning("Replacing unknown value %r with %r", value, values[default])
+            return default
+
+        def convert(parse, value) -> Optional[int]:
+            if is_blank(value):
+                return None
+            try:
+                return parse(str(value).strip())
+            except ValueError:
+                if strict:
+                    raise
+                logging.warning("Dropping unparseable date %r", value)
+                return None
+
+        return (
+            self.category_id(conn, activity['category']),
+            activity['activity'],
+            lookup(STATUSES, activity['status'], 0),
+            convert(to_epoch_seconds, activity['notification']),
+            None if is_blank(activity['timeline']) else activity['timeline'],
+            convert(lambda value: to_epoch_day(value[:10]), activity['deadline']),
+            lookup(PRIORITIES, activity['priority'], 1),
+            activity['notes'],
+        )
+
+    def encode_fields(self, conn: sqlite3.Connection, fields: dict) -> dict:
+        """Typed values for some of an activity's columns given as display strings, validated as in ``encode_activity``."""
+        unknown = set(fields) - set(COLUMNS[1:])
+        if unknown:
+            raise ValueError(f"Unknown column(s) {sorted(unknown)}, expected some of {COLUMNS[1:]}")
+        values = self.encode_activity(conn, {**dict.fromkeys(COLUMNS), **fields})
+        return {column: values[COLUMNS.index(column) - 1] for column in fields}
+
+    @staticmethod
+    def _stage_ids(conn: sqlite3.Connection, activity_ids: Iterable[int]) -> None:
+        """Replace the ids in ``temp.ids_staging``, which bulk edits select by, dropping duplicates."""
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS ids_staging (id INTEGER PRIMARY KEY)")
+        conn.execute("DELETE FROM temp.ids_staging")
+        conn.executemany("INSERT OR IGNORE INTO temp.ids_staging VALUES (?)", ((i,) for i in activity_ids))
+
+    @staticmethod
+    def _staged_rows(conn: sqlite3.Connection, columns: Iterable[str]) -> List[tuple]:
+        """``(id, *columns)`` rows of the raw activities table for the staged ids that exist, in id order."""
+        return conn.execute(
+            f"SELECT {', '.join(['id', *columns])} FROM activities WHERE id IN temp.ids_staging ORDER BY id"
+        ).fetchall()
+
+    def _reanchor(self, conn: sqlite3.Connection) -> None:
+        """Recompute the anchor of the repeating activities among the staged ids after their dates changed."""
+        rows = conn.execute("""
+            SELECT id, notification, timeline, deadline FROM activities
+            WHERE id IN temp.ids_staging AND id IN (SELECT activity_id FROM recurrences)
+        """).fetchall()
+        conn.executemany(
+            "UPDATE recurrences SET anchor = ? WHERE activity_id = ?",
+            [(self.recurrence_anchor(*row[1:]), row[0]) for row in rows]
+        )
+
+    @staticmethod
+    def _insert_segments(conn: sqlite3.Connection, rows: Iterable[Tuple[int, Optional[str]]]) -> None:
+        """Write the segments of ``(activity_id, timeline)`` pairs with a single INSERT ... SELECT.
+
+        Row-by-row inserts run the summary_load upsert trigger as separate statements,
+        each journalled on its own, which inside a caller's savepoint grows with the table.
+        """
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS segments_staging (activity_id, start_day, end_day)")
+        conn.executemany(
+            "INSERT INTO temp.segments_staging VALUES (?, ?, ?)",
+            ((activity_id, start, end) for activity_id, timeline in rows if timeline
+             for start, end in parse_timeline(timeline))
+        )
+        conn.execute("""
+            INSERT INTO timeline_segments (activity_id, start_day, end_day)
+            SELECT activity_id, start_day, end_day FROM temp.segments_staging
+        """)
+        conn.execute("DELETE FROM temp.segments_staging")
+
+    def _write_segments(self, conn: sqlite3.Connection, activity_id: int, timeline: Optional[str]) -> None:
+        conn.execute("DELETE FROM timeline_segments WHERE activity_id = ?", (activity_id,))
+        conn.executemany(
+            "INSERT INTO timeline_segments (activity_id, start_day, end_day) VALUES (?, ?, ?)",
+            ((activity_id, start, end) for start, end in parse_timeline(timeline))
+        )
+
+    @staticmethod
+    def recurrence_anchor(notification: Optional[int], timeline: Optional[str], deadline: Optional[int]) -> int:
+        """Day a repeating activity's occurrences are counted from, given its typed values.
+
+        That is its deadline, else its notification date, else the start of its
+        first timeline segment; an activity with none of them cannot repeat.
+        """
+        if deadline is not None:
+            return deadline
+        if notification is not None:
+            return notification // 86400
+        segments = parse_timeline(timeline)
+        if not segments:
+            raise ValueError("A repeating activity needs a deadline, notification or timeline to repeat from")
+        return min(start for start, _ in segments)
+
+    def _write_recurrence(self, conn: sqlite3.Connection, activity_id: int, rule: Optional["Rule"],
+                          anchor: Optional[int]) -> None:
+        conn.execute("DELETE FROM recurrences WHERE activity_id = ?", (activity_id,))
+        conn.execute("DELETE FROM recurrence_exceptions WHERE activity_id = ?", (activity_id,))
+        if rule is None:
+            return
+        conn.execute(
+            "INSERT INTO recurrences (activity_id, frequency, interval, until, count, anchor) VALUES (?, ?, ?, ?, ?, ?)",
+            (activity_id, rule.frequency, rule.interval, rule.until, rule.count, anchor)
+        )
+        conn.executemany(
+            "INSERT INTO recurrence_exceptions (activity_id, day) VALUES (?, ?)",
+            ((activity_id, day) for day in sorted(rule.exceptions))
+        )
+
+    def set_recurrence(self, activity_id: int, rule: Optional["Rule"]) -> None:
+        """Make an activity repeat by ``rule`` from its current dates, or stop it repeating with None."""
+        with self.transaction() as conn:
+            row = conn.execute(
+                "SELECT notification, timeline, deadline FROM activities WHERE id = ?", (activity_id,)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"No activity with id {activity_id}")
+            self._write_recurrence(conn, activity_id, rule, self.recurrence_anchor(*row) if rule else None)
+
+    def _recurrences(self, conn: sqlite3.Connection, activity_ids: Optional[List[int]] = None) -> dict:
+        from planner_recurrence import Rule
+
+        where, params = '', []
+        if activity_ids is not None:
+            where, params = f" WHERE activity_id IN ({', '.join('?' * len(activity_ids))})", list(activity_ids)
+        exceptions = {}
+        for activity_id, day in conn.execute(f"SELECT activity_id, day FROM recurrence_exceptions{where}", params):
+            exceptions.setdefault(activity_id, []).append(day)
+        return {
+            activity_id: (Rule(frequency, interval, until, count, frozenset(exceptions.get(activity_id, ()))), anchor)
+            for activity_id, frequency, interval, until, count, anchor in conn.execute(
+                f"SELECT activity_id, frequency, interval, until, count, anchor FROM recurrences{where}", params
+            )
+        }
+
+    def recurrences(self, activity_ids: Optional[Iterable[int]] = None) -> dict:
+        """Map repeating activity ids to ``(Rule, anchor day)``, for all of them or just ``activity_ids``.
+
+        Pass at most a few hundred ids at a time.
+        """
+        with self.reading() as conn:
+            return self._recurrences(conn, None if activity_ids is None else list(activity_ids))
+
+    def _recurring_segments(self, conn: sqlite3.Connection, start_day: int, end_day: int) -> Iterator[Tuple[int, int, int]]:
+        """Yield ``(activity_id, start_day, end_day)`` for the repeated timeline segments overlapping the range."""
+        from planner_recurrence import occurrence_days
+
+        segments = conn.execute("""
+            SELECT s.activity_id, s.start_day, s.end_day
+            FROM recurrences r JOIN timeline_segments s ON s.activity_id = r.activity_id
+        """).fetchall()
+        if not segments:
+            return
+        rules = self._recurrences(conn)
+        for activity_id, start, end in segments:
+            rule, anchor = rules[activity_id]
+            # An occurrence on day d covers d + (start - anchor) .. d + (end - anchor)
+            for day in occurrence_days(rule, anchor, start_day - (end - anchor), end_day - (start - anchor)):
+                yield activity_id, day + start - anchor, day + end - anchor
+
+    @staticmethod
+    def _recurring_deadlines(rules: dict, series: Iterable[Tuple[int, Optional[int]]], start_day: int,
+                             end_day: int) -> List[Tuple[int, int]]:
+        """Return ``(activity_id, day)`` for the repeated deadlines of ``(activity_id, deadline)`` series in the range."""
+        from planner_recurrence import occurrence_days
+
+        days = []
+        for activity_id, deadline in series:
+            if deadline is None:
+                continue
+            rule, anchor = rules[activity_id]
+            offset = deadline - anchor
+            days += [(activity_id, day + offset)
+                     for day in occurrence_days(rule, anchor, start_day - offset, end_day - offset)]
+        return days
+
+    @timed(rows=len)
+    def upcoming_notifications(self, after: Tuple[int, int], limit: int) -> List[Tuple[int, int, str]]:
+        """Return ``(notification, id, activity)`` rows strictly after the ``(notification, id)`` key, in order.
+
+        Repeating activities contribute one row per occurrence, generated lazily
+        and merged with the one-off rows, so a window costs ``limit`` rows however
+        far the series run.
+        """
+        with self.reading() as conn:
+            rows = conn.execute("""
+                SELECT notification, id, activity FROM activities
+                WHERE (notification, id) > (?, ?) AND id NOT IN (SELECT activity_id FROM recurrences)
+                ORDER BY notification, id LIMIT ?
+            """, (*after, limit)).fetchall()
+            series = conn.execute("""
+                SELECT a.id, a.activity, a.notification FROM recurrences r JOIN activities a ON a.id = r.activity_id
+                WHERE a.notification IS NOT NULL
+            """).fetchall()
+            rules = self._recurrences(conn) if series else {}
+        if not series:
+            return rows
+
+        from planner_recurrence import occurrence_days
+
+        def repeats(activity_id: int, title: str, notification: int) -> Iterator[Tuple[int, int, str]]:
+            rule, anchor = rules[activity_id]
+            first = anchor + (after[0] - notification) // 86400
+            for day in occurrence_days(rule, anchor, first):
+                when = notification + (day - anchor) * 86400
+                if (when, activity_id) > after:
+                    yield when, activity_id, title
+
+        return list(islice(heapq.merge(rows, *(repeats(*row) for row in series)), limit))
+
+    @timed(rows=len)
+    def active_between(self, start_date: str, end_date: str) -> List[int]:
+        """Return the ids of activities with a timeline segment overlapping the ISO date range, repeats included."""
+        start_day, end_day = to_epoch_day(start_date), to_epoch_day(end_date)
+        with self.reading() as conn:
+            rows = conn.execute(
+                "SELECT activity_id FROM timeline_segments WHERE start_day <= ? AND end_day >= ?", (end_day, start_day)
+            ).fetchall()
+            repeated = [row[0] for row in self._recurring_segments(conn, start_day, end_day)]
+        # De-duplicate here: DISTINCT in SQL steers the planner off the range indexes
+        return list(dict.fromkeys([row[0] for row in rows] + repeated))
+
+    @staticmethod
+    def search_expression(text: str) -> Optional[str]:
+        """Turn free text into an FTS5 query that prefix-matches every word, or None if empty."""
+        terms = re.findall(r'\w+', text)
+        if not terms:
+            return None
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    @timed(rows=lambda ids: len(ids) if ids is not None else 0)
+    def search_ids(self, text: str) -> Optional[List[int]]:
+        """Return the ids matching ``text`` in ascending order, or None when there is nothing to search for."""
+        expression = self.search_expression(text)
+        if expression is None:
+            return None
+        with self.reading() as conn:
+            rows = conn.execute(
+                "SELECT rowid FROM activities_fts WHERE activities_fts MATCH ? ORDER BY rowid", (expression,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def matches_search(self, activity_id: int, text: str) -> bool:
+        expression = self.search_expression(text)
+        if expression is None:
+            return True
+        with self.reading() as conn:
+            return conn.execute(
+                "SELECT 1 FROM activities_fts WHERE activities_fts MATCH ? AND rowid = ?", (expression, activity_id)
+            ).fetchone() is not None
+
+    @timed(rows=len)
+    def load_data(self, columns: Optional[List[str]] = None, filters: Optional[dict] = None,
+                  order_by: Optional[List[str]] = None) -> "pd.DataFrame":
+        """Load the matching activities into a DataFrame; see ``query_activities`` for the arguments."""
+        import pandas as pd
+
+        rows, _ = self.query_activities(columns, filters, order_by)
+        return pd.DataFrame(rows, columns=list(columns or COLUMNS))
+
+    def data_version(self) -> int:
+        """Counter that grows with every committed change to activities; equal values mean equal data."""
+        with self.reading() as conn:
+            return conn.execute("SELECT version FROM data_version").fetchone()[0]
+
+    @timed(rows=len)
+    def load_timelines(self, start_date: str, end_date: str) -> "pd.DataFrame":
+        """Load the timeline segments overlapping ``start_date``..``end_date`` (ISO dates).
+
+        Returns one row per segment with the activity name, its status and the
+        segment bounds as epoch days; repeating activities get a row for each
+        occurrence of their segments that falls in the range.
+        """
+        import pandas as pd
+
+        start_day, end_day = to_epoch_day(start_date), to_epoch_day(end_date)
+        with self.reading() as conn:
+            df = pd.read_sql_query("""
+                SELECT a.activity, a.status, s.start_day, s.end_day
+                FROM timeline_segments s JOIN activity_rows a ON a.id = s.activity_id
+                WHERE s.start_day <= ? AND s.end_day >= ? AND s.activity_id NOT IN (SELECT activity_id FROM recurrences)
+            """, conn, params=(end_day, start_day))
+            repeated = list(self._recurring_segments(conn, start_day, end_day))
+            if not repeated:
+                return df
+            names = {row[0]: row[1:] for row in conn.execute(
+                "SELECT a.id, a.activity, a.status FROM recurrences r JOIN activity_rows a ON a.id = r.activity_id"
+            )}
+        occurrences = pd.DataFrame(
+            [(*names[activity_id], start, end) for activity_id, start, end in repeated], columns=df.columns
+        )
+        return pd.concat([df, occurrences], ignore_index=True)
+
+    @timed()
+    def summary(self, today: Optional[int] = None, days: int = 7) -> dict:
+        """Dashboard figures, read from the trigger-maintained summary tables.
+
+        ``today`` is an epoch day and defaults to the local date. Returns ``total``;
+        counts ``by_status``, ``by_priority`` and ``by_category`` (None for no
+        category, largest first); ``overdue``, the open activities whose deadline
+        has passed; ``completion_by_month`` as ``(YYYY-MM, completed, total)`` rows
+        by deadline month; and ``upcoming`` as ``(date, due, active)`` rows for the
+        next ``days`` days, counting open deadlines and the timeline segments
+        covering each day. The cost depends on the number of distinct days and
+        categories, not on the number of activities.
+        """
+        if today is None:
+            today = date.today().toordinal() - EPOCH_ORDINAL
+        completed = STATUSES.index('Completed')
+        last = today + days - 1
+        with self.reading() as conn:
+            counts = conn.execute("SELECT category, status, priority, count FROM summary_counts WHERE count > 0").fetchall()
+            names = dict(conn.execute("SELECT id, name FROM categories"))
+            overdue = conn.execute(
+                "SELECT IFNULL(SUM(count), 0) FROM summary_deadlines WHERE deadline < ? AND status != ?",
+                (today, completed)
+            ).fetchone()[0]
+            months = conn.execute("""
+                SELECT strftime('%Y-%m', deadline * 86400, 'unixepoch') AS month,
+                       SUM(CASE WHEN status = ? THEN count ELSE 0 END), SUM(count)
+                FROM summary_deadlines GROUP BY month HAVING SUM(count) > 0 ORDER BY month
+            """, (completed,)).fetchall()
+            due = dict(conn.execute(
+                "SELECT deadline, SUM(count) FROM summary_deadlines WHERE deadline BETWEEN ? AND ? AND status != ? "
+                "GROUP BY deadline", (today, last, completed)
+            ))
+            active = conn.execute("SELECT IFNULL(SUM(delta), 0) FROM summary_load WHERE day <= ?", (today,)).fetchone()[0]
+            deltas = dict(conn.execute(
+                "SELECT day, SUM(delta) FROM summary_load WHERE day BETWEEN ? AND ? GROUP BY day", (today + 1, last)
+            ))
+
+        by_status, by_priority, by_category = dict.fromkeys(STATUSES, 0), dict.fromkeys(PRIORITIES, 0), {}
+        for category, status, priority, count in counts:
+            by_status[STATUSES[status]] += count
+            by_priority[PRIORITIES[priority]] += count
+            name = names.get(category)
+            by_category[name] = by_category.get(name, 0) + count
+        upcoming = []
+        for day in range(today, last + 1):
+            active += deltas.get(day, 0)
+            upcoming.append((from_epoch_day(day).isoformat(), due.get(day, 0), active))
+        return {
+            'total': sum(by_status.values()),
+            'by_status': by_status,
+            'by_priority': by_priority,
+            'by_category': dict(sorted(by_category.items(), key=lambda item: -item[1])),
+            'overdue': overdue,
+            'completion_by_month': months,
+            'upcoming': upcoming,
+        }
+
+    @timed()
+    def day_counts(self, start_day: int, end_day: int) -> dict:
+        """Per-day figures for ``start_day``..``end_day`` (epoch days), read from the summary tables.
+
+        Returns ``load`` as ``(day, status, delta)`` rows, the change in the number
+        of timeline segments covering each day, with everything before the range
+        folded into its first day so that running sums give the count on each day;
+        ``due`` as ``(day, status, count)`` deadline rows; and ``segments`` as
+        ``(start_day, end_day, status, sign)`` rows to add to or take from ``load``.
+        The tables hold each repeating activity once, as its first occurrence, so
+        ``segments`` and ``due`` swap that for its occurrences in the range. Rows
+        may repeat a key; callers add them up.
+        """
+        with self.reading() as conn:
+            load = conn.execute("""
+                SELECT MAX(day, ?) AS first, status, SUM(delta) FROM summary_load WHERE day <= ?
+                GROUP BY first, status HAVING SUM(delta) != 0
+            """, (start_day, end_day)).fetchall()
+            due = conn.execute(
+                "SELECT deadline, status, count FROM summary_deadlines WHERE deadline BETWEEN ? AND ? AND count != 0",
+                (start_day, end_day)
+            ).fetchall()
+            series = conn.execute(
+                "SELECT a.id, a.status, a.deadline FROM recurrences r JOIN activities a ON a.id = r.activity_id"
+            ).fetchall()
+            if not series:
+                return {'load': load, 'due': due, 'segments': []}
+            statuses = {activity_id: status for activity_id, status, _ in series}
+            base = conn.execute(
+                "SELECT s.activity_id, s.start_day, s.end_day "
+                "FROM recurrences r JOIN timeline_segments s ON s.activity_id = r.activity_id"
+            ).fetchall()
+            segments = [(start, end, statuses[activity_id], -1) for activity_id, start, end in base]
+            segments += [(start, end, statuses[activity_id], 1)
+                         for activity_id, start, end in self._recurring_segments(conn, start_day, end_day)]
+            rules = self._recurrences(conn)
+        due += [(deadline, status, -1) for _, status, deadline in series
+                if deadline is not None and start_day <= deadline <= end_day]
+        due += [(day, statuses[activity_id], 1) for activity_id, day in self._recurring_deadlines(
+            rules, [(activity_id, deadline) for activity_id, _, deadline in series], start_day, end_day
+        )]
+        return {'load': load, 'due': due, 'segments': segments}
+
+    @timed()
+    def conflict_inputs(self, start_day: int, end_day: int, activity_ids: Optional[Iterable[int]] = None) -> dict:
+        """Open activities' timeline segments and deadlines within ``start_day``..``end_day``, for planner_conflicts.
+
+        Returns ``segments`` as ``(activity_id, start_day, end_day, priority)`` rows
+        overlapping the range and ``deadlines`` as ``(activity_id, day)`` rows in it,
+        repeating activities contributing one row per occurrence. Completed
+        activities are left out. ``activity_ids`` narrows the rows down to those
+        activities; pass at most a few hundred.
+        """
+        completed = STATUSES.index('Completed')
+        where, params = '', []
+        if activity_ids is not None:
+            activity_ids = list(activity_ids)
+            where, params = f" AND a.id IN ({', '.join('?' * len(activity_ids))})", activity_ids
+        with self.reading() as conn:
+            segments = conn.execute(f"""
+                SELECT s.activity_id, s.start_day, s.end_day, a.priority
+                FROM timeline_segments s JOIN activities a ON a.id = s.activity_id
+                WHERE s.start_day <= ? AND s.end_day >= ? AND a.status != ?
+                  AND s.activity_id NOT IN (SELECT activity_id FROM recurrences){where}
+            """, (end_day, start_day, completed, *params)).fetchall()
+            deadlines = conn.execute(f"""
+                SELECT a.id, a.deadline FROM activities a
+                WHERE a.deadline BETWEEN ? AND ? AND a.status != ? AND a.id NOT IN (SELECT activity_id FROM recurrences){where}
+            """, (start_day, end_day, completed, *params)).fetchall()
+            series = conn.execute(f"""
+                SELECT a.id, a.priority, a.deadline FROM recurrences r JOIN activities a ON a.id = r.activity_id
+                WHERE a.status != ?{where}
+            """, (completed, *params)).fetchall()
+            if not series:
+                return {'segments': segments, 'deadlines': deadlines}
+            priorities = {activity_id: priority for activity_id, priority, _ in series}
+            segments += [(activity_id, start, end, priorities[activity_id])
+                         for activity_id, start, end in self._recurring_segments(conn, start_day, end_day)
+                         if activity_id in priorities]
+            rules = self._recurrences(conn, list(priorities) if activity_ids is not None else None)
+        deadlines += self._recurring_deadlines(
+            rules, [(activity_id, deadline) for activity_id, _, deadline in series], start_day, end_day
+        )
+        return {'segments': segments, 'deadlines': deadlines}
+
+    @staticmethod
+    def filter_clause(filters: Optional[dict]) -> Tuple[str, list]:
+        """Build a WHERE clause over ``activity_rows`` from optional filters.
+
+        Supported keys: ``start_date``/``end_date`` (ISO dates, inclusive, on the
+        deadline), ``status``, ``priority`` and ``category`` (a name or a list of
+        names) and ``search`` (free text matched through the full-text index).
+        Conditions use the raw code columns so they can be index scans.
+        """
+        conditions, params = [], []
+        filters = filters or {}
+        if filters.get('start_date'):
+            conditions.append("deadline_day >= ?")
+            params.append(to_epoch_day(filters['start_date']))
+        if filters.get('end_date'):
+            conditions.append("deadline_day <= ?")
+            params.append(to_epoch_day(filters['end_date']))
+        for key, values in (('status', STATUSES), ('priority', PRIORITIES)):
+            if filters.get(key):
+                names = [filters[key]] if isinstance(filters[key], str) else list(filters[key])
+                unknown = set(names) - set(values)
+                if unknown:
+                    raise ValueError(f"Unknown {key} value(s) {sorted(unknown)}, expected one of {values}")
+                conditions.append(f"{key}_code IN ({', '.join('?' * len(names))})")
+                params.extend(values.index(name) for name in names)
+        if filters.get('category'):
+            names = [filters['category']] if isinstance(filters['category'], str) else list(filters['category'])
+            conditions.append(f"category_code IN (SELECT id FROM categories WHERE name IN ({', '.join('?' * len(names))}))")
+            params.extend(names)
+        expression = Database.search_expression(filters.get('search') or '')
+        if expression is not None:
+            conditions.append("id IN (SELECT rowid FROM activities_fts WHERE activities_fts MATCH ?)")
+            params.append(expression)
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    @timed()
+    def count_activities(self, filters: Optional[dict] = None) -> int:
+        where, params = self.filter_clause(filters)
+        with self.reading() as conn:
+            if not where:
+                return conn.execute("SELECT COUNT(*) FROM activities").fetchone()[0]
+            return conn.execute(f"SELECT COUNT(*) FROM activity_rows{where}", params).fetchone()[0]
+
+    def iter_activities(self, filters: Optional[dict] = None, chunk_size: int = 10000) -> Iterator[List[tuple]]:
+        """Stream matching rows in ``COLUMNS`` order and id order, ``chunk_size`` rows at a time.
+
+        Rows come from a single cursor on this thread's read connection, so memory
+        stays bounded by the chunk size however many rows match.
+        """
+        where, params = self.filter_clause(filters)
+        with self.reading() as conn:
+            cursor = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM activity_rows{where} ORDER BY id", params)
+            try:
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def sort_keys(order_by: Optional[List[str]]) -> List[Tuple[str, bool]]:
+        """Turn column names such as ``['deadline', '-priority']`` into ``(column, descending)`` pairs.
+
+        A leading '-' sorts descending. The id is appended as the final tie-breaker,
+        in the direction of the last key so a single (key, id) index serves the order.
+        """
+        keys = []
+        for name in order_by or []:
+            column = name.lstrip('-')
+            if column not in SORT_KEYS:
+                raise ValueError(f"Cannot sort by {column!r}, expected one of {list(SORT_KEYS)}")
+            keys.append((SORT_KEYS[column], name.startswith('-')))
+            if column == 'id':
+                # Ids are unique, so nothing after them can change the order
+                return keys
+        return keys + [('id', keys[-1][1] if keys else False)]
+
+    @staticmethod
+    def keyset_segments(keys: List[Tuple[str, bool]], after: Optional[tuple]) -> List[Tuple[str, list]]:
+        """Return the conditions selecting the rows strictly after the ``after`` key, in sort order.
+
+        NULLs sort first ascending and last descending, as SQLite orders them. The
+        rows left are split into consecutive runs: the rest of the cursor's own
+        first-key value, then the values beyond it (and the NULLs, where they come
+        last). Each run starts with an equality, range or IS NULL test on the first
+        key, so it is a range scan in that key's index rather than a scan from the top.
+        """
+        if after is None:
+            return [('', [])]
+
+        def beyond(column: str, descending: bool, value) -> Tuple[str, list]:
+            if value is None:
+                return ('0', []) if descending else (f"{column} IS NOT NULL", [])
+            if descending and column != 'id':
+                return f"({column} < ? OR {column} IS NULL)", [value]
+            # The id is never NULL; a bare comparison keeps it a rowid range inside the first key's index
+            return f"{column} {'<' if descending else '>'} ?", [value]
+
+        # Lexicographic "strictly after" over the keys after the first, built from the last key outwards
+        clause, params = None, []
+        for (column, descending), value in reversed(list(zip(keys[1:], after[1:]))):
+            condition, args = beyond(column, descending, value)
+            if clause is not None:
+                condition, args = f"({condition} OR ({column} IS ? AND {clause}))", args + [value] + params
+            clause, params = condition, args
+
+        column, descending = keys[0]
+        value = after[0]
+        if clause is None:
+            # Sorting by id alone: a single range
+            return [beyond(column, descending, value)]
+        if value is None:
+            segments = [(f"{column} IS NULL AND {clause}", params)]
+            if not descending:
+                segments.append((f"{column} IS NOT NULL", []))
+            return segments
+        segments = [(f"{column} = ? AND {clause}", [value] + params),
+                    (f"{column} {'<' if descending else '>'} ?", [value])]
+        if descending:
+            segments.append((f"{column} IS NULL", []))
+        return segments
+
+    @timed(rows=lambda result: len(result[0]))
+    def query_activities(self, columns: Optional[List[str]] = None, filters: Optional[dict] = None,
+                         order_by: Optional[List[str]] = None, after: Optional[tuple] = None,
+                         limit: Optional[int] = None) -> Tuple[List[tuple], List[tuple]]:
+        """Run a filtered, sorted, projected query over the activities, one keyset page at a time.
+
+        ``columns`` picks the returned columns (default ``COLUMNS``), ``filters`` is as
+        for ``filter_clause`` and ``order_by`` as for ``sort_keys``. Returns the rows and
+        each row's sort key; pass the last key back as ``after`` to get the next page,
+        which costs the same however deep into the table it is.
+        """
+        columns = list(columns or COLUMNS)
+        unknown = set(columns) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown column(s) {sorted(unknown)}, expected some of {COLUMNS}")
+        keys = self.sort_keys(order_by)
+        where, params = self.filter_clause(filters)
+        select = f"SELECT {', '.join(columns + [column for column, _ in keys])} FROM activity_rows"
+        order = " ORDER BY " + ', '.join(f"{column} {'DESC' if descending else 'ASC'}" for column, descending in keys)
+        rows = []
+        with self.reading() as conn:
+            for segment, segment_params in self.keyset_segments(keys, after):
+                if limit is not None and len(rows) >= limit:
+                    break
+                conditions = where + (" AND " if where else " WHERE ") + segment if segment else where
+                page = f" LIMIT {limit - len(rows)}" if limit is not None else ""
+                rows.extend(conn.execute(select + conditions + order + page, params + segment_params).fetchall())
+        return [row[:len(columns)] for row in rows], [row[len(columns):] for row in rows]
+
+    def sort_key(self, activity_id: int, order_by: Optional[List[str]]) -> Optional[tuple]:
+        """Return an activity's key under ``order_by``, in the form ``query_activities`` reports it."""
+        columns = ', '.join(column for column, _ in self.sort_keys(order_by))
+        with self.reading() as conn:
+            return conn.execute(f"SELECT {columns} FROM activity_rows WHERE id = ?", (activity_id,)).fetchone()
+
+    @timed(rows=len)
+    def fetch_activities(self, after_id: Optional[int], limit: int) -> List[tuple]:
+        """Return up to ``limit`` rows with an id greater than ``after_id``, in id order."""
+        with self.reading() as conn:
+            return conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM activity_rows WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id if after_id is not None else -1, limit)
+            ).fetchall()
+
+    @timed(rows=len)
+    def fetch_activities_by_ids(self, activity_ids: List[int]) -> List[tuple]:
+        """Return the rows for ``activity_ids`` (at most a few hundred at a time), in id order."""
+        placeholders = ', '.join('?' * len(activity_ids))
+        with self.reading() as conn:
+            return conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM activity_rows WHERE id IN ({placeholders}) ORDER BY id",
+                list(activity_ids)
+            ).fetchall()
+
+    @timed(rows=lambda row: 1)
+    def add_activity(self, activity: dict) -> tuple:
+        """Insert an activity given as display strings and return the stored row in ``COLUMNS`` order.
+
+        An optional ``recurrence`` key holds a rule for ``planner_recurrence.parse_rule``.
+        """
+        from planner_recurrence import parse_rule
+
+        rule = parse_rule(activity.get('recurrence'))
+        with self.transaction() as conn:
+            encoded = self.encode_activity(conn, activity)
+            cursor = conn.execute("""
+                INSERT INTO activities (category, activity, status, notification, timeline, deadline, priority, notes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, encoded)
+            self._write_segments(conn, cursor.lastrowid, activity['timeline'])
+            if rule is not None:
+                self._write_recurrence(conn, cursor.lastrowid, rule, self.recurrence_anchor(*encoded[3:6]))
+            return conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM activity_rows WHERE id = ?", (cursor.lastrowid,)
+            ).fetchone()
+
+    @timed(rows=int)
+    def add_encoded_activities(self, rows: List[tuple], upsert: bool = False,
+                               rules: Optional[List[Optional["Rule"]]] = None) -> int:
+        """Bulk-insert rows that are already in typed ``COLUMNS`` order, in one transaction.
+
+        Rows whose id is None get the next free ids. With ``upsert`` rows carrying an
+        existing id replace it instead of failing. ``rules`` optionally gives each
+        row a recurrence rule (or None). Returns the number of rows written.
+        """
+        columns = ', '.join(COLUMNS)
+        # Rows are staged in a temp table and moved with one INSERT ... SELECT: the FTS trigger then
+        # runs inside a single statement instead of flushing a tiny index segment per row
+        statement = f"INSERT INTO activities ({columns}) SELECT {columns} FROM temp.activities_staging WHERE true"
+        if upsert:
+            statement += " ON CONFLICT (id) DO UPDATE SET " + ', '.join(f"{c} = excluded.{c}" for c in COLUMNS[1:])
+        with self.transaction() as conn:
+            conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS activities_staging ({columns})")
+            # Hand out ids up front so the segments can be written without a lastrowid per row
+            next_id = conn.execute("""
+                SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'activities'), 0),
+                           COALESCE((SELECT MAX(id) FROM activities), 0)) + 1
+            """).fetchone()[0]
+            with_ids = []
+            for row in rows:
+                if row[0] is None:
+                    row = (next_id,) + tuple(row[1:])
+                    next_id += 1
+                with_ids.append(row)
+            conn.executemany(
+                f"INSERT INTO temp.activities_staging VALUES ({', '.join('?' * len(COLUMNS))})", with_ids
+            )
+            conn.execute(statement)
+            conn.execute("DELETE FROM temp.activities_staging")
+            if upsert:
+                conn.executemany("DELETE FROM timeline_segments WHERE activity_id = ?", ((row[0],) for row in with_ids))
+            timeline = COLUMNS.index('timeline')
+            self._insert_segments(conn, ((row[0], row[timeline]) for row in with_ids))
+            for row, rule in zip(with_ids, rules or ()):
+                if rule is not None or upsert:
+                    self._write_recurrence(conn, row[0], rule, self.recurrence_anchor(*row[4:7]) if rule else None)
+        return len(with_ids)
+
+    @timed(rows=int)
+    def add_activities(self, activities: Iterable[dict], batch_size: Optional[int] = None) -> int:
+        """Insert activities given as display-string dicts, ``batch_size`` rows per transaction.
+
+        Missing keys are treated as empty, and an optional ``recurrence`` key makes
+        the activity repeat as in ``add_activity``. A row that fails validation
+        raises ValueError and leaves its batch unwritten; earlier batches stay
+        committed. Returns the number of rows inserted.
+        """
+        from planner_recurrence import parse_rule
+
+        batch_size = batch_size or self.WRITE_BATCH
+        activities = iter(activities)
+        added = 0
+        while True:
+            batch = list(islice(activities, batch_size))
+            if not batch:
+                return added
+            with self.transaction() as conn:
+                rows = [(None,) + self.encode_activity(conn, {**dict.fromkeys(COLUMNS), **activity})
+                        for activity in batch]
+                rules = [parse_rule(activity.get('recurrence')) for activity in batch]
+                added += self.add_encoded_activities(rows, rules=rules if any(rules) else None)
+
+    @timed(rows=int)
+    def delete_activities(self, filters: Optional[dict] = None) -> int:
+        """Delete every activity matching ``filters`` (all of them if none) in one transaction; returns the count."""
+        where, params = self.filter_clause(filters)
+        with self.transaction() as conn:
+            if not where:
+                return conn.execute("DELETE FROM activities").rowcount
+            return conn.execute(
+                f"DELETE FROM activities WHERE id IN (SELECT id FROM activity_rows{where})", params
+            ).rowcount
+
+    @timed(rows=lambda result: len(result[0]))
+    def delete_activities_by_ids(self, activity_ids: Iterable[int]) -> Tuple[List[tuple], dict]:
+        """Delete the given activities in one transaction and return what is needed to put them back.
+
+        Returns the deleted rows in typed ``COLUMNS`` order and their recurrences as
+        from ``recurrences``; ``add_encoded_activities`` restores both.
+        """
+        with self.transaction() as conn:
+            self._stage_ids(conn, activity_ids)
+            rows = self._staged_rows(conn, COLUMNS[1:])
+            rules = self._recurrences(conn, [row[0] for row in rows]) if rows else {}
+            conn.execute("DELETE FROM activities WHERE id IN temp.ids_staging")
+        return rows, rules
+
+    @timed(rows=len)
+    def update_activities(self, changes: dict, encoded: bool = False) -> dict:
+        """Apply per-activity column changes in one transaction and return the values they replaced.
+
+        ``changes`` maps ids to ``{column: value}`` with display strings as for
+        ``add_activity``, or typed values with ``encoded`` (as this returns them, so
+        the result undoes the change). Activities changing the same columns are
+        updated together by one statement; new timelines rewrite their segments and
+        repeating activities are re-anchored. Ids that no longer exist are skipped.
+        """
+        columns_sql = ', '.join(COLUMNS)
+        with self.transaction() as conn:
+            if not encoded:
+                changes = {activity_id: self.encode_fields(conn, fields) for activity_id, fields in changes.items()}
+            groups = {}
+            for activity_id, fields in changes.items():
+                if set(fields) - set(COLUMNS[1:]):
+                    raise ValueError(f"Unknown column(s) in {sorted(fields)}, expected some of {COLUMNS[1:]}")
+                if fields:
+                    groups.setdefault(tuple(sorted(fields)), []).append(activity_id)
+            # New values are staged and applied with one UPDATE ... FROM per group of columns,
+            # for the same reason add_encoded_activities stages its rows
+            conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS updates_staging ({columns_sql}, PRIMARY KEY (id))")
+            before = {}
+            for columns, activity_ids in groups.items():
+                self._stage_ids(conn, activity_ids)
+                for row in self._staged_rows(conn, columns):
+                    before[row[0]] = dict(zip(columns, row[1:]))
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO temp.updates_staging (id, {', '.join(columns)}) "
+                    f"VALUES (?{', ?' * len(columns)})",
+                    [(i,) + tuple(changes[i][column] for column in columns) for i in activity_ids]
+                )
+                conn.execute(
+                    f"UPDATE activities SET {', '.join(f'{c} = staged.{c}' for c in columns)} "
+                    f"FROM temp.updates_staging AS staged WHERE activities.id = staged.id"
+                )
+                conn.execute("DELETE FROM temp.updates_staging")
+                if 'timeline' in columns:
+                    conn.execute("DELETE FROM timeline_segments WHERE activity_id IN temp.ids_staging")
+                    self._insert_segments(conn, ((i, changes[i]['timeline']) for i in activity_ids if i in before))
+            self._stage_ids(conn, (i for i in before if {'notification', 'timeline', 'deadline'} & set(changes[i])))
+            self._reanchor(conn)
+        return before
+
+    @timed(rows=int)
+    def shift_deadlines(self, activity_ids: Iterable[int], days: int) -> int:
+        """Move the deadlines of the given activities by ``days`` in one transaction; returns how many moved.
+
+        Activities without a deadline are left alone, so shifting back by ``-days`` undoes it.
+        """
+        with self.transaction() as conn:
+            self._stage_ids(conn, activity_ids)
+            moved = conn.execute(
+                "UPDATE activities SET deadline = deadline + ? WHERE id IN temp.ids_staging AND deadline IS NOT NULL",
+                (days,)
+            ).rowcount
+            self._reanchor(conn)
+        return moved
+
+    @timed(rows=lambda deleted: int(deleted is not None))
+    def delete_activity(self, activity_id: int) -> Optional[int]:
+        """Delete an activity and return its id, or None if no row matched."""
+        with self.transaction() as conn:
+            cursor = conn.execute("DELETE FROM activities WHERE id=? ", (activity_id,))
+        return activity_id if cursor.rowcount > 0 else None
+
+    def archive_years(self) -> List[int]:
+        """Years with an archive file next to this database, in order."""
+        root, extension = os.path.splitext(self.db_name)
+        pattern = re.compile(re.escape(root) + r'\.archive-(\d{4})' + re.escape(extension))
+        return sorted(
+            int(match.group(1)) for match in map(pattern.fullmatch, glob.glob(glob.escape(root) + '.archive-*'))
+            if match
+        )
+
+    def _archive_candidates(self, conn: sqlite3.Connection, before_year: int) -> Dict[int, List[int]]:
+        """Ids of the completed activities dated before ``before_year``, by year."""
+        if before_year > date.today().year:
+            raise ValueError(f"Only past years can be archived; {before_year} has not started yet")
+        cutoff = date(before_year, 1, 1).toordinal() - EPOCH_ORDINAL
+        rows = conn.execute("""
+            SELECT a.id, a.deadline, (SELECT MAX(end_day) FROM timeline_segments WHERE activity_id = a.id),
+                   a.notification / 86400
+            FROM activities a WHERE a.status = ? AND a.id NOT IN (SELECT activity_id FROM recurrences)
+        """, (STATUSES.index('Completed'),))
+        years = {}
+        for activity_id, *days in rows:
+            days = [day for day in days if day is not None]
+            if days and max(days) < cutoff:
+                years.setdefault(from_epoch_day(max(days)).year, []).append(activity_id)
+        return dict(sorted(years.items()))
+
+    def count_archivable(self, before_year: int) -> Dict[int, int]:
+        """How many activities ``archive(before_year)`` would move, by year."""
+        with self.reading() as conn:
+            return {year: len(ids) for year, ids in self._archive_candidates(conn, before_year).items()}
+
+    @timed(rows=lambda moved: sum(moved.values()))
+    def archive(self, before_year: int, progress: Optional[Callable[[int, int], None]] = None) -> Dict[int, int]:
+        """Move the completed activities dated before ``before_year`` into per-year archive files.
+
+        An activity's date is the latest of its deadline, timeline and reminder;
+        repeating activities and those with no date stay put. Each year's rows
+        are copied into ``archive_path`` (attached for the purpose) and committed
+        there before they are deleted here, so an interruption leaves rows in
+        both places rather than in neither, and archiving again settles it.
+        ``progress(done, total)`` is called before each year. Run ``compact``
+        afterwards to give the freed space back. Returns the rows moved per year.
+        """
+        if self.db_name == ':memory:':
+            raise ValueError("An in-memory database has nowhere to keep archives")
+        moved = {}
+        with self._lock:
+            conn = self.connect()
+            years = self._archive_candidates(conn, before_year)
+            for done, (year, activity_ids) in enumerate(years.items()):
+                if progress:
+                    progress(done, len(years))
+                conn.execute("ATTACH DATABASE ? AS archive", (archive_path(self.db_name, year),))
+                try:
+                    with self.transaction() as conn:
+                        conn.execute(ARCHIVE_SCHEMA)
+                        self._stage_ids(conn, activity_ids)
+                        conn.execute(f"""
+                            INSERT OR REPLACE INTO archive.activities ({', '.join(COLUMNS)})
+                            SELECT a.id, c.name, a.activity, a.status, a.notification, a.timeline, a.deadline,
+                                   a.priority, a.notes
+                            FROM activities a LEFT JOIN categories c ON c.id = a.category
+                            WHERE a.id IN temp.ids_staging
+                        """)
+                finally:
+                    conn.execute("DETACH DATABASE archive")
+                with self.transaction() as conn:
+                    moved[year] = conn.execute("DELETE FROM activities WHERE id IN temp.ids_staging").rowcount
+                logging.info("Archived %d activities from %d", moved[year], year)
+        return moved
+
+    @timed(rows=int)
+    def unarchive(self, year: int) -> int:
+        """Move ``year``'s archived activities back into the working database and remove its file; returns how many."""
+        path = archive_path(self.db_name, year)
+        if not os.path.exists(path):
+            raise ValueError(f"There is no archive for {year}")
+        with self._lock:
+            conn = self.connect()
+            conn.execute("ATTACH DATABASE ? AS archive", (path,))
+            try:
+                rows = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM archive.activities ORDER BY id").fetchall()
+            finally:
+                conn.execute("DETACH DATABASE archive")
+            with self.transaction() as conn:
+                rows = [(row[0], self.category_id(conn, row[1])) + row[2:] for row in rows]
+                # Upsert so that rows left in both places by an interrupted archive come back once
+                self.add_encoded_activities(rows, upsert=True)
+            os.remove(path)
+        return len(rows)
+
+    @timed(rows=len)
+    def archived_activities(self, year: int, search: Optional[str] = None) -> List[tuple]:
+        """Return ``year``'s archived rows in ``COLUMNS`` and id order, optionally just those mentioning ``search``.
+
+        The year's file is attached to this thread's read connection for the
+        query and detached afterwards, so archives cost nothing until asked for.
+        ``search`` is matched as a substring of the activity, notes or category.
+        """
+        path = archive_path(self.db_name, year)
+        if not os.path.exists(path):
+            raise ValueError(f"There is no archive for {year}")
+        where, params = '', []
+        if search:
+            pattern = '%' + re.sub(r'([\\%_])', r'\\\1', search) + '%'
+            columns = ('activity', 'notes', 'category')
+            where = " WHERE " + " OR ".join(f"a.{column} LIKE ? ESCAPE '\\'" for column in columns)
+            params = [pattern] * 3
+        with self.reading() as conn:
+            conn.execute("ATTACH DATABASE ? AS archive", (path,))
+            try:
+                return conn.execute(f"""
+                    SELECT a.id, a.category, a.activity, s.name,
+                           strftime('%Y-%m-%d %H:%M:%S', a.notification, 'unixepoch'),
+                           a.timeline, date(a.deadline * 86400, 'unixepoch'), p.name, a.notes
+                    FROM archive.activities a
+                    LEFT JOIN main.statuses s ON s.id = a.status
+                    LEFT JOIN main.priorities p ON p.id = a.priority{where}
+                    ORDER BY a.id
+                """, params).fetchall()
+            finally:
+                conn.execute("DETACH DATABASE archive")
+
+    def disk_bytes(self) -> int:
+        """Size of the database file plus its write-ahead log."""
+        return sum(os.path.getsize(path) for path in (self.db_name, self.db_name + '-wal') if os.path.exists(path))
+
+    @timed()
+    def compact(self) -> Tuple[int, int]:
+        """Give back the space freed by archiving or deletes; returns the bytes on disk before and after.
+
+        Summary rows whose count has dropped to zero are removed, the full-text
+        index is merged, the query planner's statistics are refreshed with
+        ANALYZE and the file is rebuilt with VACUUM, then the write-ahead log is
+        truncated. Readers on other connections carry on; writers wait.
+        """
+        with self._lock:
+            conn = self.connect()
+            before = self.disk_bytes()
+            with self.transaction() as conn:
+                # Nothing can decrement a zero count again. summary_load keeps its zeros:
+                # a day's +1 and -1 steps can cancel out while segments still rely on the row.
+                conn.execute("DELETE FROM summary_counts WHERE count = 0")
+                conn.execute("DELETE FROM summary_deadlines WHERE count = 0")
+                conn.execute("INSERT INTO activities_fts(activities_fts) VALUES ('optimize')")
+            conn.execute("ANALYZE")
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return before, self.disk_bytes()
+
+    @timed()
+    def backup(self, path: str, progress: Optional[Callable[[int, int], None]] = None) -> List[str]:
+        """Copy the database and its year archives to ``path`` while it stays in use; returns the files written.
+
+        Each file is copied with SQLite's online backup API from a connection of
+        its own, in a single step and so from one consistent snapshot; with WAL,
+        the app keeps reading and writing meanwhile. Archives are written next
+        to ``path`` under the names ``archive_path`` gives it.
+        ``progress(done, total)`` is called before each file.
+        """
+        if self.db_name == ':memory:':
+            raise ValueError("An in-memory database cannot be backed up to a file")
+        if os.path.abspath(path) == os.path.abspath(self.db_name):
+            raise ValueError("A backup cannot overwrite the database it copies")
+        files = [(self.db_name, path)] + [
+            (archive_path(self.db_name, year), archive_path(path, year)) for year in self.archive_years()
+        ]
+        for done, (source_path, target_path) in enumerate(files):
+            if progress:
+                progress(done, len(files))
+            source, target = sqlite3.connect(source_path), sqlite3.connect(target_path)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+        return [target_path for _, target_path in files]
+
+class ActivityModel:
+    def __init__(self, db: Database) -> None:
+        self.db = db
+
+    def load_data(self, columns: Optional[List[str]] = None, filters: Optional[dict] = None,
+                  order_by: Optional[List[str]] = None) -> "pd.DataFrame":
+        return self.db.load_data(columns, filters, order_by)
+
+    def load_timelines(self, start_date: str, end_date: str) -> "pd.DataFrame":
+        return self.db.load_timelines(start_date, end_date)
+
+    def data_version(self) -> int:
+        return self.db.data_version()
+
+    def summary(self, today: Optional[int] = None, days: int = 7) -> dict:
+        return self.db.summary(today, days)
+
+    def day_counts(self, start_day: int, end_day: int) -> dict:
+        return self.db.day_counts(start_day, end_day)
+
+    def conflict_inputs(self, start_day: int, end_day: int, activity_ids: Optional[Iterable[int]] = None) -> dict:
+        return self.db.conflict_inputs(start_day, end_day, activity_ids)
+
+    def active_between(self, start_date: str, end_date: str) -> List[int]:
+        return self.db.active_between(start_date, end_date)
+
+    def recurrences(self, activity_ids: Optional[Iterable[int]] = None) -> dict:
+        return self.db.recurrences(activity_ids)
+
+    def set_recurrence(self, activity_id: int, rule: Optional["Rule"]) -> None:
+        self.db.set_recurrence(activity_id, rule)
+
+    def upcoming_notifications(self, after: Tuple[int, int], limit: int) -> List[Tuple[int, int, str]]:
+        return self.db.upcoming_notifications(after, limit)
+
+    def count_activities(self, filters: Optional[dict] = None) -> int:
+        return self.db.count_activities(filters)
+
+    def iter_activities(self, filters: Optional[dict] = None, chunk_size: int = 10000) -> Iterator[List[tuple]]:
+        return self.db.iter_activities(filters, chunk_size)
+
+    def query_activities(self, columns: Optional[List[str]] = None, filters: Optional[dict] = None,
+                         order_by: Optional[List[str]] = None, after: Optional[tuple] = None,
+                         limit: Optional[int] = None) -> Tuple[List[tuple], List[tuple]]:
+        return self.db.query_activities(columns, filters, order_by, after, limit)
+
+    def sort_key(self, activity_id: int, order_by: Optional[List[str]]) -> Optional[tuple]:
+        return self.db.sort_key(activity_id, order_by)
+
+    def fetch_activities(self, after_id: Optional[int], limit: int) -> List[tuple]:
+        return self.db.fetch_activities(after_id, limit)
+
+    def fetch_activities_by_ids(self, activity_ids: List[int]) -> List[tuple]:
+        return self.db.fetch_activities_by_ids(activity_ids)
+
+    def search_ids(self, text: str) -> Optional[List[int]]:
+        return self.db.search_ids(text)
+
+    def matches_search(self, activity_id: int, text: str) -> bool:
+        return self.db.matches_search(activity_id, text)
+
+    def add_activity(self, activity: dict) -> tuple:
+        return self.db.add_activity(activity)
+
+    def add_activities(self, activities: Iterable[dict], batch_size: Optional[int] = None) -> int:
+        return self.db.add_activities(activities, batch_size)
+
+    def add_encoded_activities(self, rows: List[tuple], upsert: bool = False,
+                               rules: Optional[List[Optional["Rule"]]] = None) -> int:
+        return self.db.add_encoded_activities(rows, upsert, rules)
+
+    def delete_activity(self, activity_id: int) -> Optional[int]:
+        return self.db.delete_activity(activity_id)
+
+    def delete_activities_by_ids(self, activity_ids: Iterable[int]) -> Tuple[List[tuple], dict]:
+        return self.db.delete_activities_by_ids(activity_ids)
+
+    def update_activities(self, changes: dict, encoded: bool = False) -> dict:
+        return self.db.update_activities(changes, encoded)
+
+    def shift_deadlines(self, activity_ids: Iterable[int], days: int) -> int:
+        return self.db.shift_deadlines(activity_ids, days)
+
+    def delete_activities(self, filters: Optional[dict] = None) -> int:
+        return self.db.delete_activities(filters)
+
+    def archive_years(self) -> List[int]:
+        return self.db.archive_years()
+
+    def count_archivable(self, before_year: int) -> Dict[int, int]:
+        return self.db.count_archivable(before_year)
+
+    def archive(self, before_year: int, progress: Optional[Callable[[int, int], None]] = None) -> Dict[int, int]:
+        return self.db.archive(before_year, progress)
+
+    def unarchive(self, year: int) -> int:
+        return self.db.unarchive(year)
+
+    def archived_activities(self, year: int, search: Optional[str] = None) -> List[tuple]:
+        return self.db.archived_activities(year, search)
+
+    def compact(self) -> Tuple[int, int]:
+        return self.db.compact()
+
+    def backup(self, path: str, progress: Optional[Callable[[int, int], None]] = None) -> List[str]:
+        return self.db.backup(path, progress)
@@ -0,0 +1,118 @@
+import calendar
+import heapq
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+
+def local_epoch_seconds() -> int:
+    """Current local wall-clock time as seconds since 1970-01-01, matching the stored notification values."""
+    return calendar.timegm(datetime.now().timetuple())
+
+
+class NotificationScheduler:
+    """Fires activity reminders when their notification time comes round.
+
+    Only the nearest ``WINDOW`` reminders are held, in a min-heap filled by an
+    indexed range query on the notification column; when the heap drains the
+    next window is loaded from where the previous one ended. Nothing polls:
+    after each pass the scheduler asks ``arm`` to wake it when the earliest
+    reminder is due (capped at ``MAX_SLEEP`` so clock changes are noticed).
+    A repeating activity can have several of its occurrences queued at once.
+
+    ``source`` is anything with ``upcoming_notifications(after, limit)`` returning
+    ``(when, activity_id, title)`` rows ordered by ``(when, activity_id)``.
+    ``notifier(title, message)`` shows a reminder, ``clock()`` returns the current
+    epoch seconds and ``arm(seconds)`` schedules the next ``fire_due`` call; all
+    three can be swapped for fakes in tests.
+    """
+    WINDOW = 1000
+    MAX_SLEEP = 3600
+
+    def __init__(self, source, notifier: Callable[[str, str], None], arm: Callable[[float], None],
+                 clock: Callable[[], int] = local_epoch_seconds) -> None:
+        self.source = source
+        self.notifier = notifier
+        self.arm = arm
+        self.clock = clock
+        self._heap: List[Tuple[int, int, str]] = []
+        # Live times by activity id; heap entries that no longer match are skipped when popped
+        self._pending: Dict[int, Set[int]] = {}
+        # Last (when, activity_id) loaded from the source; _exhausted once nothing lies beyond it
+        self._horizon: Optional[Tuple[int, int]] = None
+        self._exhausted = False
+
+    def start(self) -> None:
+        """Load the first window of reminders after the current time and arm the timer."""
+        self._heap, self._pending = [], {}
+        self._horizon, self._exhausted = (self.clock(), -1), False
+        self._load_window()
+        self._rearm()
+
+    def schedule(self, activity_id: int, when: Optional[int], title: str) -> None:
+        """Track a new or changed reminder without reloading."""
+        self.cancel(activity_id)
+        if when is None or when <= self.clock():
+            return
+        # Reminders beyond the loaded window are picked up by a later window load
+        if self._exhausted or (when, activity_id) <= self._horizon:
+            self._push(when, activity_id, title)
+            self._rearm()
+
+    def cancel(self, activity_id: int) -> None:
+        self._pending.pop(activity_id, None)
+
+    def next_due(self) -> Optional[int]:
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def fire_due(self) -> int:
+        """Show every reminder that is due, re-arm for the next one and return how many fired."""
+        now = self.clock()
+        fired = 0
+        while True:
+            self._discard_stale()
+            if not self._heap and not self._exhausted:
+                self._load_window()
+                continue
+            if not self._heap or self._heap[0][0] > now:
+                break
+            when, activity_id, title = heapq.heappop(self._heap)
+            self._forget(activity_id, when)
+            try:
+                self.notifier('Activity reminder', title)
+            except Exception as e:
+                logging.warning("Could not show reminder for activity %s: %s", activity_id, e)
+            fired += 1
+        self._rearm()
+        return fired
+
+    def _load_window(self) -> None:
+        rows = self.source.upcoming_notifications(self._horizon, self.WINDOW)
+        for when, activity_id, title in rows:
+            self._push(when, activity_id, title)
+        if rows:
+            self._horizon = (rows[-1][0], rows[-1][1])
+        self._exhausted = len(rows) < self.WINDOW
+
+    def _push(self, when: int, activity_id: int, title: str) -> None:
+        self._pending.setdefault(activity_id, set()).add(when)
+        heapq.heappush(self._heap, (when, activity_id, title))
+
+    def _forget(self, activity_id: int, when: int) -> None:
+        whens = self._pending[activity_id]
+        whens.discard(when)
+        if not whens:
+            del self._pending[activity_id]
+
+    def _discard_stale(self) -> None:
+        while self._heap and self._heap[0][0] not in self._pending.get(self._heap[0][1], ()):
+            heapq.heappop(self._heap)
+
+    def _rearm(self) -> None:
+        due = self.next_due()
+        if due is None and self._exhausted:
+            # Nothing left; schedule() re-arms when a new reminder arrives
+            return
+        delay = self.MAX_SLEEP if due is None else due - self.clock()
+        self.arm(min(max(delay, 0), self.MAX_SLEEP))
@@ -0,0 +1,138 @@
+import calendar
+import re
+from datetime import date
+from itertools import count as counter
+from typing import FrozenSet, Iterator, NamedTuple, Optional
+
+from planner_model import EPOCH_ORDINAL, from_epoch_day, is_blank, to_epoch_day
+
+FREQUENCIES = ['daily', 'weekly', 'monthly', 'yearly']
+# Days per step for the fixed-length frequencies, months per step for the others
+STEP_DAYS = {'daily': 1, 'weekly': 7}
+STEP_MONTHS = {'monthly': 1, 'yearly': 12}
+RULE_PART = re.compile(r'\s*(\w+)\s*=\s*([^;]*)')
+
+
+class Rule(NamedTuple):
+    """An RRULE-style repetition: every ``interval`` ``FREQUENCIES[frequency]`` steps.
+
+    ``until`` (epoch day, inclusive) and ``count`` end the series; days in
+    ``exceptions`` are skipped but still count towards ``count``, as EXDATE does.
+    """
+    frequency: int
+    interval: int = 1
+    until: Optional[int] = None
+    count: Optional[int] = None
+    exceptions: FrozenSet[int] = frozenset()
+
+
+def parse_rule(text: Optional[str]) -> Optional[Rule]:
+    """Parse ``FREQ=WEEKLY;INTERVAL=2;UNTIL=2025-06-30;COUNT=10;EXDATE=2024-12-25,...``.
+
+    A bare frequency name ("yearly") is accepted as shorthand; blank text means
+    no repetition. Raises ValueError for anything else.
+    """
+    if is_blank(text):
+        return None
+    text = text.strip()
+    if text.lower() in FREQUENCIES:
+        return Rule(FREQUENCIES.index(text.lower()))
+    parts = {}
+    for part in filter(None, (piece.strip() for piece in text.split(';'))):
+        match = RULE_PART.fullmatch(part)
+        if not match:
+            raise ValueError(f"Malformed recurrence rule part {part!r}")
+        parts[match.group(1).upper()] = match.group(2).strip()
+    unknown = set(parts) - {'FREQ', 'INTERVAL', 'UNTIL', 'COUNT', 'EXDATE'}
+    if unknown:
+        raise ValueError(f"Unknown recurrence rule part(s) {sorted(unknown)}")
+    frequency = parts.get('FREQ', '').lower()
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Recurrence rule needs FREQ set to one of {[f.upper() for f in FREQUENCIES]}")
+    rule = Rule(
+        FREQUENCIES.index(frequency),
+        int(parts.get('INTERVAL', 1)),
+        to_epoch_day(parts['UNTIL'][:10]) if parts.get('UNTIL') else None,
+        int(parts['COUNT']) if parts.get('COUNT') else None,
+        frozenset(to_epoch_day(day.strip()[:10]) for day in parts.get('EXDATE', '').split(',') if day.strip()),
+    )
+    if rule.interval < 1 or (rule.count is not None and rule.count < 1):
+        raise ValueError("Recurrence INTERVAL and COUNT must be at least 1")
+    return rule
+
+
+def format_rule(rule: Rule) -> str:
+    parts = [f"FREQ={FREQUENCIES[rule.frequency].upper()}"]
+    if rule.interval != 1:
+        parts.append(f"INTERVAL={rule.interval}")
+    if rule.until is not None:
+        parts.append(f"UNTIL={from_epoch_day(rule.until).isoformat()}")
+    if rule.count is not None:
+        parts.append(f"COUNT={rule.count}")
+    if rule.exceptions:
+        parts.append("EXDATE=" + ','.join(from_epoch_day(day).isoformat() for day in sorted(rule.exceptions)))
+    return ';'.join(parts)
+
+
+def describe_rule(rule: Rule) -> str:
+    """Short human wording, e.g. "Every 2 weeks until 2025-06-30"."""
+    unit = {'daily': 'day', 'weekly': 'week', 'monthly': 'month', 'yearly': 'year'}[FREQUENCIES[rule.frequency]]
+    text = f"Every {rule.interval} {unit}s" if rule.interval > 1 else FREQUENCIES[rule.frequency].capitalize()
+    if rule.until is not None:
+        text += f" until {from_epoch_day(rule.until).isoformat()}"
+    if rule.count is not None:
+        text += f", {rule.count} times"
+    if rule.exceptions:
+        text += f", except {len(rule.exceptions)} date{'s' if len(rule.exceptions) > 1 else ''}"
+    return text
+
+
+def occurrence_days(rule: Rule, anchor: int, start: int, end: Optional[int] = None) -> Iterator[int]:
+    """Yield the epoch days of the occurrences between ``start`` and ``end``, in order, on demand.
+
+    ``anchor`` is the day of the first occurrence. The series is entered at the
+    first step that can reach ``start`` by arithmetic rather than by walking from
+    the anchor, so the cost depends only on the occurrences yielded. With ``end``
+    None the generator runs until the rule itself ends. Monthly and yearly steps
+    that land on a day the month does not have (the 31st, 29 February) are
+    skipped and, as in RFC 5545, do not count towards ``count``; such a series
+    with a count is therefore walked from its anchor, which the count bounds.
+    """
+    bounds = [day for day in (end, rule.until) if day is not None]
+    last = min(bounds) if bounds else None
+    frequency = FREQUENCIES[rule.frequency]
+    if frequency in STEP_DAYS:
+        step = STEP_DAYS[frequency] * rule.interval
+        first = max(0, -(-(start - anchor) // step))
+        for index in counter(first):
+            day = anchor + index * step
+            if (rule.count is not None and index >= rule.count) or (last is not None and day > last):
+                return
+            if day not in rule.exceptions:
+                yield day
+        return
+
+    step = STEP_MONTHS[frequency] * rule.interval
+    origin = from_epoch_day(anchor)
+    start_date = from_epoch_day(max(start, anchor))
+    months = (start_date.year - origin.year) * 12 + start_date.month - origin.month
+    last_month = (from_epoch_day(last).year, from_epoch_day(last).month) if last is not None else None
+    occurrences = 0
+    for index in counter(0 if rule.count is not None else max(0, months // step)):
+        if rule.count is not None and occurrences >= rule.count:
+            return
+        year, month = divmod(origin.month - 1 + index * step, 12)
+        year += origin.year
+        if year > date.max.year or (last_month is not None and (year, month + 1) > last_month):
+            return
+        if origin.day > calendar.monthrange(year, month + 1)[1]:
+            continue
+        occurrences += 1
+        day = date(year, month + 1, origin.day).toordinal() - EPOCH_ORDINAL
+        if day < start:
+            continue
+        if last is not None and day > last:
+            return
+        if day not in rule.exceptions:
+            yield day
+
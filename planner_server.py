@@ -0,0 +1,381 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from planner_defaults import DEFAULT_HOST, DEFAULT_PORT
+from planner_metrics import timed
+from planner_model import ActivityModel
+
+# Header naming the client a call comes from, echoed as ``origin`` in the change feed
+CLIENT_HEADER = 'x-planner-client'
+# Header with a client-chosen id for each request; a write sent again with the same id is not applied twice
+REQUEST_HEADER = 'x-planner-request'
+# ActivityModel methods callable through POST /call/<name>; writes go through the batching writer
+READS = {
+    'load_data', 'load_timelines', 'data_version', 'summary', 'day_counts', 'conflict_inputs', 'active_between',
+    'recurrences', 'upcoming_notifications', 'count_activities', 'query_activities', 'sort_key', 'fetch_activities',
+    'fetch_activities_by_ids', 'search_ids', 'matches_search', 'archive_years', 'archived_activities',
+}
+WRITES = {
+    'add_activity', 'add_activities', 'add_encoded_activities', 'set_recurrence', 'delete_activity',
+    'delete_activities_by_ids', 'update_activities', 'shift_deadlines', 'delete_activities',
+}
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error'}
+
+
+def to_json(value) -> bytes:
+    """Encode a model result: tuples become lists, sets sorted lists and DataFrames ``{columns, data}``."""
+    return json.dumps(value, default=_json_default, separators=(',', ':')).encode()
+
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if hasattr(value, 'to_dict') and hasattr(value, 'columns'):
+        return {'columns': list(value.columns), 'data': value.astype(object).where(value.notna(), None).values.tolist()}
+    if hasattr(value, 'item'):
+        # numpy scalars
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def decode_rule(value: Optional[list]):
+    """Inverse of how ``to_json`` writes a ``planner_recurrence.Rule``: a list with the exceptions last."""
+    from planner_recurrence import Rule
+
+    if value is None:
+        return None
+    *fields, exceptions = value
+    return Rule(*fields, frozenset(exceptions))
+
+
+def decode_arguments(name: str, args: list, kwargs: dict) -> Tuple[list, dict]:
+    """Turn JSON call arguments back into what the ``ActivityModel`` method expects."""
+    arguments = dict(kwargs)
+    names = {
+        'update_activities': ['changes', 'encoded'],
+        'add_encoded_activities': ['rows', 'upsert', 'rules'],
+        'set_recurrence': ['activity_id', 'rule'],
+        'upcoming_notifications': ['after', 'limit'],
+        'query_activities': ['columns', 'filters', 'order_by', 'after', 'limit'],
+    }.get(name)
+    if names is None:
+        return args, kwargs
+    arguments.update(zip(names, args))
+    if arguments.get('changes') is not None:
+        # JSON object keys are strings
+        arguments['changes'] = {int(activity_id): fields for activity_id, fields in arguments['changes'].items()}
+    if arguments.get('rules') is not None:
+        arguments['rules'] = [decode_rule(rule) for rule in arguments['rules']]
+    if 'rule' in arguments:
+        arguments['rule'] = decode_rule(arguments['rule'])
+    if arguments.get('after') is not None:
+        arguments['after'] = tuple(arguments['after'])
+    return [], arguments
+
+
+def describe_change(name: str, args: list, kwargs: dict, result) -> Optional[Tuple[str, List[int]]]:
+    """``(kind, ids)`` for the change feed after a successful write, or None if nothing changed.
+
+    Kinds are 'added', 'deleted', 'updated' and 'reset' (reload everything);
+    writes whose rows are not known by id report 'reset'.
+    """
+    if name == 'add_activity':
+        return 'added', [result[0]]
+    if name == 'delete_activity':
+        return ('deleted', [result]) if result is not None else None
+    if name == 'delete_activities_by_ids':
+        return ('deleted', [row[0] for row in result[0]]) if result[0] else None
+    if name == 'update_activities':
+        return ('updated', sorted(result)) if result else None
+    if name == 'shift_deadlines':
+        return ('updated', sorted(set(args[0] if args else kwargs['activity_ids']))) if result else None
+    if name == 'set_recurrence':
+        return 'updated', [args[0] if args else kwargs['activity_id']]
+    return ('reset', []) if result else None
+
+
+class PlannerServer:
+    """Serves one planner database to several clients over a small HTTP/JSON API.
+
+    ``POST /call/<method>`` with ``{"args": [...], "kwargs": {...}}`` runs an
+    ``ActivityModel`` method and answers ``{"result": ...}``, or
+    ``{"error": ...}`` with status 400 when it raises ValueError. Reads run on a
+    thread pool, each thread with its own WAL reader. Writes are queued for a
+    single writer thread that takes everything queued so far (up to
+    ``WRITE_BATCH``) and applies it as one transaction, each write in a savepoint
+    of its own so one failing write does not undo the others; many clients
+    writing at once then share one commit instead of queueing for the lock.
+
+    ``GET /changes?since=SEQ`` streams the change feed as JSON lines: a 'hello'
+    with the current sequence number, the backlog after ``since`` (or a 'reset'
+    when that is older than the last ``FEED_BACKLOG`` events or comes from before
+    a restart), then every committed change as ``{"seq", "kind", "ids", "origin"}``
+    and a 'ping' every ``HEARTBEAT`` seconds. ``GET /status`` reports the data version and sequence.
+
+    The replies to the last ``REPLAYED_WRITES`` writes are kept by their
+    ``REQUEST_HEADER`` id, so a client that lost the connection before the reply
+    can send a write again and get the first outcome instead of a second write.
+    """
+    WRITE_BATCH = 500
+    READ_THREADS = 4
+    FEED_BACKLOG = 1000
+    # Changes touching more rows are sent as 'reset' rather than a long id list
+    FEED_MAX_IDS = 5000
+    HEARTBEAT = 15
+    MAX_BODY = 64 * 1024 * 1024
+    REPLAYED_WRITES = 1000
+
+    def __init__(self, model: ActivityModel, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        self.model = model
+        self.host = host
+        self.port = port
+        self._readers = ThreadPoolExecutor(self.READ_THREADS, thread_name_prefix='planner-read')
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix='planner-write')
+        self._writes: Optional[asyncio.Queue] = None
+        self._events = deque(maxlen=self.FEED_BACKLOG)
+        self._seq = 0
+        self._subscribers: Set[asyncio.Queue] = set()
+        # Replies to recent writes by request id, still pending while the write runs
+        self._replies: Dict[str, asyncio.Future] = OrderedDict()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks = set()
+        # Connection handlers, cancelled on shutdown so change-feed streams do not hold it up
+        self._handlers: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """Start listening; with port 0 the chosen port is stored in ``port``."""
+        self._loop = asyncio.get_running_loop()
+        self._writes = asyncio.Queue()
+        self._tasks.add(asyncio.create_task(self._write_loop()))
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logging.info("Planner server listening on http://%s:%s", self.host, self.port)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for task in self._handlers:
+                task.cancel()
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+            await self._server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        self._readers.shutdown(wait=False)
+        self._writer.shutdown(wait=True)
+
+    def run_in_thread(self) -> threading.Thread:
+        """Serve from a daemon thread with its own event loop, returning once it listens; ``stop`` ends it."""
+        started = threading.Event()
+
+        async def main():
+            await self.start()
+            started.set()
+            try:
+                await self._server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+            finally:
+                await self.close()
+
+        thread = threading.Thread(target=asyncio.run, args=(main(),), name='planner-server', daemon=True)
+        thread.start()
+        started.wait()
+        return thread
+
+    def stop(self) -> None:
+        """Stop a server started with ``run_in_thread``."""
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                url = urlsplit(target)
+                if method == 'GET' and url.path == '/changes':
+                    since = parse_qs(url.query).get('since')
+                    await self._stream_changes(writer, int(since[0]) if since else None)
+                    break
+                status, payload = await self._dispatch(method, url.path, headers, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self._respond(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # Shutting down; end quietly rather than leave asyncio a cancelled handler to report
+            pass
+        finally:
+            self._handlers.discard(task)
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        method, target, _ = line.decode('latin-1').split(' ', 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        if length > self.MAX_BODY:
+            raise ValueError("request body too large")
+        body = await reader.readexactly(length) if length else b''
+        return method, target, headers, body
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: int, payload: bytes, keep_alive: bool) -> None:
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+            + payload
+        )
+
+    async def _dispatch(self, method: str, path: str, headers: dict, body: bytes) -> Tuple[int, bytes]:
+        if path == '/status':
+            version = await self._loop.run_in_executor(self._readers, self.model.data_version)
+            return 200, to_json({'version': version, 'seq': self._seq})
+        if not path.startswith('/call/'):
+            return 404, to_json({'error': f"No such endpoint {path}"})
+        if method != 'POST':
+            return 405, to_json({'error': "Calls must be POSTed"})
+        name = path[len('/call/'):]
+        if name not in READS and name not in WRITES:
+            return 404, to_json({'error': f"No such method {name}"})
+        request_id = headers.get(REQUEST_HEADER)
+        if name in READS or request_id is None:
+            return await self._call(name, headers, body)
+        reply = self._replies.get(request_id)
+        if reply is None:
+            reply = self._replies[request_id] = asyncio.ensure_future(self._call(name, headers, body))
+            while len(self._replies) > self.REPLAYED_WRITES:
+                self._replies.popitem(last=False)
+        # Shielded so the write still finishes and is remembered if this connection goes away
+        return await asyncio.shield(reply)
+
+    async def _call(self, name: str, headers: dict, body: bytes) -> Tuple[int, bytes]:
+        try:
+            request = json.loads(body or b'{}')
+            if not isinstance(request, dict):
+                raise ValueError("Call body must be a JSON object")
+            args, kwargs = request.get('args', []), request.get('kwargs', {})
+            try:
+                call_args, call_kwargs = decode_arguments(name, args, kwargs)
+            except AttributeError as e:
+                raise ValueError(f"Malformed arguments for {name}: {e}") from e
+            if name in READS:
+                result = await self._loop.run_in_executor(
+                    self._readers, partial(getattr(self.model, name), *call_args, **call_kwargs)
+                )
+            else:
+                future = self._loop.create_future()
+                await self._writes.put((name, call_args, call_kwargs, future))
+                result = await future
+                change = describe_change(name, args, kwargs, result)
+                if change:
+                    self._publish(*change, headers.get(CLIENT_HEADER))
+        except (ValueError, TypeError, KeyError) as e:
+            return 400, to_json({'error': str(e)})
+        except Exception as e:
+            logging.exception("Call to %s failed", name)
+            return 500, to_json({'error': str(e)})
+        return 200, to_json({'result': result})
+
+    async def _write_loop(self) -> None:
+        while True:
+            batch = [await self._writes.get()]
+            while len(batch) < self.WRITE_BATCH and not self._writes.empty():
+                batch.append(self._writes.get_nowait())
+            try:
+                outcomes = await self._loop.run_in_executor(self._writer, self._apply, batch)
+            except Exception as e:
+                # The batch's commit failed, so none of it was written
+                outcomes = [(False, e)] * len(batch)
+            for (*_, future), (ok, value) in zip(batch, outcomes):
+                if future.cancelled():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    @timed('PlannerServer.write_batch', rows=len)
+    def _apply(self, batch: list) -> list:
+        """Run queued writes in one transaction, each in a savepoint; runs on the writer thread."""
+        outcomes = []
+        with self.model.db.transaction():
+            for name, args, kwargs, _ in batch:
+                try:
+                    with self.model.db.transaction():
+                        outcomes.append((True, getattr(self.model, name)(*args, **kwargs)))
+                except Exception as e:
+                    outcomes.append((False, e))
+        return outcomes
+
+    def _publish(self, kind: str, ids: List[int], origin: Optional[str]) -> None:
+        if len(ids) > self.FEED_MAX_IDS:
+            kind, ids = 'reset', []
+        self._seq += 1
+        event = {'seq': self._seq, 'kind': kind, 'ids': ids, 'origin': origin}
+        self._events.append(event)
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    async def _stream_changes(self, writer: asyncio.StreamWriter, since: Optional[int]) -> None:
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                     b"Transfer-Encoding: chunked\r\nCache-Control: no-cache\r\n\r\n")
+        queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        try:
+            backlog = [{'seq': self._seq, 'kind': 'hello', 'ids': [], 'origin': None}]
+            if since is not None and since != self._seq:
+                oldest = self._events[0]['seq'] if self._events else self._seq + 1
+                # Too far behind, or ahead because the server has restarted since
+                if since < oldest - 1 or since > self._seq:
+                    backlog.append({'seq': self._seq, 'kind': 'reset', 'ids': [], 'origin': None})
+                else:
+                    backlog.extend(event for event in self._events if event['seq'] > since)
+            for event in backlog:
+                self._write_chunk(writer, event)
+            await writer.drain()
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), self.HEARTBEAT)
+                except asyncio.TimeoutError:
+                    event = {'seq': self._seq, 'kind': 'ping', 'ids': [], 'origin': None}
+                self._write_chunk(writer, event)
+                await writer.drain()
+        finally:
+            self._subscribers.discard(queue)
+
+    @staticmethod
+    def _write_chunk(writer: asyncio.StreamWriter, event: dict) -> None:
+        data = to_json(event) + b'\n'
+        writer.write(b'%x\r\n%s\r\n' % (len(data), data))
@@ -0,0 +1,99 @@
+import logging
+import threading
+from typing import Callable, Iterator, Optional
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+
+class Cancelled(Exception):
+    """Raised inside a task when its worker has been cancelled."""
+
+
+class WorkerSignals(QObject):
+    # Signals are emitted on the pool thread and delivered on the GUI thread
+    progress = pyqtSignal(int, int)
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    finished = pyqtSignal()
+
+
+class Worker(QRunnable):
+    """Runs ``fn(*args, progress=..., **kwargs)`` when started on a QThreadPool.
+
+    ``progress(done, total)`` forwards to the ``progress`` signal and raises
+    ``Cancelled`` once ``cancel()`` has been called, so a task that reports
+    progress regularly also stops promptly. The return value arrives through
+    ``result``, exceptions through ``error``; ``finished`` always fires last.
+    """
+
+    def __init__(self, fn: Callable, *args, **kwargs) -> None:
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def report(self, done: int, total: int = 0) -> None:
+        if self._cancel.is_set():
+            raise Cancelled()
+        self.signals.progress.emit(done, total)
+
+    def run(self) -> None:
+        try:
+            result = self.fn(*self.args, progress=self.report, **self.kwargs)
+        except Cancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            logging.exception("Background task %s failed", getattr(self.fn, '__name__', self.fn))
+            self.signals.error.emit(str(e))
+        else:
+            if self._cancel.is_set():
+                self.signals.cancelled.emit()
+            else:
+                self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+
+class FeedSignals(QObject):
+    change = pyqtSignal(dict)
+
+
+class FeedListener(threading.Thread):
+    """Follows a change feed on a daemon thread, emitting each event through ``signals.change``.
+
+    ``follow(since)`` returns an iterator of events such as ``RemoteModel.changes``.
+    When the stream ends or fails the listener reconnects after ``RETRY``
+    seconds, resuming after the last sequence number it saw, until ``stop()``.
+    """
+    RETRY = 2.0
+
+    def __init__(self, follow: Callable[[Optional[int]], Iterator[dict]]) -> None:
+        super().__init__(name='planner-feed', daemon=True)
+        self.follow = follow
+        self.signals = FeedSignals()
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self) -> None:
+        since = None
+        while not self._stop.is_set():
+            try:
+                for event in self.follow(since):
+                    if self._stop.is_set():
+                        return
+                    since = event['seq']
+                    self.signals.change.emit(event)
+            except Exception as e:
+                logging.warning("Change feed interrupted: %s", e)
+            self._stop.wait(self.RETRY)
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planner_model import ActivityModel, Database
+
+
+@pytest.fixture
+def model():
+    db = Database(':memory:')
+    db.create_table()
+    yield ActivityModel(db)
+    db.close()
+
+
+@pytest.fixture
+def file_model(tmp_path):
+    """Like ``model`` but on a file, for what an in-memory database cannot do (archives, backups)."""
+    db = Database(str(tmp_path / 'planner.db'))
+    db.create_table()
+    yield ActivityModel(db)
+    db.close()
+
+
+def activity(title: str, **fields) -> dict:
+    """An activity dict with every column filled in, as the form would send it."""
+    return {
+        'category': 'Meeting', 'activity': title, 'status': 'Pending', 'notification': None,
+        'timeline': None, 'deadline': None, 'priority': 'Medium', 'notes': None, **fields,
+    }
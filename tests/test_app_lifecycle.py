@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import pytest
+from PyQt5.QtCore import QDate, QThreadPool
+from PyQt5.QtWidgets import QApplication
+
+import planner_app
+from conftest import activity
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def test_closing_the_view_stops_background_work_before_the_database_closes(app, tmp_path):
+    db = planner_app.Database(str(tmp_path / 'planner.db'))
+    db.create_table()
+    view = planner_app.ActivityView(planner_app.ActivityModel(db))
+    view.show()
+    started, steps, results = threading.Event(), [], []
+
+    def slow_task(progress):
+        started.set()
+        for step in range(500):
+            progress(step, 500)
+            # Fails once the database has been closed underneath the task
+            db.count_activities()
+            steps.append(step)
+            time.sleep(0.01)
+        return 'finished'
+
+    worker = view.run_in_background(slow_task, on_result=results.append)
+    assert started.wait(5)
+    view.close()
+    assert worker.is_cancelled()
+    assert QThreadPool.globalInstance().activeThreadCount() == 0
+    done = len(steps)
+    assert done < 500
+    db.close()
+    # Timers and queued signals still run until the event loop quits; nothing new may start
+    view.run_in_background(slow_task, on_result=results.append)
+    app.processEvents()
+    assert QThreadPool.globalInstance().activeThreadCount() == 0
+    assert len(steps) == done
+    assert results == []
+
+
+def settle(app):
+    # Let queued starts run, then deliver the results of everything they started
+    for _ in range(3):
+        app.processEvents()
+        QThreadPool.globalInstance().waitForDone()
+    app.processEvents()
+
+
+def test_conflict_analysis_waits_until_the_dashboard_asks_for_it(app, tmp_path):
+    db = planner_app.Database(str(tmp_path / 'planner.db'))
+    db.create_table()
+    view = planner_app.ActivityView(planner_app.ActivityModel(db))
+    view.show()
+    settle(app)
+    assert view.conflicts is None
+    assert 'check now' in view.dashboard.labels['Conflicts'].text()
+
+    view.dashboard.conflicts_requested.emit()
+    settle(app)
+    assert view.conflicts is not None
+    assert 'check now' not in view.dashboard.labels['Conflicts'].text()
+    view.close()
+    db.close()
+
+
+def test_reopening_a_gantt_chart_reuses_the_layout_built_for_the_same_data(app, tmp_path):
+    db = planner_app.Database(str(tmp_path / 'planner.db'))
+    db.create_table()
+    model = planner_app.ActivityModel(db)
+    model.add_activity(activity('Plan', timeline='2024-05-01 - 2024-05-20'))
+    view = planner_app.ActivityView(model)
+    view.start_date_edit.setDate(QDate(2024, 1, 1))
+    view.end_date_edit.setDate(QDate(2024, 12, 31))
+    view.show()
+    settle(app)
+
+    view.generate_gantt_chart()
+    settle(app)
+    first = view.gantt_window.layout_data
+    view.generate_gantt_chart()
+    settle(app)
+    assert view.gantt_window.layout_data is first
+
+    model.add_activity(activity('Review', timeline='2024-06-01 - 2024-06-05'))
+    view.generate_gantt_chart()
+    settle(app)
+    assert view.gantt_window.layout_data is not first
+    view.close()
+    db.close()
+
+
+def test_flipping_calendar_years_runs_one_check_per_year_at_a_time(app, tmp_path):
+    db = planner_app.Database(str(tmp_path / 'planner.db'))
+    db.create_table()
+    view = planner_app.ActivityView(planner_app.ActivityModel(db))
+    view.show()
+    view.show_calendar()
+    settle(app)
+    gate, checks = threading.Event(), []
+    prepare, run = view.prepare_calendar_year, view.run_in_background
+
+    def gated_prepare(year, cached_version, progress):
+        gate.wait(5)
+        return prepare(year, cached_version, progress)
+
+    def recording_run(fn, *args, **kwargs):
+        if fn is gated_prepare:
+            checks.append(args[0])
+        return run(fn, *args, **kwargs)
+
+    view.prepare_calendar_year, view.run_in_background = gated_prepare, recording_run
+    for _ in range(5):
+        view.load_calendar_year(2030)
+    assert sorted(checks) == [2029, 2030, 2031]
+
+    gate.set()
+    settle(app)
+    # Each year is checked once more for the requests made while its first check ran
+    assert sorted(checks) == [2029, 2029, 2030, 2030, 2031, 2031]
+    assert view.calendar_loads == {}
+    assert {2029, 2030, 2031} <= set(view.calendar_years)
+    view.close()
+    view.calendar_window.close()
+    db.close()
@@ -0,0 +1,51 @@
+import os
+from datetime import date
+
+from conftest import activity
+from planner_model import archive_path
+
+LAST_YEAR = date.today().year - 1
+
+
+def everything(model) -> tuple:
+    rows, _ = model.query_activities(order_by=['id'])
+    return rows, model.recurrences(), model.summary(), model.load_timelines('2021-01-01', f'{LAST_YEAR}-12-31')
+
+
+def test_archiving_and_unarchiving_puts_back_every_row_and_recurrence(file_model):
+    done = {'status': 'Completed'}
+    old = [
+        file_model.add_activity(activity('Report 2022', deadline='2022-03-31', **done)),
+        file_model.add_activity(activity('Trip 2022', timeline='2022-07-01 - 2022-07-14', category='Travel', **done)),
+        file_model.add_activity(activity('Call 2023', notification='2023-05-02 08:15:00', notes='called', **done)),
+    ]
+    kept = [
+        file_model.add_activity(activity('Still open', deadline='2022-01-10')),
+        file_model.add_activity(
+            activity('Yearly review', deadline='2022-12-01', recurrence='FREQ=YEARLY;COUNT=5', **done)
+        ),
+        file_model.add_activity(activity('Undated', **done)),
+    ]
+    file_model.add_activity(activity('Old but last', deadline='2023-01-02', **done))
+    before = everything(file_model)
+
+    assert file_model.archive(LAST_YEAR) == {2022: 2, 2023: 2}
+    assert file_model.archive_years() == [2022, 2023]
+    assert [row[0] for row in file_model.archived_activities(2022)] == [row[0] for row in old[:2]]
+    rows, _ = file_model.query_activities(order_by=['id'])
+    assert [row[0] for row in rows] == [row[0] for row in kept]
+    assert file_model.recurrences() == before[1]
+    # Archived ids are not handed out again, so bringing them back cannot collide
+    newest = file_model.add_activity(activity('Added while archived'))
+    assert newest[0] > max(row[0] for row in before[0])
+    file_model.delete_activity(newest[0])
+
+    assert file_model.unarchive(2023) == 2
+    assert file_model.unarchive(2022) == 2
+    after = everything(file_model)
+    assert after[:3] == before[:3]
+    order = ['start_day', 'activity']
+    timelines = [frame.sort_values(order).reset_index(drop=True) for frame in (before[3], after[3])]
+    assert len(timelines[0]) == 1 and timelines[1].equals(timelines[0])
+    assert file_model.archive_years() == []
+    assert not os.path.exists(archive_path(file_model.db.db_name, 2022))
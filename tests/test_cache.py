@@ -0,0 +1,27 @@
+import os
+
+from planner_cache import RenderCache
+
+
+def disk_size(directory) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(directory))
+
+
+def test_rewriting_a_key_counts_only_its_latest_file(tmp_path):
+    cache = RenderCache(str(tmp_path), disk_bytes=1000)
+    cache.put('a', b'x' * 100)
+    for size in (300, 50, 200, 200):
+        cache.put('a', b'y' * size)
+    cache.put('b', b'z' * 100)
+    assert cache._disk_used == disk_size(tmp_path) == 300
+
+
+def test_disk_tier_drops_the_least_recently_used_files_over_budget(tmp_path):
+    cache = RenderCache(str(tmp_path), memory_bytes=0, disk_bytes=250)
+    cache.put('old', b'1' * 100)
+    cache.put('new', b'2' * 100)
+    os.utime(tmp_path / 'old', (0, 0))
+    cache.put('newest', b'3' * 100)
+    assert sorted(os.listdir(tmp_path)) == ['new', 'newest']
+    assert cache.get('old') is None
+    assert cache.get('new') == b'2' * 100
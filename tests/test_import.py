@@ -0,0 +1,56 @@
+import csv
+import sqlite3
+
+import pytest
+
+from convert_csv_to_db import convert_csv_to_sqlite
+
+HEADER = ['id', 'category', 'activity', 'status', 'notification', 'timeline', 'deadline', 'priority', 'notes']
+ROW = {'id': '', 'category': 'Meeting', 'activity': 'Stand-up', 'status': 'Pending',
+       'notification': '2024-05-01 09:00:00', 'timeline': '', 'deadline': '2024-05-01', 'priority': 'Medium',
+       'notes': '', 'recurrence': ''}
+
+
+def write_csv(path, rows, header=HEADER):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, header, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows({**ROW, **row} for row in rows)
+    return str(path)
+
+
+def count(db_name, table='activities'):
+    conn = sqlite3.connect(db_name)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_imports_every_chunk(tmp_path):
+    db_name = str(tmp_path / 'out.db')
+    assert convert_csv_to_sqlite(write_csv(tmp_path / 'in.csv', [{}] * 5), db_name, chunk_size=2) == 5
+    assert count(db_name) == 5
+
+
+def test_failed_replace_keeps_existing_activities(tmp_path):
+    db_name = str(tmp_path / 'out.db')
+    convert_csv_to_sqlite(write_csv(tmp_path / 'good.csv', [{}] * 3), db_name)
+    bad = write_csv(tmp_path / 'bad.csv', [{}, {}, {'status': 'Bogus'}])
+    with pytest.raises(ValueError, match='Bogus'):
+        convert_csv_to_sqlite(bad, db_name, chunk_size=2)
+    assert count(db_name) == 3
+
+
+def test_recurrence_column_is_imported(tmp_path):
+    rows = [{}, {'recurrence': 'FREQ=WEEKLY;COUNT=4'}, {'recurrence': 'yearly'}]
+    source = write_csv(tmp_path / 'in.csv', rows, HEADER + ['recurrence'])
+    db_name = str(tmp_path / 'out.db')
+    assert convert_csv_to_sqlite(source, db_name, chunk_size=2) == 3
+    assert (count(db_name), count(db_name, 'recurrences')) == (3, 2)
+
+
+def test_bad_recurrence_rule_is_rejected(tmp_path):
+    source = write_csv(tmp_path / 'in.csv', [{'recurrence': 'FREQ=HOURLY'}], HEADER + ['recurrence'])
+    with pytest.raises(ValueError, match='FREQ'):
+        convert_csv_to_sqlite(source, str(tmp_path / 'out.db'))
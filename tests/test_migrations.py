@@ -0,0 +1,68 @@
+import sqlite3
+
+from planner_model import COLUMNS, Database
+
+# The table as the first release of planner_app created it: every column text
+BASELINE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS activities (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category TEXT,
+        activity TEXT,
+        status TEXT,
+        notification TEXT,
+        timeline TEXT,
+        deadline TEXT,
+        priority TEXT,
+        notes TEXT
+    )
+"""
+ROWS = [
+    (3, 'Meeting', 'Kick-off', 'Pending', '2024-05-01 09:30:00', '2024-05-01 - 2024-05-10', '2024-05-10', 'High',
+     'first'),
+    (7, 'Gardening', 'Custom category', 'In Progress', '2024-06-01 06:00:00',
+     '2024-06-01 - 2024-06-03, 2024-06-10 - 2024-06-12', '2024-06-12', 'Low', 'two segments'),
+    (8, 'Personal', 'Bare', 'Completed', None, None, None, 'Medium', None),
+]
+
+
+def baseline_database(path) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute(BASELINE_SCHEMA)
+    conn.executemany(f"INSERT INTO activities VALUES ({', '.join('?' * len(COLUMNS))})", ROWS)
+    conn.commit()
+    conn.close()
+
+
+def test_baseline_database_migrates_with_every_column_intact(tmp_path):
+    path = str(tmp_path / 'baseline.db')
+    baseline_database(path)
+    db = Database(path)
+    db.create_table()
+    try:
+        df = db.load_data(order_by=['id'])
+        loaded = [tuple(None if value != value else value for value in row) for row in df.itertuples(index=False)]
+        assert list(df.columns) == COLUMNS
+        assert loaded == ROWS
+        assert db.connect().execute("PRAGMA user_version").fetchone()[0] == len(Database.MIGRATIONS)
+    finally:
+        db.close()
+
+
+def test_empty_text_in_a_baseline_database_loads_as_missing(tmp_path):
+    path = str(tmp_path / 'baseline.db')
+    baseline_database(path)
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "INSERT INTO activities VALUES (9, 'Personal', 'Strings', 'Pending', '', 'None', '', 'Medium', '')"
+    )
+    conn.commit()
+    conn.close()
+    db = Database(path)
+    db.create_table()
+    try:
+        df = db.load_data()
+        row = df[df['id'] == 9].iloc[0]
+        assert row[['notification', 'timeline', 'deadline']].isna().all()
+        assert (row['activity'], row['notes']) == ('Strings', '')
+    finally:
+        db.close()
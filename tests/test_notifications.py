@@ -0,0 +1,115 @@
+from planner_notifications import NotificationScheduler
+
+START = 1_714_543_200  # 2024-05-01 06:00:00
+HOUR = 3600
+
+
+class FakeClock:
+    def __init__(self, now: int) -> None:
+        self.now = now
+
+    def __call__(self) -> int:
+        return self.now
+
+
+class FakeSource:
+    """Reminders held in memory, answered in ``(when, id)`` order as the database would."""
+
+    def __init__(self) -> None:
+        self.reminders = {}
+
+    def set(self, activity_id: int, when: int, title: str) -> None:
+        self.reminders[activity_id] = (when, title)
+
+    def upcoming_notifications(self, after, limit):
+        rows = sorted((when, activity_id, title) for activity_id, (when, title) in self.reminders.items())
+        return [row for row in rows if row[:2] > tuple(after)][:limit]
+
+
+class Harness:
+    """A scheduler over a fake source and clock, recording what it shows and how long it sleeps."""
+
+    def __init__(self, source: FakeSource, now: int = START, window: int = NotificationScheduler.WINDOW) -> None:
+        self.source = source
+        self.clock = FakeClock(now)
+        self.shown, self.armed = [], []
+        self.scheduler = NotificationScheduler(
+            source, notifier=lambda title, message: self.shown.append(message), arm=self.armed.append, clock=self.clock
+        )
+        self.scheduler.WINDOW = window
+        self.scheduler.start()
+
+    def advance_to(self, now: int) -> int:
+        self.clock.now = now
+        return self.scheduler.fire_due()
+
+
+def test_fires_in_time_order_at_the_due_time():
+    source = FakeSource()
+    for activity_id, (title, when) in enumerate((('third', START + 50 * HOUR), ('first', START + HOUR),
+                                                 ('second', START + 26 * HOUR), ('past', START - HOUR)), 1):
+        source.set(activity_id, when, title)
+    # A window of two makes the heap refill from the source part-way through
+    harness = Harness(source, window=2)
+    assert harness.armed[-1] == HOUR
+    assert harness.advance_to(START + HOUR - 1) == 0
+    assert harness.advance_to(START + HOUR) == 1
+    assert harness.shown == ['first']
+    assert harness.armed[-1] == NotificationScheduler.MAX_SLEEP
+    assert harness.advance_to(START + 60 * HOUR) == 2
+    assert harness.shown == ['first', 'second', 'third']
+
+
+def test_sleeps_until_the_next_reminder():
+    source = FakeSource()
+    source.set(1, START + 600, 'soon')
+    harness = Harness(source)
+    assert harness.armed[-1] == 600
+    assert harness.scheduler.next_due() == START + 600
+
+
+def test_cancelled_reminder_does_not_fire():
+    source = FakeSource()
+    source.set(1, START + HOUR, 'keep')
+    source.set(2, START + 1800, 'drop')
+    harness = Harness(source)
+    del source.reminders[2]
+    harness.scheduler.cancel(2)
+    assert harness.scheduler.next_due() == START + HOUR
+    assert harness.advance_to(START + 2 * HOUR) == 1
+    assert harness.shown == ['keep']
+
+
+def test_edited_reminder_fires_at_its_new_time_only():
+    source = FakeSource()
+    source.set(1, START + HOUR, 'moved')
+    harness = Harness(source)
+    source.set(1, START + 3 * HOUR, 'moved')
+    harness.scheduler.schedule(1, START + 3 * HOUR, 'moved')
+    assert harness.advance_to(START + 2 * HOUR) == 0
+    assert harness.advance_to(START + 3 * HOUR) == 1
+    assert harness.shown == ['moved']
+
+
+def test_new_reminder_is_picked_up_without_reloading():
+    source = FakeSource()
+    source.set(1, START + 25 * HOUR, 'later')
+    harness = Harness(source)
+    source.set(2, START + 1200, 'sooner')
+    harness.scheduler.schedule(2, START + 1200, 'sooner')
+    assert harness.armed[-1] == 1200
+    assert harness.advance_to(START + 1200) == 1
+    assert harness.shown == ['sooner']
+
+
+def test_fired_reminders_do_not_fire_again_after_a_restart():
+    source = FakeSource()
+    source.set(1, START + HOUR, 'first')
+    source.set(2, START + 2 * HOUR, 'second')
+    harness = Harness(source)
+    assert harness.advance_to(START + 90 * 60) == 1
+
+    restarted = Harness(source, now=harness.clock.now)
+    assert restarted.scheduler.fire_due() == 0
+    assert restarted.advance_to(START + 2 * HOUR) == 1
+    assert restarted.shown == ['second']
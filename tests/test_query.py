@@ -0,0 +1,58 @@
+import pytest
+
+from conftest import activity
+from planner_model import PRIORITIES, STATUSES
+
+ORDERS = [
+    ['deadline'], ['-deadline'], ['status', '-deadline'], ['-priority', 'deadline'], ['activity'],
+    ['-notification', 'status'], ['id'], ['-id'],
+]
+
+
+@pytest.fixture
+def crowded(model):
+    """Forty activities sharing a handful of values in every sort column, NULLs included."""
+    model.add_activities([
+        activity(
+            f"Task {n % 4}", status=STATUSES[n % 3], priority=PRIORITIES[n % 2],
+            deadline=[None, '2025-03-01', '2025-03-02', '2025-03-01', None][n % 5],
+            notification=None if n % 3 else '2025-02-01 09:00:00',
+        )
+        for n in range(40)
+    ])
+    return model
+
+
+def pages(model, order_by, size, filters=None) -> list:
+    rows, after = [], None
+    # A cursor that repeats rows would page forever; forty rows need at most 41 pages
+    for _ in range(41):
+        page, keys = model.query_activities(['id'], filters, order_by, after, size)
+        rows += page
+        if len(page) < size:
+            return rows
+        after = keys[-1]
+    pytest.fail(f"paging by {order_by} in pages of {size} did not end")
+
+
+@pytest.mark.parametrize('order_by', ORDERS)
+def test_pages_over_duplicate_keys_add_up_to_the_whole_result(crowded, order_by):
+    whole, _ = crowded.query_activities(['id'], order_by=order_by)
+    assert len(whole) == 40
+    for size in (1, 2, 3, 7, 40):
+        assert pages(crowded, order_by, size) == whole
+
+
+def test_pages_follow_the_order_with_nulls_first_ascending_and_last_descending(crowded):
+    rows, _ = crowded.query_activities(['deadline', 'id'], order_by=['deadline'])
+    expected = sorted(rows, key=lambda row: (row[0] is not None, row[0] or '', row[1]))
+    assert rows == expected
+    rows, _ = crowded.query_activities(['deadline', 'id'], order_by=['-deadline'])
+    assert rows == expected[::-1]
+
+
+def test_filtered_pages_add_up_to_the_filtered_result(crowded):
+    filters = {'status': ['Pending', 'Completed'], 'end_date': '2025-03-01'}
+    whole, _ = crowded.query_activities(['id'], filters, ['-priority', 'deadline'])
+    assert 0 < len(whole) < 40
+    assert pages(crowded, ['-priority', 'deadline'], 3, filters) == whole
@@ -0,0 +1,82 @@
+import pytest
+
+from conftest import activity
+from planner_model import from_epoch_day, to_epoch_day
+from planner_recurrence import Rule, describe_rule, format_rule, occurrence_days, parse_rule
+
+DAILY, WEEKLY, MONTHLY, YEARLY = range(4)
+
+
+def days(*dates) -> list:
+    return [to_epoch_day(day) for day in dates]
+
+
+def dates(series) -> list:
+    return [from_epoch_day(day).isoformat() for day in series]
+
+
+@pytest.mark.parametrize('rule', [
+    Rule(DAILY),
+    Rule(WEEKLY, 2, until=to_epoch_day('2025-06-30')),
+    Rule(MONTHLY, count=10, exceptions=frozenset(days('2025-03-31', '2025-01-31'))),
+    Rule(YEARLY, 3, to_epoch_day('2040-01-01'), 4, frozenset(days('2031-05-01'))),
+])
+def test_rules_round_trip_through_their_text(rule):
+    assert parse_rule(format_rule(rule)) == rule
+
+
+def test_rule_text_is_read_loosely_and_written_canonically():
+    assert parse_rule('yearly') == Rule(YEARLY)
+    text = ' freq = weekly ; interval=2;exdate=2024-12-25T09:00, 2024-12-18 ;until=2025-06-30 00:00; '
+    rule = parse_rule(text)
+    assert format_rule(rule) == 'FREQ=WEEKLY;INTERVAL=2;UNTIL=2025-06-30;EXDATE=2024-12-18,2024-12-25'
+    assert describe_rule(rule) == 'Every 2 weeks until 2025-06-30, except 2 dates'
+    assert parse_rule('') is None and parse_rule(None) is None
+
+
+@pytest.mark.parametrize('text', [
+    'FREQ=HOURLY', 'INTERVAL=2', 'FREQ=DAILY;BYDAY=MO', 'FREQ=DAILY;COUNT', 'FREQ=DAILY;INTERVAL=0',
+    'FREQ=DAILY;COUNT=0', 'FREQ=DAILY;UNTIL=someday',
+])
+def test_malformed_rules_are_rejected(text):
+    with pytest.raises(ValueError):
+        parse_rule(text)
+
+
+def test_count_ends_a_series_however_late_it_is_entered():
+    rule, anchor = parse_rule('FREQ=WEEKLY;COUNT=3'), to_epoch_day('2025-01-06')
+    assert dates(occurrence_days(rule, anchor, anchor)) == ['2025-01-06', '2025-01-13', '2025-01-20']
+    assert dates(occurrence_days(rule, anchor, to_epoch_day('2025-01-14'))) == ['2025-01-20']
+    assert list(occurrence_days(rule, anchor, to_epoch_day('2025-01-21'))) == []
+
+
+def test_exceptions_still_count_towards_count():
+    rule, anchor = parse_rule('FREQ=DAILY;COUNT=3;EXDATE=2025-01-02'), to_epoch_day('2025-01-01')
+    assert dates(occurrence_days(rule, anchor, anchor)) == ['2025-01-01', '2025-01-03']
+
+
+def test_until_is_inclusive_and_the_earlier_of_until_and_end_wins():
+    rule, anchor = parse_rule('FREQ=DAILY;INTERVAL=2;UNTIL=2025-01-05'), to_epoch_day('2025-01-01')
+    assert dates(occurrence_days(rule, anchor, anchor)) == ['2025-01-01', '2025-01-03', '2025-01-05']
+    assert dates(occurrence_days(rule, anchor, anchor, to_epoch_day('2025-01-04'))) == ['2025-01-01', '2025-01-03']
+    monthly = parse_rule('FREQ=MONTHLY;UNTIL=2025-03-14')
+    assert dates(occurrence_days(monthly, to_epoch_day('2025-01-15'), 0)) == ['2025-01-15', '2025-02-15']
+
+
+def test_days_a_month_lacks_are_skipped_without_using_up_count():
+    rule, anchor = parse_rule('FREQ=MONTHLY;COUNT=3'), to_epoch_day('2025-01-31')
+    assert dates(occurrence_days(rule, anchor, anchor)) == ['2025-01-31', '2025-03-31', '2025-05-31']
+    assert dates(occurrence_days(rule, anchor, to_epoch_day('2025-04-01'))) == ['2025-05-31']
+    leap = parse_rule('FREQ=YEARLY;COUNT=2')
+    assert dates(occurrence_days(leap, to_epoch_day('2024-02-29'), 0)) == ['2024-02-29', '2028-02-29']
+
+
+def test_a_repeating_activity_is_expanded_only_within_its_count(model):
+    row = model.add_activity(activity(
+        'Stand-up', timeline='2025-01-06 - 2025-01-07', deadline='2025-01-07', recurrence='FREQ=WEEKLY;COUNT=3'
+    ))
+    assert model.recurrences() == {row[0]: (Rule(WEEKLY, count=3), to_epoch_day('2025-01-07'))}
+    timelines = model.load_timelines('2025-01-01', '2025-03-31')
+    assert dates(sorted(timelines['start_day'])) == ['2025-01-06', '2025-01-13', '2025-01-20']
+    assert model.active_between('2025-01-20', '2025-01-20') == [row[0]]
+    assert model.active_between('2025-01-27', '2025-01-28') == []
@@ -0,0 +1,157 @@
+import http.client
+import json
+import queue
+import threading
+
+import pytest
+from conftest import activity
+
+from planner_client import PlannerClient, RemoteModel
+from planner_model import ActivityModel, Database
+from planner_server import CLIENT_HEADER, REQUEST_HEADER, PlannerServer
+
+
+@pytest.fixture
+def server(tmp_path):
+    db = Database(str(tmp_path / 'server.db'))
+    db.create_table()
+    server = PlannerServer(ActivityModel(db), port=0)
+    thread = server.run_in_thread()
+    yield server
+    server.stop()
+    thread.join(5)
+    db.close()
+
+
+def remote(server) -> RemoteModel:
+    return RemoteModel(PlannerClient(f'127.0.0.1:{server.port}'))
+
+
+def post(server, path: str, payload: dict, headers: dict = None):
+    conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=10)
+    try:
+        conn.request('POST', path, json.dumps(payload), {'Content-Type': 'application/json', **(headers or {})})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_repeated_write_with_the_same_request_id_is_applied_once(server):
+    headers = {CLIENT_HEADER: 'tester', REQUEST_HEADER: 'write-1'}
+    first = post(server, '/call/add_activity', {'args': [activity('Once')]}, headers)
+    again = post(server, '/call/add_activity', {'args': [activity('Once')]}, headers)
+    assert first == again
+    assert first[0] == 200
+    assert remote(server).count_activities() == 1
+    # A new request id is a new write
+    post(server, '/call/add_activity', {'args': [activity('Twice')]}, {**headers, REQUEST_HEADER: 'write-2'})
+    assert remote(server).count_activities() == 2
+
+
+def get(server, path: str):
+    conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=10)
+    try:
+        conn.request('GET', path)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def follow(model: RemoteModel, since=None) -> queue.Queue:
+    """Collect change-feed events on a daemon thread; the connection ends when the server stops."""
+    events = queue.Queue()
+
+    def run():
+        for event in model.changes(since):
+            events.put(event)
+
+    threading.Thread(target=run, daemon=True).start()
+    return events
+
+
+def next_change(events: queue.Queue) -> dict:
+    while True:
+        event = events.get(timeout=5)
+        if event['kind'] != 'ping':
+            return event
+
+
+def test_pages_through_activities_in_order(server):
+    model = remote(server)
+    model.add_activities([activity(f'Task {i:02}', deadline=f'2024-05-{i + 1:02}') for i in range(25)])
+    assert model.count_activities() == 25
+
+    seen, after = [], None
+    while True:
+        rows, keys = model.query_activities(['id', 'activity'], order_by=['-deadline'], after=after, limit=10)
+        if not rows:
+            break
+        seen.extend(title for _, title in rows)
+        after = keys[-1]
+    assert seen == [f'Task {i:02}' for i in reversed(range(25))]
+
+    first = model.fetch_activities(None, 10)
+    assert [row[0] for row in first] == list(range(1, 11))
+    assert [row[0] for row in model.fetch_activities(first[-1][0], 100)] == list(range(11, 26))
+
+
+def test_add_update_delete_round_trip(server):
+    model = remote(server)
+    row = model.add_activity(activity('Review', notification='2024-05-01 09:00:00', timeline='2024-05-01 - 2024-05-03'))
+    assert row[2:6] == ('Review', 'Pending', '2024-05-01 09:00:00', '2024-05-01 - 2024-05-03')
+    activity_id = row[0]
+
+    before = model.update_activities({activity_id: {'status': 'Completed', 'priority': 'High'}})
+    fetched = model.fetch_activities_by_ids([activity_id])[0]
+    assert (fetched[3], fetched[7]) == ('Completed', 'High')
+    # The returned typed values undo the change
+    model.update_activities(before, encoded=True)
+    fetched = model.fetch_activities_by_ids([activity_id])[0]
+    assert (fetched[3], fetched[7]) == ('Pending', 'Medium')
+
+    rows, rules = model.delete_activities_by_ids([activity_id])
+    assert model.count_activities() == 0
+    model.add_encoded_activities(rows, rules=[rules.get(row[0], (None,))[0] for row in rows])
+    assert model.fetch_activities_by_ids([activity_id]) == [fetched]
+    assert model.delete_activity(activity_id) == activity_id
+    assert model.delete_activity(activity_id) is None
+
+
+def test_change_feed_reaches_a_second_client(server):
+    writer, reader = remote(server), remote(server)
+    events = follow(reader)
+    assert next_change(events)['kind'] == 'hello'
+
+    activity_id = writer.add_activity(activity('Shared'))[0]
+    added = next_change(events)
+    assert (added['kind'], added['ids'], added['origin']) == ('added', [activity_id], writer.client_id)
+    writer.update_activities({activity_id: {'status': 'In Progress'}})
+    assert next_change(events)['kind'] == 'updated'
+    writer.delete_activities_by_ids([activity_id])
+    deleted = next_change(events)
+    assert (deleted['kind'], deleted['ids']) == ('deleted', [activity_id])
+
+    # A client that reconnects gets what it missed
+    replay = follow(remote(server), since=added['seq'])
+    assert next_change(replay)['kind'] == 'hello'
+    assert [next_change(replay)['kind'] for _ in range(2)] == ['updated', 'deleted']
+
+
+def test_invalid_calls_get_error_statuses(server):
+    model = remote(server)
+    activity_id = model.add_activity(activity('Valid'))[0]
+    with pytest.raises(ValueError, match='Nope'):
+        model.update_activities({activity_id: {'status': 'Nope'}})
+    assert model.fetch_activities_by_ids([activity_id])[0][3] == 'Pending'
+
+    assert post(server, '/call/add_activity', {'args': [activity('Bad', priority='Urgent')]})[0] == 400
+    assert post(server, '/call/update_activities', {'args': ['not a dict']})[0] == 400
+    assert post(server, '/call/count_activities', ['not', 'an', 'object'])[0] == 400
+    assert post(server, '/call/drop_everything', {})[0] == 404
+    assert post(server, '/nowhere', {})[0] == 404
+    status, reply = get(server, '/call/count_activities')
+    assert status == 405
+    assert 'error' in reply
+    assert get(server, '/status')[1]['seq'] == 1